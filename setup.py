@@ -40,6 +40,7 @@ setup(
     extras_require={
         "borrowing": ["matplotlib", "scipy"],
         "cluster": ["python-igraph", "scikit-learn"],
+        "jit": ["numba"],
         "test": ["pytest", "coverage", "pytest-mock", "pytest-cov"],
         "dev": ["wheel", "twine", "sphinx", "tox"],
     },
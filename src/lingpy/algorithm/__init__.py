@@ -6,12 +6,17 @@ from lingpy.settings import rcParams
 from lingpy.algorithm.clustering import *
 from lingpy.algorithm._tree import _TreeDist as TreeDist
 
-from .cython import _calign as calign
 from .cython import _malign as malign
 from .cython import _talign as talign
 from .cython import _misc as misc
 
-rcParams['cmodules'] = False
+# use the compiled alignment kernels if numba is available
+try:
+    from .cython import _calign_jit as calign
+    rcParams['cmodules'] = True
+except ImportError:
+    from .cython import _calign as calign
+    rcParams['cmodules'] = False
 
 # define squareform for global lingpy-applications
 squareform = misc.squareform
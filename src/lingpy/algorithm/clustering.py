@@ -5,11 +5,14 @@ from collections import defaultdict
 
 import numpy as np
 import networkx as nx
+try:
+    from scipy import sparse as scipy_sparse
+except ImportError:
+    scipy_sparse = False
 
 from .cython import _misc as misc
 from .cython import _cluster as cluster
 
-from lingpy.thirdparty import linkcomm as lc
 from lingpy.thirdparty import cogent as cg
 from lingpy import log
 from lingpy import util
@@ -559,6 +562,94 @@ def find_threshold(matrix, thresholds=[i * 0.05 for i in range(1, 19)][::-1], lo
         return
 
 
+def _link_communities(size, idxA, idxB, link_threshold, weights=None):
+    """
+    Carry out the single linkage of the edges of a graph by their similarity.
+
+    Parameters
+    ----------
+    size : int
+        The number of nodes in the graph.
+    idxA, idxB : :py:class:`numpy.array`
+        The nodes of each edge.
+    link_threshold : float
+        The similarity below which edges are not linked. If set to c{False},
+        all edges sharing a node are linked.
+    weights : :py:class:`numpy.array` (default=None)
+        The weights of the edges, which are compared by their Tanimoto
+        similarity instead of the Jaccard similarity of the nodes.
+
+    Returns
+    -------
+    labels : :py:class:`numpy.array`
+        The community of each edge, labeled by the lowest edge in it.
+
+    Notes
+    -----
+    Following :evobib:`Ahn2010`, the similarity of two edges which share a
+    node is the similarity of the inclusive neighborhoods of their other
+    nodes, so the similarities are computed for all pairs of nodes at once.
+    The communities are the connected components of the edges whose
+    similarity is not below the threshold, which are found by propagating
+    the lowest labels.
+    """
+    adjacency = np.zeros((size, size))
+    adjacency[idxA, idxB] = adjacency[idxB, idxA] = 1 if weights is None \
+        else weights
+    if weights is None:
+        inclusive = adjacency + np.eye(size)
+        intersections = inclusive @ inclusive.T
+        degrees = inclusive.sum(axis=1)
+        similarities = intersections / (
+            degrees[:, None] + degrees - intersections)
+    else:
+        # the weight of a node to itself is the average of its edges
+        degrees = np.bincount(np.concatenate([idxA, idxB]), minlength=size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.fill_diagonal(adjacency, np.where(
+                degrees > 0, adjacency.sum(axis=1) / degrees, 0))
+        products = adjacency @ adjacency.T
+        squares = np.diag(products)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarities = products / (
+                squares[:, None] + squares - products)
+    # the similarities are rounded as in the heap of distances (1 - s) used
+    # by Ahn et al., so that edges right at the threshold are linked alike
+    similarities = 1 - (1 - similarities)
+
+    # collect the pairs of edges which share a node and are similar enough
+    nodes = np.concatenate([idxA, idxB])
+    others = np.concatenate([idxB, idxA])
+    edges = np.concatenate([np.arange(len(idxA))] * 2)
+    order = np.argsort(nodes, kind='stable')
+    bounds = np.searchsorted(nodes[order], np.arange(size + 1))
+    pairsA, pairsB = [], []
+    for node in range(size):
+        incident = order[bounds[node]:bounds[node + 1]]
+        if len(incident) > 1:
+            i, j = np.triu_indices(len(incident), 1)
+            i, j = incident[i], incident[j]
+            if link_threshold:
+                linked = similarities[others[i], others[j]] >= link_threshold
+                i, j = i[linked], j[linked]
+            pairsA += [edges[i]]
+            pairsB += [edges[j]]
+
+    labels = np.arange(len(idxA))
+    if pairsA:
+        pairsA, pairsB = np.concatenate(pairsA), np.concatenate(pairsB)
+        while True:
+            previous = labels
+            lowest = np.minimum(labels[pairsA], labels[pairsB])
+            labels = labels.copy()
+            np.minimum.at(labels, pairsA, lowest)
+            np.minimum.at(labels, pairsB, lowest)
+            labels = labels[labels]
+            if np.array_equal(labels, previous):
+                break
+    return labels
+
+
 def link_clustering(
         threshold,
         matrix,
@@ -643,31 +734,19 @@ def link_clustering(
     else:
         raise ValueError(matrix_type)
 
-    # get the edges and the adjacency from the thresholds
-    edges = set()
-    adjacency = dict([(t, set()) for t in taxa])
-    weights = {}
-
-    for i, j in util.combinations2(range(len(taxa))):
-        taxA, taxB = taxa[i], taxa[j]
-        if evaluate(matrix[i][j]):
-            edges.add((taxA, taxB))
-            adjacency[taxA].add(taxB)
-            adjacency[taxB].add(taxA)
-        elif matrix_type == 'weights':
-            if matrix[i][j] < threshold:
-                edges.add((taxA, taxB))
-                adjacency[taxA].add(taxB)
-                adjacency[taxB].add(taxA)
-                edges.add((taxB, taxA))
-                weights[taxA, taxB] = -np.log2((1 - matrix[i][j]) ** 2)
-                weights[taxB, taxA] = -np.log2((1 - matrix[i][j]) ** 2)
-    weights = weights or None
-
-    if edges:
-        # initialize the HLC object
-        hlc = lc.HLC(adjacency, edges)
+    # get the edges from the thresholds
+    idxA, idxB = np.triu_indices(len(taxa), 1)
+    scores = np.asarray(matrix, dtype=float)[idxA, idxB]
+    weights = None
+    if matrix_type == 'weights':
+        selected = scores < threshold
+        with np.errstate(divide='ignore'):
+            weights = -np.log2((1 - scores[selected]) ** 2)
     else:
+        selected = evaluate(scores)
+    idxA, idxB = idxA[selected], idxB[selected]
+
+    if not len(idxA):
         # check for null edges: if they occur, return the clusters directly
         if revert:
             if fuzzy:
@@ -681,7 +760,11 @@ def link_clustering(
                 return {a: b for a, b in zip(range(len(taxa)), taxa)}
 
     # carry out the analyses using defaults for the clustering
-    edge2cid = hlc.single_linkage(threshold=link_threshold, w=weights)[0]
+    labels = _link_communities(
+        len(taxa), idxA, idxB, link_threshold, weights=weights)
+    edge2cid = {
+        tuple(sorted([taxa[i], taxa[j]])): label
+        for i, j, label in zip(idxA, idxB, labels)}
 
     # retrieve all clusterings for the nodes
     # retrieve the data
@@ -697,20 +780,16 @@ def link_clustering(
     for idx in clr2nodes:
         clr2nodes[idx] = sorted(set(clr2nodes[idx]))
 
-    # delete all clusters that appear as subsets of larger clusters
+    # delete all clusters that appear as subsets of other clusters, which
+    # are the clusters sharing all of their nodes with at least one other
+    node2clusters = defaultdict(set)
+    for idx, nodes in clr2nodes.items():
+        for node in nodes:
+            node2clusters[node].add(idx)
     delis = set()
-    for keyA, keyB in util.product2(sorted(clr2nodes)):
-        if keyA != keyB:
-            valsA = set(clr2nodes[keyA])
-            valsB = set(clr2nodes[keyB])
-
-            if valsA != valsB:
-                if valsA.issubset(valsB):
-                    delis.add(keyA)
-                elif valsB.issubset(valsA):
-                    delis.add(keyB)
-            elif valsA == valsB:
-                delis.add(keyB)
+    for idx, nodes in clr2nodes.items():
+        if len(set.intersection(*[node2clusters[n] for n in nodes])) > 1:
+            delis.add(idx)
     for k in delis:
         del clr2nodes[k]
 
@@ -778,6 +857,10 @@ def _normalize_matrix(matrix):
     """
     Normalize the matrix.
     """
+    if scipy_sparse and scipy_sparse.issparse(matrix):
+        sums = np.asarray(matrix.sum(axis=0)).ravel()
+        sums[sums == 0] = 1
+        return matrix @ scipy_sparse.diags(1 / sums, format='csc')
     return matrix / sum(matrix)
 
 
@@ -785,30 +868,66 @@ def _is_idempotent(matrix):
     """
     Check whether the matrix is idempotent.
     """
+    nonzero = matrix != 0
+    highest = np.where(nonzero, matrix, -np.inf).max(axis=1)
+    lowest = np.where(nonzero, matrix, np.inf).min(axis=1)
+    return bool(np.all((highest == lowest) | ~nonzero.any(axis=1)))
+
+
+def _apply_function(function, values):
+    """
+    Apply a function to an array of values, one by one if it fails on arrays.
+    """
+    try:
+        result = np.asarray(function(values), dtype=float)
+        if result.shape == values.shape:
+            return result
+    except (TypeError, ValueError):
+        pass
+    return np.array([function(value) for value in values.tolist()], dtype=float)
 
-    for line in matrix:
-        if len([x for x in set(line) if x != 0]) > 1:
-            return False
-    return True
+
+def _prune_matrix(matrix, prune, max_entries):
+    """
+    Remove small entries and keep the largest entries of each column.
+    """
+    # entries are small relative to the largest entry of their column, since
+    # the entries of large clusters are all small after the inflation
+    columns = np.repeat(np.arange(matrix.shape[1]), np.diff(matrix.indptr))
+    maxima = matrix.max(axis=0).toarray().ravel()
+    matrix.data[matrix.data < prune * maxima[columns]] = 0
+    matrix.eliminate_zeros()
+    if max_entries:
+        for j in np.flatnonzero(np.diff(matrix.indptr) > max_entries):
+            column = matrix.data[matrix.indptr[j]:matrix.indptr[j + 1]]
+            column[np.argsort(-column, kind='stable')[max_entries:]] = 0
+        matrix.eliminate_zeros()
+    return matrix
 
 
 def _interprete_matrix(matrix):
     """
     Look for attracting nodes in the matrix.
     """
+    if scipy_sparse and scipy_sparse.issparse(matrix):
+        matrix = matrix.tocsr()
+        matrix.sort_indices()
+        rows = [
+            matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]][
+                matrix.data[matrix.indptr[i]:matrix.indptr[i + 1]] > 0]
+            for i in range(matrix.shape[0])]
+    else:
+        rows = [np.flatnonzero(np.asarray(line) > 0) for line in matrix]
     clusters = []
-    flags = len(matrix) * [False]
-    for i in range(len(matrix)):
-        clr = []
-        for j in range(len(matrix)):
-            if not flags[j] and matrix[i][j] > 0:
-                clr += [j]
-                flags[j] = True
-        if clr:
-            clusters += [clr]
+    flags = np.zeros(len(rows), dtype=bool)
+    for row in rows:
+        clr = row[~flags[row]]
+        flags[clr] = True
+        if len(clr):
+            clusters += [clr.tolist()]
 
     # make a converter for length
-    out = [0 for i in range(len(matrix))]
+    out = [0 for i in range(len(rows))]
     for idx, clr in enumerate(clusters):
         for i in clr:
             out[i] = idx + 1
@@ -819,6 +938,31 @@ def _interprete_matrix(matrix):
     return out
 
 
+def _sparse_mcl(
+        matrix, max_steps, inflation, expansion, prune, max_entries,
+        tolerance):
+    """
+    Iterate the MCL algorithm on a sparse matrix until it converges.
+    """
+    steps = 0
+    while True:
+        # expansion
+        expanded = matrix
+        for i in range(expansion - 1):
+            expanded = expanded @ matrix
+
+        # inflation, pruning and normalization
+        expanded = _normalize_matrix(_prune_matrix(
+            expanded.power(inflation).tocsc(), prune, max_entries))
+
+        steps += 1
+        change = abs(expanded - matrix)
+        matrix = expanded
+        if steps >= max_steps or not change.nnz or change.max() <= tolerance:
+            log.debug("Number of steps {0}.".format(steps))
+            return matrix
+
+
 def mcl(
         threshold,
         matrix,
@@ -829,7 +973,11 @@ def mcl(
         add_self_loops=True,
         revert=False,
         logs=True,
-        matrix_type="distances"):
+        matrix_type="distances",
+        sparse=False,
+        prune=1e-5,
+        max_entries=None,
+        tolerance=1e-8):
     """
     Carry out a clustering using the MCL algorithm (:evobib:`Dongen2000`).
 
@@ -873,6 +1021,31 @@ def mcl(
         it will be adapted to similarity data. If it contains "similarities",
         no adaptation is needed.
 
+    sparse : bool (default=False)
+        If set to c{True}, the matrix is iterated as a sparse matrix, which is
+        pruned in each step. This requires the scipy package.
+
+    prune : float (default=1e-5)
+        In sparse mode, remove all entries below this fraction of the largest
+        entry of their column after each inflation.
+
+    max_entries : int (default=None)
+        In sparse mode, keep only this number of the largest entries of each
+        column after each inflation.
+
+    tolerance : float (default=1e-8)
+        In sparse mode, the iteration stops when no entry of the matrix
+        changes by more than this value.
+
+    Notes
+    -----
+    In sparse mode, the pruning keeps the matrices sparse during the
+    iteration, so that graphs with thousands of nodes can be clustered. The
+    clusters are usually the same as in dense mode, apart from their labels.
+    Since tiny remaining entries are pruned, however, single items which keep
+    a residual weight on themselves in dense mode, and thus form a cluster of
+    their own, are joined to the cluster of their attractor.
+
     Examples
     --------
 
@@ -901,6 +1074,9 @@ def mcl(
     {1: ['German', 'English', 'Dutch'], 2: ['Swedish', 'Icelandic']}
 
     """
+    if sparse and not scipy_sparse:
+        raise ValueError("The package scipy is needed to run this analysis.")
+
     # check for type of matrix
     if type(matrix) != np.ndarray:
         imatrix = np.array(matrix)
@@ -909,13 +1085,13 @@ def mcl(
 
     # check for matrix type and decide how to handle logs
     if matrix_type == 'distances':
-        evaluate = lambda x: True if x < threshold else False
+        evaluate = lambda x: x < threshold
         if logs == True:
             logs = lambda x: -np.log2((1 - x) ** 2)
         elif logs == False:
             logs = lambda x: x
     elif matrix_type == 'similarities':
-        evaluate = lambda x: True if x > threshold else False
+        evaluate = lambda x: x > threshold
         if logs == True:
             logs = lambda x: -np.log(x ** 2)
         else:
@@ -923,18 +1099,19 @@ def mcl(
     else:
         raise ValueError(matrix_type)
 
-    # check for threshold
+    # check for threshold, the upper triangle is mirrored
     if threshold:
-        for i, j in util.combinations2(range(len(imatrix))):
-            score = imatrix[i][j]
-            evaluation = logs(score) if evaluate(score) else 0
-            imatrix[i][j] = evaluation
-            imatrix[j][i] = evaluation
+        idxA, idxB = np.triu_indices(len(imatrix), 1)
+        scores = imatrix[idxA, idxB].astype(float)
+        selected = evaluate(scores)
+        evaluation = np.zeros(len(scores))
+        evaluation[selected] = _apply_function(logs, scores[selected])
+        imatrix[idxA, idxB] = evaluation
+        imatrix[idxB, idxA] = evaluation
 
     # check for self_loops
     if add_self_loops == True:
-        for i in range(len(imatrix)):
-            imatrix[i][i] = 1
+        np.fill_diagonal(imatrix, 1)
     elif add_self_loops == False:
         pass
     else:
@@ -944,25 +1121,30 @@ def mcl(
     # normalize the matrix
     imatrix = _normalize_matrix(imatrix)
 
-    # start looping and the like
-    steps = 0
-    while True:
-        # expansion
-        imatrix = np.linalg.matrix_power(imatrix, expansion)
+    if sparse:
+        imatrix = _sparse_mcl(
+            scipy_sparse.csc_matrix(imatrix), max_steps, inflation, expansion,
+            prune, max_entries, tolerance)
+    else:
+        # start looping and the like
+        steps = 0
+        while True:
+            # expansion
+            imatrix = np.linalg.matrix_power(imatrix, expansion)
 
-        # inflation
-        imatrix = imatrix ** inflation
+            # inflation
+            imatrix = imatrix ** inflation
 
-        # normalization
-        imatrix = _normalize_matrix(imatrix)
+            # normalization
+            imatrix = _normalize_matrix(imatrix)
 
-        # increase steps
-        steps += 1
+            # increase steps
+            steps += 1
 
-        # check for matrix convergence
-        if steps >= max_steps or _is_idempotent(imatrix):
-            log.debug("Number of steps {0}.".format(steps))
-            break
+            # check for matrix convergence
+            if steps >= max_steps or _is_idempotent(imatrix):
+                log.debug("Number of steps {0}.".format(steps))
+                break
 
     # retrieve the clusters
     clusters = _interprete_matrix(imatrix)
@@ -987,88 +1169,86 @@ def partition_density(matrix, t):
     See :evobib:`Ahn2012` for details on the calculation of partition density
     in a given network.
     """
+    return partition_densities(matrix, [t])[0]
 
-    # compute cutoff for matrix at t
-    m = np.zeros((len(matrix), len(matrix)))
 
-    for i, j in util.combinations2(range(len(matrix))):
-        if matrix[i][j] < t:
-            m[j][i] = m[i][j] = 1
+def partition_densities(matrix, thresholds):
+    """
+    Calculate partition density for several thresholds on a distance matrix.
 
-    # get the total number of links
-    T = sum(m.flatten()) / 2
+    Parameters
+    ----------
+    matrix : list
+        The two-dimensional matrix passed as list or array.
+    thresholds : list
+        The thresholds below which the distances are linked in the network.
 
-    # get connected components
-    nodes = list(range(len(m)))
-    idx = 1
-    parts = [0 for i in range(len(m))]
+    Returns
+    -------
+    densities : list
+        The partition density and the number of connected components for
+        each threshold.
 
-    for i, j in util.combinations2(range(len(m))):
-        if m[i][j] == 1:
-            if parts[i] == parts[j] and parts[i] != 0:
-                pass
-            else:
-                # most complicated, update all the stuff
-                if parts[i] > 0 and parts[j] > 0:
-
-                    # determine best idx
-                    if parts[i] > parts[j]:
-                        this = parts[j]
-                        other = parts[i]
-                    else:
-                        this = parts[i]
-                        other = parts[j]
-
-                    # find all neighbors of the
-                    idxs = [n for n in nodes if parts[n] == other]
-                    for n in idxs:
-                        parts[n] = this
-                elif parts[i] == 0 and parts[j] == 0:
-                    parts[i] = idx
-                    parts[j] = idx
-                    idx += 1
-                elif parts[i] > 0:
-                    parts[j] = parts[i]
-                elif parts[j] > 0:
-                    parts[i] = parts[j]
-
-    # finish unconnected components
-    for i, p in enumerate(parts):
-        if p == 0:
-            parts[i] = max(parts) + 1
-
-    # convert to dictionary
-    components = sorted(set(parts))
-
-    # return zero, if all components are different
-    if len(components) == len(m):
-        return 0.0, len(components)
-
-    # count density
-    D = 0
-
-    for part in components:
-        # get nodes
-        nodes = [n for n in range(len(parts)) if parts[n] == part]
-
-        # get edges
-        edges = 0
-        for i, j in util.combinations2(range(len(nodes))):
-            if m[nodes[i]][nodes[j]] == 1:
-                edges += 1
-
-        N = len(nodes)
-        M = edges
-
-        # calculate sum formula
+    Notes
+    -----
+    The links are added in the order of their distances, and the connected
+    components are merged with a union-find structure which keeps the number
+    of nodes and links of each component, so that all thresholds are
+    evaluated in one pass. See :evobib:`Ahn2012` for details on the
+    calculation of partition density in a given network.
+    """
+    size = len(matrix)
+    idxA, idxB = np.triu_indices(size, 1)
+    weights = np.asarray(matrix, dtype=float)[idxA, idxB]
+    order = np.argsort(weights, kind='stable')
+    edges = list(zip(
+        weights[order].tolist(), idxA[order].tolist(), idxB[order].tolist()))
+
+    parents = list(range(size))
+    nodes = [1 for i in range(size)]
+    links = [0 for i in range(size)]
+    firsts = list(range(size))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    densities = {}
+    T, k, components = 0, 0, size
+    for t in sorted(set(thresholds)):
+        while k < len(edges) and edges[k][0] < t:
+            i, j = find(edges[k][1]), find(edges[k][2])
+            if i != j:
+                if nodes[i] < nodes[j]:
+                    i, j = j, i
+                parents[j] = i
+                nodes[i] += nodes[j]
+                links[i] += links[j]
+                firsts[i] = min(firsts[i], firsts[j])
+                components -= 1
+            links[i] += 1
+            T += 1
+            k += 1
+
+        # return zero, if all components are different
+        if components == size:
+            densities[t] = (0.0, components)
+            continue
+
+        # count density, summing over the components in the order of their
+        # first nodes
+        D = 0
         x = 1
-        try:
-            t = M * (M - (N - x)) / ((N - 1 + x) * (N - x))
-            D += t
-        except ZeroDivisionError:
-            pass
+        for first, i in sorted(
+                (firsts[i], i) for i in range(size) if parents[i] == i):
+            N, M = nodes[i], links[i]
+            if N > 1:
+                D += M * (M - (N - x)) / ((N - 1 + x) * (N - x))
+        densities[t] = (2 / float(T) * D, components)
 
-    return 2 / T * D, len(components)
+    return [densities[t] for t in thresholds]
 
 
 def best_threshold(matrix, trange=(0.3, 0.7, 0.05)):
@@ -1084,10 +1264,9 @@ def best_threshold(matrix, trange=(0.3, 0.7, 0.05)):
     """
     best_score = 0
     best_t = False
-    pds = []
-    for t in np.arange(*trange):
-        p = partition_density(matrix, t)
-        pds += [(p[0], p[1], t)]
+    thresholds = np.arange(*trange)
+    pds = [(p[0], p[1], t) for p, t in zip(
+        partition_densities(matrix, thresholds), thresholds)]
 
     # strip off the hightes values from the end
     delis = []
@@ -1,3 +1,5 @@
+import numpy as np
+
 # we start with basic alignment functions
 def globalign(
         seqA,
@@ -1628,7 +1630,8 @@ def align_pairwise(
         factor,
         scorer,
         restricted_chars,
-        mode
+        mode,
+        sims = None
         ):
     """
     Align a of sequences pairwise.
@@ -1656,6 +1659,9 @@ def align_pairwise(
     r : str
         The string containing restricted characters. Restricted characters
         occur, as a rule, in the prosodic strings, not in the normal sequence.
+    sims : list (default=None)
+        The self-similarities of the sequences. If they are not passed, they
+        are computed from the scorer.
     
     Returns
     -------
@@ -1685,15 +1691,15 @@ def align_pairwise(
 # [autouncomment]     cdef str proA,proB
 
     # get self-scores
-    sims = [0.0 for i in range(lS)]
+    if sims is None:
+        sims = [sum([(1 + factor) * scorer[seq[j],seq[j]] for j in range(
+            len(seq))]) for seq in seqs]
     lens = [0 for i in range(lS)]
 
     for i in range(lS):
         seqA = seqs[i]
         k = len(seqA)
-        sim = sum([(1 + factor) * scorer[seqA[j],seqA[j]] for j in range(k)])
         lens[i] = k
-        sims[i] = sim
         gops[i] = [gop * gops[i][j] for j in range(k)]
     
     # check for restricted chars in the beginning
@@ -2781,3 +2787,433 @@ def corrdist(
                     corrs[almA[j],almB[j]] = 1
 
     return corrs, included
+
+def _score_align(
+        scores,
+        gopA,
+        gopB,
+        proA,
+        proB,
+        resA,
+        resB,
+        M,
+        N,
+        scale,
+        factor,
+        semi,
+        secondary,
+        band,
+        cutoff
+        ):
+    """
+    Compute the similarity of a global or semi-global alignment without \
+    traceback.
+
+    Parameters
+    ----------
+    scores : list
+        The scores of all segments, with one row for each segment of seqB
+        and one column for each segment of seqA.
+    gopA, gopB : list
+        The gap opening penalties, already multiplied by the general gap
+        opening penalty.
+    proA, proB : list
+        The prosodic strings, encoded as unicode code points.
+    resA, resB : list
+        Booleans indicating the restricted characters in the prosodic
+        strings.
+    M, N : int
+        The lengths of seqA and seqB.
+    scale : float
+        The gap extension scale.
+    factor : float
+        The factor by which matches in the same prosodic position are
+        increased.
+    semi : bool
+        Carry out semi-global ("overlap") instead of global alignment.
+    secondary : bool
+        Carry out secondary alignment, as in
+        :py:func:`~lingpy.algorithm.cython.calign.secondary_globalign`.
+    band : int
+        Restrict the computation to the cells whose distance from the
+        diagonal of the matrix does not exceed the band width. Negative
+        values switch banding off.
+    cutoff : float
+        Stop as soon as the similarity is guaranteed to be lower than the
+        cutoff. Use minus infinity to switch this off.
+
+    Returns
+    -------
+    sim : float
+        The similarity score of the alignment. If the computation was stopped
+        early, this is an upper bound of the similarity which is lower than
+        the cutoff.
+
+    Notes
+    -----
+    Only two rows of the dynamic programming matrix are kept, and the
+    similarity is identical to the one of the functions which return the
+    alignments, unless a band is used. The cutoff assumes that gap penalties
+    are not positive and that the factor is not negative: all later rows of
+    the matrix can then only add their best match to the current row.
+    """
+# [autouncomment]     cdef int i,j,lo,hi
+# [autouncomment]     cdef float gapA,gapB,match,best,col
+    prev = [0.0] * (M + 1)
+    cur = [0.0] * (M + 1)
+    prev_tb = [0] * (M + 1)
+    cur_tb = [0] * (M + 1)
+
+    # the first and last cell of each row within the band
+    lower = [0] * (N + 1)
+    upper = [M] * (N + 1)
+    if band >= 0 and N > 0:
+        for i in range(N + 1):
+            lower[i] = max(0, (i * M) // N - band)
+            upper[i] = min(M, -((-i * M) // N) + band)
+
+    # the best possible gain of each row and all rows following it
+    bonus = [0.0] * (N + 2)
+    if cutoff > -np.inf:
+        for i in range(N, 0, -1):
+            best = 0.0
+            for j in range(M):
+                match = scores[i - 1][j] + scores[i - 1][j] * factor
+                if match > best:
+                    best = match
+            bonus[i] = bonus[i + 1] + best
+        # allow for rounding errors in the sums
+        cutoff -= 1e-6 * (1.0 + abs(cutoff))
+
+    prev_tb[0] = 1
+    for j in range(1, M + 1):
+        if semi and not secondary:
+            prev[j] = 0.0
+        else:
+            prev[j] = prev[j - 1] + gopA[j - 1] * scale
+        prev_tb[j] = 2
+    for j in range(upper[0] + 1, M + 1):
+        prev[j] = -np.inf
+        prev_tb[j] = 0
+
+    col = 0.0
+    for i in range(1, N + 1):
+        lo, hi = lower[i], upper[i]
+        for j in range(M + 1):
+            cur[j] = -np.inf
+            cur_tb[j] = 0
+        if secondary or not semi:
+            col += gopB[i - 1] * scale
+        if lo == 0:
+            cur[0] = col
+            cur_tb[0] = 3
+
+        for j in range(max(1, lo), hi + 1):
+            if semi and j == M:
+                gapA = prev[j]
+            elif secondary and resB[i - 1] and not resA[j - 1] and j != M:
+                gapA = prev[j] - 1000000
+            elif prev_tb[j] == 3:
+                gapA = prev[j] + gopB[i - 1] * scale
+            else:
+                gapA = prev[j] + gopB[i - 1]
+
+            if semi and i == N:
+                gapB = cur[j - 1]
+            elif secondary and resA[j - 1] and not resB[i - 1] and i != N:
+                gapB = cur[j - 1] - 1000000
+            elif cur_tb[j - 1] == 2:
+                gapB = cur[j - 1] + gopA[j - 1] * scale
+            else:
+                gapB = cur[j - 1] + gopA[j - 1]
+
+            match = scores[i - 1][j - 1]
+            if proA[j - 1] == proB[i - 1]:
+                match += prev[j - 1] + match * factor
+            elif secondary and resA[j - 1] and not resB[i - 1]:
+                match += prev[j - 1] - 1000000
+            elif secondary and not resA[j - 1] and resB[i - 1]:
+                match += prev[j - 1] - 1000000
+            elif (semi and abs(proA[j - 1] - proB[i - 1]) <= 2) or (
+                    not semi and abs(proA[j - 1] - proB[i - 1]) >= 2):
+                match += prev[j - 1] + match * factor / 2
+            else:
+                match += prev[j - 1]
+
+            if gapA > match and gapA >= gapB:
+                cur[j] = gapA
+                cur_tb[j] = 3
+            elif match >= gapB:
+                cur[j] = match
+                cur_tb[j] = 1
+            else:
+                cur[j] = gapB
+                cur_tb[j] = 2
+
+        if cutoff > -np.inf:
+            best = -np.inf
+            for j in range(lo, hi + 1):
+                if cur[j] > best:
+                    best = cur[j]
+            if best + bonus[i + 1] < cutoff:
+                return best + bonus[i + 1]
+
+        prev, cur = cur, prev
+        prev_tb, cur_tb = cur_tb, prev_tb
+
+    return prev[M]
+
+
+def self_scores(
+        seqs,
+        lengths,
+        factor,
+        scorer
+        ):
+    """
+    Compute the self-similarities of integer-encoded sequences.
+
+    Parameters
+    ----------
+    seqs : :py:class:`numpy.array`
+        A two-dimensional integer array containing one padded sequence per
+        row. The integers are the indices of the segments in the scorer.
+    lengths : :py:class:`numpy.array`
+        The lengths of the sequences.
+    factor : float
+        The factor by which matches are increased when two segments occur in
+        the same prosodic position of an alignment.
+    scorer : :py:class:`numpy.array`
+        A two-dimensional array with the scores for all segments, as provided
+        by :py:attr:`~lingpy.algorithm.cython.misc.ScoreDict.array`.
+
+    Returns
+    -------
+    sims : :py:class:`numpy.array`
+        The similarity of each sequence aligned with itself, as it is used to
+        normalize the distances of
+        :py:func:`~lingpy.algorithm.cython.calign.align_batch`.
+
+    Notes
+    -----
+    Self-similarities only depend on the sequence, the factor, and the scorer,
+    so they can be computed once and passed to all calls of
+    :py:func:`~lingpy.algorithm.cython.calign.align_batch` for the same
+    sequences.
+    """
+# [autouncomment]     cdef int i,j
+# [autouncomment]     cdef float sim
+    sims = np.zeros(len(seqs))
+    for i in range(len(seqs)):
+        sim = 0.0
+        for j in range(lengths[i]):
+            sim += (1.0 + factor) * scorer[seqs[i][j], seqs[i][j]]
+        sims[i] = sim
+    return sims
+
+def _check_band(mode, alignments, band, cutoff):
+    """Make sure band and cutoff are only used for score-only alignments."""
+    if (band is not None or cutoff is not None) and (
+            alignments or mode not in ("global", "overlap")):
+        raise ValueError(
+            "Band and cutoff are only available for global and overlap "
+            "alignments without alignments returned.")
+
+def _bounded(gopsA, gopsB, gop, scale, factor):
+    """Check whether the similarity can only grow by matches."""
+    return factor >= 0 and scale >= 0 and not (
+        np.any(gop * np.asarray(gopsA, dtype=float) > 0) or
+        np.any(gop * np.asarray(gopsB, dtype=float) > 0))
+
+def align_batch(
+        seqsA,
+        seqsB,
+        lengthsA,
+        lengthsB,
+        gopsA,
+        gopsB,
+        prosA,
+        prosB,
+        gop,
+        scale,
+        factor,
+        scorer,
+        mode,
+        restricted_chars,
+        alignments = False,
+        band = None,
+        cutoff = None,
+        simsA = None,
+        simsB = None
+        ):
+    """
+    Align a batch of integer-encoded sequence pairs.
+
+    Parameters
+    ----------
+    seqsA, seqsB : :py:class:`numpy.array`
+        Two-dimensional integer arrays containing one padded sequence per
+        row. The integers are the indices of the segments in the scorer.
+    lengthsA, lengthsB : :py:class:`numpy.array`
+        The lengths of the sequences in seqsA and seqsB.
+    gopsA, gopsB : :py:class:`numpy.array`
+        The gap opening penalties (individual for each segment) in arrays of
+        the same shape as seqsA and seqsB.
+    prosA, prosB : :py:class:`numpy.array`
+        The prosodic strings, encoded as the unicode code points of their
+        characters, in arrays of the same shape as seqsA and seqsB.
+    gop : int
+        The general gap opening penalty by which the individual penalties are
+        multiplied.
+    scale : float
+        The gap extension scale by which consecutive gaps are reduced. LingPy
+        uses a scale rather than a constant gap extension penalty. 
+    factor : float
+        The factor by which matches are increased when two segments occur in
+        the same prosodic position of an alignment.
+    scorer : :py:class:`numpy.array`
+        A two-dimensional array with the scores for all segments, as provided
+        by :py:attr:`~lingpy.algorithm.cython.misc.ScoreDict.array`.
+    mode : { "global", "local", "overlap", "dialign" }
+        Select one of the four basic modes for alignment analyses.
+    restricted_chars : str
+        The string containing restricted characters. Restricted characters
+        occur, as a rule, in the prosodic strings, not in the normal sequence.
+    alignments : bool (default=False)
+        If set to True, also return the alignments. Otherwise, global and
+        overlap alignments only compute the similarity, without traceback.
+    band : int (default=None)
+        Restrict global and overlap alignments to the cells of the matrix
+        whose distance from its diagonal does not exceed the band width. The
+        similarities then approximate those of the full alignments, which
+        works well for sequences of similar length.
+    cutoff : float (default=None)
+        Stop global and overlap alignments as soon as their distance is
+        guaranteed to exceed the cutoff. The distances of these pairs are
+        lower bounds which are still higher than the cutoff. The cutoff is
+        ignored if gap penalties are positive or the factor is negative.
+    simsA, simsB : :py:class:`numpy.array` (default=None)
+        The self-similarities of the sequences in seqsA and seqsB, as computed
+        by :py:func:`~lingpy.algorithm.cython.calign.self_scores`. If they are
+        not passed, they are computed from the scorer.
+
+    Returns
+    -------
+    results : tuple
+        The similarities and the distances (following :evobib:`Downey2008`
+        for normalization) of all pairs as arrays, and, if "alignments" is set
+        to True, a list of alignments, in which each alignment is a tuple of
+        the positions of the aligned segments in the two sequences, with -1
+        representing gaps. Distances which cannot be normalized, since the
+        self-similarity of both sequences is zero, are returned as NaN.
+
+    Notes
+    -----
+    This function is the batch counterpart of
+    :py:func:`~lingpy.algorithm.cython.calign.align_pairs`, which avoids the
+    per-pair overhead of converting sequences and looking up scores by
+    strings when aligning all words of a concept or a language pair. For
+    local alignments, only the aligned part of the sequences is returned.
+
+    See also
+    --------
+    ~lingpy.algorithm.cython.calign.align_pairs
+    ~lingpy.algorithm.cython.calign.corrdist
+    ~lingpy.algorithm.cython.calign.self_scores
+    """
+# [autouncomment]     cdef int i,j,M,N,lP
+# [autouncomment]     cdef list seqA,seqB,almA,almB
+# [autouncomment]     cdef float sim,simA,simB
+    if mode not in ("global", "local", "overlap", "dialign"):
+        raise ValueError("Unknown alignment mode {0}.".format(mode))
+    _check_band(mode, alignments, band, cutoff)
+    score_only = not alignments and mode in ("global", "overlap")
+    if cutoff is None or not _bounded(gopsA, gopsB, gop, scale, factor):
+        cutoff = np.inf
+    if band is None:
+        band = -1
+    if simsA is None:
+        simsA = self_scores(seqsA, lengthsA, factor, scorer)
+    if simsB is None:
+        simsB = self_scores(seqsB, lengthsB, factor, scorer)
+
+    lP = len(seqsA)
+    sims = np.zeros(lP)
+    dists = np.zeros(lP)
+    alms = []
+
+    for i in range(lP):
+        M, N = int(lengthsA[i]), int(lengthsB[i])
+        seqA = [int(x) for x in seqsA[i][:M]]
+        seqB = [int(x) for x in seqsB[i][:N]]
+        proA = ''.join([chr(x) for x in prosA[i][:M]])
+        proB = ''.join([chr(x) for x in prosB[i][:N]])
+
+        simA, simB = float(simsA[i]), float(simsB[i])
+        if score_only:
+            bound = -np.inf
+            if simA + simB > 0:
+                bound = (1 - cutoff) * (simA + simB) / 2
+            sim = _score_align(
+                    np.asarray(scorer, dtype=float).T[np.ix_(seqB, seqA)].tolist(),
+                    [gop * float(x) for x in gopsA[i][:M]],
+                    [gop * float(x) for x in gopsB[i][:N]],
+                    [int(x) for x in prosA[i][:M]],
+                    [int(x) for x in prosB[i][:N]],
+                    [x in restricted_chars for x in proA],
+                    [x in restricted_chars for x in proB],
+                    M,
+                    N,
+                    scale,
+                    factor,
+                    mode == "overlap",
+                    bool(set(restricted_chars).intersection(set(proA+proB))),
+                    band,
+                    bound
+                    )
+        else:
+            almA, almB, sim = align_pair(
+                    seqA,
+                    seqB,
+                    [float(x) for x in gopsA[i][:M]],
+                    [float(x) for x in gopsB[i][:N]],
+                    proA,
+                    proB,
+                    gop,
+                    scale,
+                    factor,
+                    scorer,
+                    mode,
+                    restricted_chars,
+                    0
+                    )
+        sims[i] = sim
+        if simA + simB == 0:
+            dists[i] = np.nan
+        else:
+            dists[i] = 1 - ( ( 2 * sim ) / ( simA + simB ) )
+
+        if alignments:
+            # convert the aligned segments to their positions
+            if mode == "local":
+                j, k = len(almA[0]), len(almB[0])
+                almA, almB = almA[1], almB[1]
+            else:
+                j, k = 0, 0
+            posA, posB = [], []
+            for a, b in zip(almA, almB):
+                if a == '-':
+                    posA += [-1]
+                else:
+                    posA += [j]
+                    j += 1
+                if b == '-':
+                    posB += [-1]
+                else:
+                    posB += [k]
+                    k += 1
+            alms.append((posA, posB))
+
+    if alignments:
+        return sims, dists, alms
+    return sims, dists
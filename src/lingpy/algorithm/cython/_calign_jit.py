@@ -0,0 +1,817 @@
+"""
+Compiled versions of the alignment kernels in :py:mod:`._calign`.
+
+The basic alignment functions are compiled with `numba
+<http://numba.pydata.org>`_ and operate on integer-encoded prosodic strings
+and a dense matrix of segment scores. The module raises an ``ImportError``
+if numba is not installed, in which case :py:mod:`lingpy.algorithm` falls back
+to the pure Python implementation in :py:mod:`._calign`, which yields
+identical results.
+"""
+import types
+
+import numpy as np
+from numba import njit
+
+from . import _calign
+from ._misc import ScoreDict
+
+
+@njit(cache=True)
+def _traceback(traceback, M, N):
+    """
+    Follow a global traceback from the lower right corner of the matrix.
+
+    Notes
+    -----
+    Returns two arrays of indices of the aligned segments in seqA and seqB in
+    reverse order, with -1 indicating a gap.
+    """
+    idxA = np.empty(M + N, dtype=np.int64)
+    idxB = np.empty(M + N, dtype=np.int64)
+    i, j, k = N, M, 0
+    while i > 0 or j > 0:
+        if traceback[i, j] == 3:
+            idxA[k] = -1
+            idxB[k] = i - 1
+            i -= 1
+        elif traceback[i, j] == 1:
+            idxA[k] = j - 1
+            idxB[k] = i - 1
+            i -= 1
+            j -= 1
+        else:
+            idxA[k] = j - 1
+            idxB[k] = -1
+            j -= 1
+        k += 1
+    return idxA[:k], idxB[:k]
+
+
+@njit(cache=True)
+def _local_traceback(traceback, k, l, M, N):
+    """
+    Follow a local traceback starting from the cell (k, l).
+
+    Notes
+    -----
+    Returns the reversed index arrays of the aligned part, and the row and
+    column at which the traceback stopped.
+    """
+    idxA = np.empty(M + N, dtype=np.int64)
+    idxB = np.empty(M + N, dtype=np.int64)
+    i, j, n = k, l, 0
+    while traceback[i, j] != 0:
+        if traceback[i, j] == 3:
+            idxA[n] = -1
+            idxB[n] = i - 1
+            i -= 1
+        elif traceback[i, j] == 1:
+            idxA[n] = j - 1
+            idxB[n] = i - 1
+            i -= 1
+            j -= 1
+        elif traceback[i, j] == 2:
+            idxA[n] = j - 1
+            idxB[n] = -1
+            j -= 1
+        else:
+            break
+        n += 1
+    return idxA[:n], idxB[:n], i, j
+
+
+@njit(cache=True)
+def _globalign(scores, gopA, gopB, proA, proB, M, N, scale, factor):
+    matrix = np.zeros((N + 1, M + 1))
+    traceback = np.zeros((N + 1, M + 1), dtype=np.int8)
+    traceback[0, 0] = 1
+    for i in range(1, M + 1):
+        matrix[0, i] = matrix[0, i - 1] + gopA[i - 1] * scale
+        traceback[0, i] = 2
+    for i in range(1, N + 1):
+        matrix[i, 0] = matrix[i - 1, 0] + gopB[i - 1] * scale
+        traceback[i, 0] = 3
+
+    for i in range(1, N + 1):
+        for j in range(1, M + 1):
+            if traceback[i - 1, j] == 3:
+                gapA = matrix[i - 1, j] + gopB[i - 1] * scale
+            else:
+                gapA = matrix[i - 1, j] + gopB[i - 1]
+
+            if traceback[i, j - 1] == 2:
+                gapB = matrix[i, j - 1] + gopA[j - 1] * scale
+            else:
+                gapB = matrix[i, j - 1] + gopA[j - 1]
+
+            match = scores[i - 1, j - 1]
+            if proA[j - 1] == proB[i - 1]:
+                match += matrix[i - 1, j - 1] + match * factor
+            elif abs(proA[j - 1] - proB[i - 1]) >= 2:
+                match += matrix[i - 1, j - 1] + match * factor / 2
+            else:
+                match += matrix[i - 1, j - 1]
+
+            if gapA > match and gapA >= gapB:
+                matrix[i, j] = gapA
+                traceback[i, j] = 3
+            elif match >= gapB:
+                matrix[i, j] = match
+                traceback[i, j] = 1
+            else:
+                matrix[i, j] = gapB
+                traceback[i, j] = 2
+
+    idxA, idxB = _traceback(traceback, M, N)
+    return idxA, idxB, matrix[N, M]
+
+
+@njit(cache=True)
+def _secondary_globalign(
+        scores, gopA, gopB, proA, proB, resA, resB, M, N, scale, factor):
+    matrix = np.zeros((N + 1, M + 1))
+    traceback = np.zeros((N + 1, M + 1), dtype=np.int8)
+    traceback[0, 0] = 1
+    for i in range(1, M + 1):
+        matrix[0, i] = matrix[0, i - 1] + gopA[i - 1] * scale
+        traceback[0, i] = 2
+    for i in range(1, N + 1):
+        matrix[i, 0] = matrix[i - 1, 0] + gopB[i - 1] * scale
+        traceback[i, 0] = 3
+
+    for i in range(1, N + 1):
+        for j in range(1, M + 1):
+            if resB[i - 1] and not resA[j - 1] and j != M:
+                gapA = matrix[i - 1, j] - 1000000
+            elif traceback[i - 1, j] == 3:
+                gapA = matrix[i - 1, j] + gopB[i - 1] * scale
+            else:
+                gapA = matrix[i - 1, j] + gopB[i - 1]
+
+            if resA[j - 1] and not resB[i - 1] and i != N:
+                gapB = matrix[i, j - 1] - 1000000
+            elif traceback[i, j - 1] == 2:
+                gapB = matrix[i, j - 1] + gopA[j - 1] * scale
+            else:
+                gapB = matrix[i, j - 1] + gopA[j - 1]
+
+            match = scores[i - 1, j - 1]
+            if proA[j - 1] == proB[i - 1]:
+                match += matrix[i - 1, j - 1] + match * factor
+            elif resA[j - 1] and not resB[i - 1]:
+                match += matrix[i - 1, j - 1] - 1000000
+            elif not resA[j - 1] and resB[i - 1]:
+                match += matrix[i - 1, j - 1] - 1000000
+            elif abs(proA[j - 1] - proB[i - 1]) >= 2:
+                match += matrix[i - 1, j - 1] + match * factor / 2
+            else:
+                match += matrix[i - 1, j - 1]
+
+            if gapA > match and gapA >= gapB:
+                matrix[i, j] = gapA
+                traceback[i, j] = 3
+            elif match >= gapB:
+                matrix[i, j] = match
+                traceback[i, j] = 1
+            else:
+                matrix[i, j] = gapB
+                traceback[i, j] = 2
+
+    idxA, idxB = _traceback(traceback, M, N)
+    return idxA, idxB, matrix[N, M]
+
+
+@njit(cache=True)
+def _semi_globalign(scores, gopA, gopB, proA, proB, M, N, scale, factor):
+    matrix = np.zeros((N + 1, M + 1))
+    traceback = np.zeros((N + 1, M + 1), dtype=np.int8)
+    traceback[0, 0] = 1
+    for i in range(1, M + 1):
+        traceback[0, i] = 2
+    for i in range(1, N + 1):
+        traceback[i, 0] = 3
+
+    for i in range(1, N + 1):
+        for j in range(1, M + 1):
+            if j == M:
+                gapA = matrix[i - 1, j]
+            elif traceback[i - 1, j] == 3:
+                gapA = matrix[i - 1, j] + gopB[i - 1] * scale
+            else:
+                gapA = matrix[i - 1, j] + gopB[i - 1]
+
+            if i == N:
+                gapB = matrix[i, j - 1]
+            elif traceback[i, j - 1] == 2:
+                gapB = matrix[i, j - 1] + gopA[j - 1] * scale
+            else:
+                gapB = matrix[i, j - 1] + gopA[j - 1]
+
+            match = scores[i - 1, j - 1]
+            if proA[j - 1] == proB[i - 1]:
+                match += matrix[i - 1, j - 1] + match * factor
+            elif abs(proA[j - 1] - proB[i - 1]) <= 2:
+                match += matrix[i - 1, j - 1] + match * factor / 2
+            else:
+                match += matrix[i - 1, j - 1]
+
+            if gapA > match and gapA >= gapB:
+                matrix[i, j] = gapA
+                traceback[i, j] = 3
+            elif match >= gapB:
+                matrix[i, j] = match
+                traceback[i, j] = 1
+            else:
+                matrix[i, j] = gapB
+                traceback[i, j] = 2
+
+    idxA, idxB = _traceback(traceback, M, N)
+    return idxA, idxB, matrix[N, M]
+
+
+@njit(cache=True)
+def _secondary_semi_globalign(
+        scores, gopA, gopB, proA, proB, resA, resB, M, N, scale, factor):
+    matrix = np.zeros((N + 1, M + 1))
+    traceback = np.zeros((N + 1, M + 1), dtype=np.int8)
+    traceback[0, 0] = 1
+    for i in range(1, M + 1):
+        matrix[0, i] = matrix[0, i - 1] + gopA[i - 1] * scale
+        traceback[0, i] = 2
+    for i in range(1, N + 1):
+        matrix[i, 0] = matrix[i - 1, 0] + gopB[i - 1] * scale
+        traceback[i, 0] = 3
+
+    for i in range(1, N + 1):
+        for j in range(1, M + 1):
+            if j == M:
+                gapA = matrix[i - 1, j]
+            elif resB[i - 1] and not resA[j - 1] and j != M:
+                gapA = matrix[i - 1, j] - 1000000
+            elif traceback[i - 1, j] == 3:
+                gapA = matrix[i - 1, j] + gopB[i - 1] * scale
+            else:
+                gapA = matrix[i - 1, j] + gopB[i - 1]
+
+            if i == N:
+                gapB = matrix[i, j - 1]
+            elif resA[j - 1] and not resB[i - 1] and i != N:
+                gapB = matrix[i, j - 1] - 1000000
+            elif traceback[i, j - 1] == 2:
+                gapB = matrix[i, j - 1] + gopA[j - 1] * scale
+            else:
+                gapB = matrix[i, j - 1] + gopA[j - 1]
+
+            match = scores[i - 1, j - 1]
+            if proA[j - 1] == proB[i - 1]:
+                match += matrix[i - 1, j - 1] + match * factor
+            elif resA[j - 1] and not resB[i - 1]:
+                match += matrix[i - 1, j - 1] - 1000000
+            elif not resA[j - 1] and resB[i - 1]:
+                match += matrix[i - 1, j - 1] - 1000000
+            elif abs(proA[j - 1] - proB[i - 1]) <= 2:
+                match += matrix[i - 1, j - 1] + match * factor / 2
+            else:
+                match += matrix[i - 1, j - 1]
+
+            if gapA > match and gapA >= gapB:
+                matrix[i, j] = gapA
+                traceback[i, j] = 3
+            elif match >= gapB:
+                matrix[i, j] = match
+                traceback[i, j] = 1
+            else:
+                matrix[i, j] = gapB
+                traceback[i, j] = 2
+
+    idxA, idxB = _traceback(traceback, M, N)
+    return idxA, idxB, matrix[N, M]
+
+
+@njit(cache=True)
+def _localign(scores, gopA, gopB, proA, proB, M, N, scale, factor):
+    matrix = np.zeros((N + 1, M + 1))
+    traceback = np.zeros((N + 1, M + 1), dtype=np.int8)
+    sim = 0.0
+    k, l = 0, 0
+
+    for i in range(1, N + 1):
+        for j in range(1, M + 1):
+            if traceback[i - 1, j] == 3:
+                gapA = matrix[i - 1, j] + gopB[i - 1] * scale
+            else:
+                gapA = matrix[i - 1, j] + gopB[i - 1]
+
+            if traceback[i, j - 1] == 2:
+                gapB = matrix[i, j - 1] + gopA[j - 1] * scale
+            else:
+                gapB = matrix[i, j - 1] + gopA[j - 1]
+
+            match = scores[i - 1, j - 1]
+            if proA[j - 1] == proB[i - 1]:
+                match += matrix[i - 1, j - 1] + match * factor
+            elif abs(proA[j - 1] - proB[i - 1]) <= 2:
+                match += matrix[i - 1, j - 1] + match * factor / 2
+            else:
+                match += matrix[i - 1, j - 1]
+
+            if gapA >= match and gapA >= gapB and gapA >= 0.0:
+                matrix[i, j] = gapA
+                traceback[i, j] = 3
+            elif match >= gapB and match >= 0.0:
+                matrix[i, j] = match
+                traceback[i, j] = 1
+            elif gapB >= 0.0:
+                matrix[i, j] = gapB
+                traceback[i, j] = 2
+            else:
+                matrix[i, j] = 0.0
+                traceback[i, j] = 0
+
+            if matrix[i, j] >= sim:
+                sim = matrix[i, j]
+                k = i
+                l = j
+
+    idxA, idxB, i, j = _local_traceback(traceback, k, l, M, N)
+    return idxA, idxB, k, l, i, j, matrix[k, l]
+
+
+@njit(cache=True)
+def _secondary_localign(
+        scores, gopA, gopB, proA, proB, resA, resB, M, N, scale, factor):
+    matrix = np.zeros((N + 1, M + 1))
+    traceback = np.zeros((N + 1, M + 1), dtype=np.int8)
+    sim = 0.0
+    k, l = 0, 0
+
+    for i in range(1, N + 1):
+        for j in range(1, M + 1):
+            if resB[i - 1] and not resA[j - 1] and j != M:
+                gapA = matrix[i - 1, j] - 1000000
+            elif traceback[i - 1, j] == 3:
+                gapA = matrix[i - 1, j] + gopB[i - 1] * scale
+            else:
+                gapA = matrix[i - 1, j] + gopB[i - 1]
+
+            # the comparison of j with N mirrors the pure Python version
+            if resA[j - 1] and not resB[i - 1] and j != N:
+                gapB = matrix[i, j - 1] - 1000000
+            elif traceback[i, j - 1] == 2:
+                gapB = matrix[i, j - 1] + gopA[j - 1] * scale
+            else:
+                gapB = matrix[i, j - 1] + gopA[j - 1]
+
+            match = scores[i - 1, j - 1]
+            if proA[j - 1] == proB[i - 1]:
+                match += matrix[i - 1, j - 1] + match * factor
+            elif resA[j - 1] and not resB[i - 1]:
+                match += matrix[i - 1, j - 1] - 1000000
+            elif not resA[j - 1] and resB[i - 1]:
+                match += matrix[i - 1, j - 1] - 1000000
+            elif abs(proA[j - 1] - proB[i - 1]) <= 2:
+                match += matrix[i - 1, j - 1] + match * factor / 2
+            else:
+                match += matrix[i - 1, j - 1]
+
+            if gapA >= match and gapA >= gapB and gapA >= 0.0:
+                matrix[i, j] = gapA
+                traceback[i, j] = 3
+            elif match >= gapB and match >= 0.0:
+                matrix[i, j] = match
+                traceback[i, j] = 1
+            elif gapB >= 0.0:
+                matrix[i, j] = gapB
+                traceback[i, j] = 2
+            else:
+                matrix[i, j] = 0.0
+                traceback[i, j] = 0
+
+            if matrix[i, j] >= sim:
+                sim = matrix[i, j]
+                k = i
+                l = j
+
+    idxA, idxB, i, j = _local_traceback(traceback, k, l, M, N)
+    return idxA, idxB, k, l, i, j, matrix[k, l]
+
+
+@njit(cache=True)
+def _dialign(scores, proA, proB, M, N, factor):
+    matrix = np.zeros((N + 1, M + 1))
+    traceback = np.zeros((N + 1, M + 1), dtype=np.int8)
+    traceback[0, 0] = 1
+    for i in range(1, M + 1):
+        traceback[0, i] = 2
+    for i in range(1, N + 1):
+        traceback[i, 0] = 3
+
+    for i in range(1, N + 1):
+        for j in range(1, M + 1):
+            gapA = matrix[i - 1, j]
+            gapB = matrix[i, j - 1]
+
+            match = 0.0
+            for k in range(min(i, j)):
+                match = matrix[i - k - 1, j - k - 1]
+                for l in range(k, -1, -1):
+                    tmp_match = scores[i - l - 1, j - l - 1]
+                    if proA[j - l - 1] == proB[i - l - 1]:
+                        tmp_match = tmp_match * (1 + factor)
+                    elif abs(proA[j - l - 1] - proB[i - l - 1]) <= 2:
+                        tmp_match = tmp_match * (1 + factor / 2)
+                    match += tmp_match
+
+            if gapA > match and gapA >= gapB:
+                matrix[i, j] = gapA
+                traceback[i, j] = 3
+            elif match >= gapB:
+                matrix[i, j] = match
+                traceback[i, j] = 1
+            else:
+                matrix[i, j] = gapB
+                traceback[i, j] = 2
+
+    idxA, idxB = _traceback(traceback, M, N)
+    return idxA, idxB, matrix[N, M]
+
+
+@njit(cache=True)
+def _secondary_dialign(scores, proA, proB, resA, resB, M, N, factor):
+    matrix = np.zeros((N + 1, M + 1))
+    traceback = np.zeros((N + 1, M + 1), dtype=np.int8)
+    traceback[0, 0] = 1
+    for i in range(1, M + 1):
+        traceback[0, i] = 2
+    for i in range(1, N + 1):
+        traceback[i, 0] = 3
+
+    for i in range(1, N + 1):
+        for j in range(1, M + 1):
+            if resB[i - 1] and not resA[j - 1] and j != M:
+                gapA = matrix[i - 1, j] - 1000000
+            else:
+                gapA = matrix[i - 1, j]
+
+            if resA[j - 1] and not resB[i - 1] and i != N:
+                gapB = matrix[i, j - 1] - 1000000
+            else:
+                gapB = matrix[i, j - 1]
+
+            match = 0.0
+            for k in range(min(i, j)):
+                match = matrix[i - k - 1, j - k - 1]
+                for l in range(k, -1, -1):
+                    tmp_match = scores[i - l - 1, j - l - 1]
+                    if proA[j - l - 1] == proB[i - l - 1]:
+                        tmp_match += tmp_match * factor
+                    elif resA[j - l - 1] and not resB[i - l - 1]:
+                        tmp_match += -1000000
+                    elif not resA[j - l - 1] and resB[i - l - 1]:
+                        tmp_match += -1000000
+                    elif abs(proA[j - l - 1] - proB[i - l - 1]) <= 2:
+                        tmp_match += tmp_match * factor / 2
+                    match += tmp_match
+
+            if gapA > match and gapA >= gapB:
+                matrix[i, j] = gapA
+                traceback[i, j] = 3
+            elif match >= gapB:
+                matrix[i, j] = match
+                traceback[i, j] = 1
+            else:
+                matrix[i, j] = gapB
+                traceback[i, j] = 2
+
+    idxA, idxB = _traceback(traceback, M, N)
+    return idxA, idxB, matrix[N, M]
+
+
+def _scores(seqA, seqB, scorer):
+    """
+    Compute the matrix of all segment scores for two sequences.
+
+    Notes
+    -----
+    Rows correspond to the segments in seqB, columns to the segments in seqA,
+    as in the dynamic programming matrices of the alignment functions.
+    """
+    if isinstance(scorer, ScoreDict):
+        try:
+            return scorer.array.T[
+                np.ix_(scorer.encode(seqB), scorer.encode(seqA))]
+        except (ValueError, IndexError):
+            # matrices which are not two-dimensional are scored item-wise
+            pass
+
+    # score each distinct pair of segments only once
+    charsA, charsB = {}, {}
+    idxA = [charsA.setdefault(char, len(charsA)) for char in seqA]
+    idxB = [charsB.setdefault(char, len(charsB)) for char in seqB]
+    table = np.empty((len(charsB), len(charsA)))
+    for charB, j in charsB.items():
+        for charA, i in charsA.items():
+            table[j, i] = scorer[charA, charB]
+    return table.take(idxB, axis=0).take(idxA, axis=1)
+
+
+_score_align = njit(cache=True)(_calign._score_align)
+_self_scores = njit(cache=True)(_calign.self_scores)
+
+
+@njit(cache=True)
+def _align_batch(
+        seqsA, seqsB, lengthsA, lengthsB, gopsA, gopsB, prosA, prosB,
+        gop, scale, factor, scorer, mode, restricted, score_only, band,
+        cutoff, simsA, simsB):
+    lP = seqsA.shape[0]
+    sims = np.zeros(lP)
+    dists = np.zeros(lP)
+    width = seqsA.shape[1] + seqsB.shape[1]
+    almsA = np.full((lP, width), -1, dtype=np.int64)
+    almsB = np.full((lP, width), -1, dtype=np.int64)
+    lengths = np.zeros(lP, dtype=np.int64)
+
+    for p in range(lP):
+        M, N = lengthsA[p], lengthsB[p]
+        scores = np.empty((N, M))
+        for i in range(N):
+            for j in range(M):
+                scores[i, j] = scorer[seqsA[p, j], seqsB[p, i]]
+        gopA = np.empty(M)
+        resA = np.zeros(M, dtype=np.bool_)
+        for j in range(M):
+            gopA[j] = gop * gopsA[p, j]
+            for r in restricted:
+                if prosA[p, j] == r:
+                    resA[j] = True
+        gopB = np.empty(N)
+        resB = np.zeros(N, dtype=np.bool_)
+        for i in range(N):
+            gopB[i] = gop * gopsB[p, i]
+            for r in restricted:
+                if prosB[p, i] == r:
+                    resB[i] = True
+        secondary = resA.any() or resB.any()
+        proA, proB = prosA[p, :M], prosB[p, :N]
+
+        simA, simB = simsA[p], simsB[p]
+
+        idxA = idxB = np.zeros(0, dtype=np.int64)
+        if score_only:
+            bound = -np.inf
+            if simA + simB > 0:
+                bound = (1 - cutoff) * (simA + simB) / 2
+            sim = _score_align(
+                scores, gopA, gopB, proA, proB, resA, resB, M, N, scale,
+                factor, mode == 2, secondary, band, bound)
+        elif mode == 0:
+            if secondary:
+                idxA, idxB, sim = _secondary_globalign(
+                    scores, gopA, gopB, proA, proB, resA, resB, M, N, scale,
+                    factor)
+            else:
+                idxA, idxB, sim = _globalign(
+                    scores, gopA, gopB, proA, proB, M, N, scale, factor)
+        elif mode == 1:
+            if secondary:
+                idxA, idxB, k, l, i, j, sim = _secondary_localign(
+                    scores, gopA, gopB, proA, proB, resA, resB, M, N, scale,
+                    factor)
+            else:
+                idxA, idxB, k, l, i, j, sim = _localign(
+                    scores, gopA, gopB, proA, proB, M, N, scale, factor)
+        elif mode == 2:
+            if secondary:
+                idxA, idxB, sim = _secondary_semi_globalign(
+                    scores, gopA, gopB, proA, proB, resA, resB, M, N, scale,
+                    factor)
+            else:
+                idxA, idxB, sim = _semi_globalign(
+                    scores, gopA, gopB, proA, proB, M, N, scale, factor)
+        else:
+            if secondary:
+                idxA, idxB, sim = _secondary_dialign(
+                    scores, proA, proB, resA, resB, M, N, factor)
+            else:
+                idxA, idxB, sim = _dialign(
+                    scores, proA, proB, M, N, factor)
+
+        sims[p] = sim
+        if simA + simB == 0:
+            dists[p] = np.nan
+        else:
+            dists[p] = 1 - ((2 * sim) / (simA + simB))
+
+        n = len(idxA)
+        lengths[p] = n
+        for k in range(n):
+            almsA[p, k] = idxA[n - k - 1]
+            almsB[p, k] = idxB[n - k - 1]
+
+    return sims, dists, almsA, almsB, lengths
+
+
+def _prostring(pro):
+    return np.array([ord(char) for char in pro], dtype=np.int64)
+
+
+def _restricted(pro, r):
+    return np.array([char in r for char in pro], dtype=np.bool_)
+
+
+def _gaps(gop):
+    return np.array(gop, dtype=float)
+
+
+def _alignment(seqA, seqB, idxA, idxB):
+    almA = [seqA[i] if i >= 0 else '-' for i in idxA[::-1].tolist()]
+    almB = [seqB[i] if i >= 0 else '-' for i in idxB[::-1].tolist()]
+    return almA, almB
+
+
+def _local_alignment(seqA, seqB, idxA, idxB, k, l, i, j):
+    almA, almB = _alignment(seqA, seqB, idxA, idxB)
+    return (
+        [list(seqA[0:j]), almA, list(seqA[l:])],
+        [list(seqB[0:i]), almB, list(seqB[k:])])
+
+
+def _valid(seqA, seqB, M, N):
+    """Check whether the compiled kernels can handle the input."""
+    return 0 < M == len(seqA) and 0 < N == len(seqB)
+
+
+def globalign(
+        seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer):
+    if not _valid(seqA, seqB, M, N):
+        return _calign.globalign(
+            seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer)
+    idxA, idxB, sim = _globalign(
+        _scores(seqA, seqB, scorer), _gaps(gopA), _gaps(gopB),
+        _prostring(proA), _prostring(proB), M, N, scale, factor)
+    return _alignment(seqA, seqB, idxA, idxB) + (float(sim), )
+
+
+def secondary_globalign(
+        seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer, r):
+    if not _valid(seqA, seqB, M, N):
+        return _calign.secondary_globalign(
+            seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer,
+            r)
+    idxA, idxB, sim = _secondary_globalign(
+        _scores(seqA, seqB, scorer), _gaps(gopA), _gaps(gopB),
+        _prostring(proA), _prostring(proB), _restricted(proA, r),
+        _restricted(proB, r), M, N, scale, factor)
+    return _alignment(seqA, seqB, idxA, idxB) + (float(sim), )
+
+
+def semi_globalign(
+        seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer):
+    if not _valid(seqA, seqB, M, N):
+        return _calign.semi_globalign(
+            seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer)
+    idxA, idxB, sim = _semi_globalign(
+        _scores(seqA, seqB, scorer), _gaps(gopA), _gaps(gopB),
+        _prostring(proA), _prostring(proB), M, N, scale, factor)
+    return _alignment(seqA, seqB, idxA, idxB) + (float(sim), )
+
+
+def secondary_semi_globalign(
+        seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer, r):
+    if not _valid(seqA, seqB, M, N):
+        return _calign.secondary_semi_globalign(
+            seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer,
+            r)
+    idxA, idxB, sim = _secondary_semi_globalign(
+        _scores(seqA, seqB, scorer), _gaps(gopA), _gaps(gopB),
+        _prostring(proA), _prostring(proB), _restricted(proA, r),
+        _restricted(proB, r), M, N, scale, factor)
+    return _alignment(seqA, seqB, idxA, idxB) + (float(sim), )
+
+
+def localign(
+        seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer):
+    if not _valid(seqA, seqB, M, N):
+        return _calign.localign(
+            seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer)
+    idxA, idxB, k, l, i, j, sim = _localign(
+        _scores(seqA, seqB, scorer), _gaps(gopA), _gaps(gopB),
+        _prostring(proA), _prostring(proB), M, N, scale, factor)
+    return _local_alignment(seqA, seqB, idxA, idxB, k, l, i, j) + (
+        float(sim), )
+
+
+def secondary_localign(
+        seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer, r):
+    if not _valid(seqA, seqB, M, N):
+        return _calign.secondary_localign(
+            seqA, seqB, gopA, gopB, proA, proB, M, N, scale, factor, scorer,
+            r)
+    idxA, idxB, k, l, i, j, sim = _secondary_localign(
+        _scores(seqA, seqB, scorer), _gaps(gopA), _gaps(gopB),
+        _prostring(proA), _prostring(proB), _restricted(proA, r),
+        _restricted(proB, r), M, N, scale, factor)
+    return _local_alignment(seqA, seqB, idxA, idxB, k, l, i, j) + (
+        float(sim), )
+
+
+def dialign(seqA, seqB, proA, proB, M, N, scale, factor, scorer):
+    if not _valid(seqA, seqB, M, N):
+        return _calign.dialign(
+            seqA, seqB, proA, proB, M, N, scale, factor, scorer)
+    idxA, idxB, sim = _dialign(
+        _scores(seqA, seqB, scorer), _prostring(proA), _prostring(proB), M,
+        N, factor)
+    return _alignment(seqA, seqB, idxA, idxB) + (float(sim), )
+
+
+def secondary_dialign(seqA, seqB, proA, proB, M, N, scale, factor, scorer, r):
+    if not _valid(seqA, seqB, M, N):
+        return _calign.secondary_dialign(
+            seqA, seqB, proA, proB, M, N, scale, factor, scorer, r)
+    idxA, idxB, sim = _secondary_dialign(
+        _scores(seqA, seqB, scorer), _prostring(proA), _prostring(proB),
+        _restricted(proA, r), _restricted(proB, r), M, N, factor)
+    return _alignment(seqA, seqB, idxA, idxB) + (float(sim), )
+
+
+for _function in [
+        globalign, secondary_globalign, semi_globalign,
+        secondary_semi_globalign, localign, secondary_localign, dialign,
+        secondary_dialign]:
+    _function.__doc__ = getattr(_calign, _function.__name__).__doc__
+
+
+_MODES = {"global": 0, "local": 1, "overlap": 2, "dialign": 3}
+
+
+def align_batch(
+        seqsA, seqsB, lengthsA, lengthsB, gopsA, gopsB, prosA, prosB,
+        gop, scale, factor, scorer, mode, restricted_chars,
+        alignments=False, band=None, cutoff=None, simsA=None, simsB=None):
+    if mode not in _MODES:
+        raise ValueError("Unknown alignment mode {0}.".format(mode))
+    _calign._check_band(mode, alignments, band, cutoff)
+    score_only = not alignments and mode in ("global", "overlap")
+    if cutoff is None or not _calign._bounded(gopsA, gopsB, gop, scale,
+                                              factor):
+        cutoff = np.inf
+    seqsA = np.asarray(seqsA, dtype=np.int64)
+    seqsB = np.asarray(seqsB, dtype=np.int64)
+    lengthsA = np.asarray(lengthsA, dtype=np.int64)
+    lengthsB = np.asarray(lengthsB, dtype=np.int64)
+    scorer = np.asarray(scorer, dtype=float)
+    if simsA is None:
+        simsA = _self_scores(seqsA, lengthsA, factor, scorer)
+    if simsB is None:
+        simsB = _self_scores(seqsB, lengthsB, factor, scorer)
+    sims, dists, almsA, almsB, lengths = _align_batch(
+        seqsA, seqsB, lengthsA, lengthsB,
+        np.asarray(gopsA, dtype=float),
+        np.asarray(gopsB, dtype=float),
+        np.asarray(prosA, dtype=np.int64),
+        np.asarray(prosB, dtype=np.int64),
+        gop, scale, factor, scorer, _MODES[mode],
+        _prostring(restricted_chars), score_only,
+        -1 if band is None else int(band), float(cutoff),
+        np.asarray(simsA, dtype=float), np.asarray(simsB, dtype=float))
+    if alignments:
+        return sims, dists, [
+            (almA[:n].tolist(), almB[:n].tolist()) for almA, almB, n in zip(
+                almsA, almsB, lengths.tolist())]
+    return sims, dists
+
+
+align_batch.__doc__ = _calign.align_batch.__doc__
+
+
+def self_scores(seqs, lengths, factor, scorer):
+    return _self_scores(
+        np.asarray(seqs, dtype=np.int64), np.asarray(lengths, dtype=np.int64),
+        factor, np.asarray(scorer, dtype=float))
+
+
+self_scores.__doc__ = _calign.self_scores.__doc__
+
+
+def _rebind(function):
+    """
+    Copy a function from the pure Python module so that it calls the \
+    compiled alignment kernels of this module.
+    """
+    rebound = types.FunctionType(
+        function.__code__, globals(), function.__name__,
+        function.__defaults__, function.__closure__)
+    rebound.__doc__ = function.__doc__
+    return rebound
+
+
+align_pair = _rebind(_calign.align_pair)
+align_pairwise = _rebind(_calign.align_pairwise)
+align_pairs = _rebind(_calign.align_pairs)
+align_profile = _rebind(_calign.align_profile)
+corrdist = _rebind(_calign.corrdist)
+score_profile = _calign.score_profile
+swap_score_profile = _calign.swap_score_profile
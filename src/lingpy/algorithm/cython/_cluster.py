@@ -1,4 +1,6 @@
-from ._misc import transpose,squareform
+import numpy as np
+
+from ._misc import transpose
 
 
 def flat_upgma(
@@ -176,48 +178,190 @@ def flat_cluster(
     return clusters
 
 
-def _flat_upgma(
+def _nearest(dists, i):
+    """
+    Return the closest of the clusters with a higher key than the given one.
+    """
+    row = dists[i, i + 1:]
+    if not len(row):
+        return i, np.inf
+    j = int(np.argmin(row))
+    return i + 1 + j, row[j]
+
+def _linkage_matrix(
+        method,
+        clusters,
+        matrix,
+        x
+        ):
+    """
+    Return the distances, sizes, and the activity of the clusters for the
+    given number of keys, with infinite distances to inactive clusters.
+    """
+# [autouncomment]     cdef int i,key,other
+# [autouncomment]     cdef float score
+    keys = sorted(clusters)
+    sizes = np.zeros(x)
+    active = np.zeros(x, dtype=bool)
+    for key in keys:
+        sizes[key] = len(clusters[key])
+        active[key] = True
+
+    matrix = np.asarray(matrix, dtype=float)
+    dists = np.full((x, x), np.inf)
+    if all(sizes[key] == 1 for key in keys):
+        members = [clusters[key][0] for key in keys]
+        dists[np.ix_(keys, keys)] = matrix[np.ix_(members, members)]
+        np.fill_diagonal(dists, np.inf)
+    else:
+        for i, key in enumerate(keys):
+            for other in keys[i + 1:]:
+                scores = matrix[np.ix_(clusters[key], clusters[other])]
+                if method == 'upgma':
+                    score = scores.mean()
+                elif method == 'single':
+                    score = scores.min()
+                else:
+                    score = scores.max()
+                dists[key, other] = dists[other, key] = score
+    return dists, sizes, active
+
+def _closest_pair(
+        matrix,
+        clusters,
+        dists,
+        closest,
+        exact
+        ):
+    """
+    Return the closest pair of clusters by their average distance.
+
+    Notes
+    -----
+    The average distances of the pairs which are closest up to rounding are
+    summed in the order of the members, as in the exhaustive search over all
+    ordered pairs of clusters, where rounding decides which pair and which of
+    its two orders is found first. The sums are kept in the array "exact",
+    whose entries are reset by the caller when clusters are merged, so that
+    each pair is only summed once as long as its clusters are unchanged.
+    """
+# [autouncomment]     cdef int i,j,size
+# [autouncomment]     cdef float minimum,limit
+    minimum = np.min(closest)
+    limit = minimum + 1e-9 * max(1.0, abs(minimum))
+    rows = np.flatnonzero(closest <= limit)
+    near = (dists[rows] <= limit) & (
+        np.arange(len(dists)) > rows[:, None])
+    idxA, idxB = np.nonzero(near)
+    idxA = rows[idxA]
+    missing = np.isnan(exact[idxA, idxB])
+    for i, j in zip(idxA[missing].tolist(), idxB[missing].tolist()):
+        size = len(clusters[i]) * len(clusters[j])
+        exact[i, j] = sum([
+            matrix[vA][vB] for vA in clusters[i] for vB in clusters[j]]) / size
+        exact[j, i] = sum([
+            matrix[vB][vA] for vB in clusters[j] for vA in clusters[i]]) / size
+
+    # the lowest average, with ties resolved by the order of the search
+    first = np.concatenate([idxA, idxB])
+    second = np.concatenate([idxB, idxA])
+    scores = exact[first, second]
+    best = np.lexsort((second, first, scores))[0]
+    return int(first[best]), int(second[best]), float(scores[best])
+
+def _flat_linkage(
+        method,
         clusters,
         matrix,
         threshold
         ):
     """
-    Internal implementation of flat_upgma.
+    Internal implementation of flat UPGMA, single, and complete linkage.
+
+    Notes
+    -----
+    The distances between the clusters are kept in a matrix and updated with
+    the formulas by Lance and Williams when two clusters are merged (for
+    UPGMA, the sums of the distances are updated and averaged). For each
+    cluster, the closest cluster with a higher key is stored, so that the
+    closest pair is found from these candidates, and only the candidates
+    which involve the merged clusters are searched again. As in the
+    exhaustive search, ties are resolved in favor of the pair with the lowest
+    keys, and the first cluster of the pair absorbs the other one.
     """
-# [autouncomment]     cdef int i,j,vA,vB,idxA,idxB
-# [autouncomment]     cdef list score,valA,valB
-    
+# [autouncomment]     cdef int a,b,i
+# [autouncomment]     cdef float score
+
     # terminate when the dictionary is of length 1
     if len(clusters) == 1:
         return
 
-    scores = []
-    indices = []
-
-    for i,valA in clusters.items():
-        for j,valB in clusters.items():
-            if i != j:
-                score = []
-                for vA in valA:
-                    for vB in valB:
-                        score += [matrix[vA][vB]]
-                scores.append(sum(score) / len(score))
-                indices.append((i,j))
-    
-    minimum = min(scores)
-    if minimum <= threshold:
-        idxA,idxB = indices[scores.index(minimum)]
-        clusters[idxA] += clusters[idxB]
-        del clusters[idxB]
-        return _flat_upgma(
-                clusters,
-                matrix,
-                threshold
-                )
-    else:
-        pass
+    keys = sorted(clusters)
+    dists, sizes, active = _linkage_matrix(
+        method, clusters, matrix, max(keys) + 1)
 
-def _flat_single_linkage(
+    # keep the sums of the distances to average them for UPGMA
+    if method == 'upgma':
+        sums = np.where(np.isfinite(dists), dists, 0) * np.outer(
+            sizes, sizes)
+        rows = np.asarray(matrix, dtype=float).tolist()
+        exact = np.full(dists.shape, np.nan)
+
+    nearest = np.arange(len(dists))
+    closest = np.full(len(dists), np.inf)
+    for key in keys:
+        nearest[key], closest[key] = _nearest(dists, key)
+
+    while len(clusters) > 1:
+        if method == 'upgma':
+            a, b, score = _closest_pair(
+                rows, clusters, dists, closest, exact)
+            exact[[a, b]] = exact[:, [a, b]] = np.nan
+        else:
+            a = int(np.argmin(closest))
+            b = int(nearest[a])
+            score = closest[a]
+        if not score <= threshold:
+            break
+
+        # update the distances of the merged cluster
+        if method == 'upgma':
+            sums[a] += sums[b]
+            sums[:, a] = sums[a]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                row = sums[a] / ((sizes[a] + sizes[b]) * sizes)
+        elif method == 'single':
+            row = np.minimum(dists[a], dists[b])
+        else:
+            row = np.maximum(dists[a], dists[b])
+        active[b] = False
+        row[~active] = np.inf
+        row[a] = np.inf
+        dists[a] = row
+        dists[:, a] = row
+        dists[b] = np.inf
+        dists[:, b] = np.inf
+        closest[b] = np.inf
+        sizes[a] += sizes[b]
+        clusters[a] += clusters[b]
+        del clusters[b]
+
+        # search again for the clusters whose candidate was merged, the
+        # others with a lower key can only find the merged cluster closer
+        research = np.flatnonzero(
+            active & ((nearest == a) | (nearest == b))).tolist()
+        lower = np.arange(a)
+        lower = lower[active[:a] & (nearest[:a] != a) & (nearest[:a] != b)]
+        update = lower[
+            (row[lower] < closest[lower]) |
+            ((row[lower] == closest[lower]) & (nearest[lower] > a))]
+        nearest[update] = a
+        closest[update] = row[update]
+        for i in research + [a]:
+            nearest[i], closest[i] = _nearest(dists, i)
+
+
+def _flat_upgma(
         clusters,
         matrix,
         threshold
@@ -225,38 +369,17 @@ def _flat_single_linkage(
     """
     Internal implementation of flat_upgma.
     """
-# [autouncomment]     cdef int i,j,vA,vB,idxA,idxB
-# [autouncomment]     cdef list score,valA,valB
-    
-    # terminate when the dictionary is of length 1
-    if len(clusters) == 1:
-        return
+    _flat_linkage('upgma', clusters, matrix, threshold)
 
-    scores = []
-    indices = []
-
-    for i,valA in clusters.items():
-        for j,valB in clusters.items():
-            if i != j:
-                score = []
-                for vA in valA:
-                    for vB in valB:
-                        score += [matrix[vA][vB]]
-                scores.append(min(score))
-                indices.append((i,j))
-    
-    minimum = min(scores)
-    if minimum <= threshold:
-        idxA,idxB = indices[scores.index(minimum)]
-        clusters[idxA] += clusters[idxB]
-        del clusters[idxB]
-        return _flat_single_linkage(
-                clusters,
-                matrix,
-                threshold
-                )
-    else:
-        pass
+def _flat_single_linkage(
+        clusters,
+        matrix,
+        threshold
+        ):
+    """
+    Internal implementation of flat single linkage.
+    """
+    _flat_linkage('single', clusters, matrix, threshold)
 
 def _flat_complete_linkage(
         clusters,
@@ -264,40 +387,9 @@ def _flat_complete_linkage(
         threshold
         ):
     """
-    Internal implementation of flat_upgma.
+    Internal implementation of flat complete linkage.
     """
-# [autouncomment]     cdef int i,j,vA,vB,idxA,idxB
-# [autouncomment]     cdef list score,valA,valB
-    
-    # terminate when the dictionary is of length 1
-    if len(clusters) == 1:
-        return
-
-    scores = []
-    indices = []
-
-    for i,valA in clusters.items():
-        for j,valB in clusters.items():
-            if i != j:
-                score = []
-                for vA in valA:
-                    for vB in valB:
-                        score += [matrix[vA][vB]]
-                scores.append(max(score))
-                indices.append((i,j))
-    
-    minimum = min(scores)
-    if minimum <= threshold:
-        idxA,idxB = indices[scores.index(minimum)]
-        clusters[idxA] += clusters[idxB]
-        del clusters[idxB]
-        return _flat_complete_linkage(
-                clusters,
-                matrix,
-                threshold
-                )
-    else:
-        pass
+    _flat_linkage('complete', clusters, matrix, threshold)
 
 
 def upgma(
@@ -354,10 +446,8 @@ def upgma(
     ~lingpy.algorithm.clustering.flat_upgma
    
     """
-# [autouncomment]     cdef int i,a,b
+# [autouncomment]     cdef int i
     x = len(taxa)
-# [autouncomment]     cdef float c,d
-# [autouncomment]     cdef str newick_string
 
     clusters = dict([(i,[i]) for i in range(x)])
     branches = dict([(i,0) for i in range(x)])
@@ -366,28 +456,7 @@ def upgma(
 
     _upgma(clusters,matrix,tree,branches)
 
-    newick = dict([(i,taxa[i]) for i in range(len(taxa))])
-    
-    # create different output, depending on the options for the inclusion of
-    # distances or topology only
-    if distances:
-        for i,(a,b,c,d) in enumerate(tree):
-            newick[x+i] = '({0}:{2:.2f},{1}:{3:.2f})'.format(
-                    newick[a],
-                    newick[b],
-                    c,
-                    d
-                    )
-    else:
-        for i in range(len(tree)):
-            newick[x+i] = '({0},{1})'.format(
-                    newick[tree[i][0]],
-                    newick[tree[i][1]]
-                    )
-    
-    newick_string = newick[max(newick.keys())] + ';'
-
-    return newick_string
+    return _tree2nwk(tree, taxa, distances)
 
 def _upgma(
         clusters,
@@ -397,55 +466,70 @@ def _upgma(
         ):
     """
     Internal implementation of the UPGMA algorithm.
+
+    Notes
+    -----
+    The merged clusters receive new keys, and their average distances are
+    computed from the sums of the distances, as in :py:func:`_flat_linkage`.
     """
-# [autouncomment]     cdef int i,vA,vB,idxA,idxB,idxNew
-# [autouncomment]     cdef list score,valA,valB
+# [autouncomment]     cdef int i,a,b,idxNew
+# [autouncomment]     cdef float minimum
 
     # check for branches
     if not branches:
         branches = dict([(i,0) for i in clusters])
-    
+
     # terminate when the dictionary is of length 1
     if len(clusters) == 1:
         return
 
-    scores = []
-    indices = []
-
-    for i,valA in clusters.items():
-        for j,valB in clusters.items():
-            if i != j:
-                score = []
-                for vA in valA:
-                    for vB in valB:
-                        score += [matrix[vA][vB]]
-                scores.append(sum(score) / len(score))
-                indices.append((i,j))
-
-    minimum = min(scores)
-    
-    idxNew = max(clusters) + 1
-
-    idxA,idxB = indices[scores.index(minimum)]
-    
-    bA = minimum / 2 - branches[idxA]
-    bB = minimum / 2 - branches[idxB]
-
-    branches[idxNew] = minimum / 2
-
-    clusters[idxNew] = clusters[idxA] + clusters[idxB]
-
-    del clusters[idxA]
-    del clusters[idxB]
-
-    tree_matrix.append([idxA,idxB,bA,bB])
-    
-    return _upgma(
-            clusters,
-            matrix,
-            tree_matrix,
-            branches
-            )
+    keys = sorted(clusters)
+    idxNew = max(keys) + 1
+    dists, sizes, active = _linkage_matrix(
+        'upgma', clusters, matrix, idxNew + len(keys) - 1)
+    sums = np.where(np.isfinite(dists), dists, 0) * np.outer(sizes, sizes)
+    rows = np.asarray(matrix, dtype=float).tolist()
+    exact = np.full(dists.shape, np.nan)
+
+    nearest = np.arange(len(dists))
+    closest = np.full(len(dists), np.inf)
+    for key in keys:
+        nearest[key], closest[key] = _nearest(dists, key)
+
+    while len(clusters) > 1:
+        a, b, minimum = _closest_pair(rows, clusters, dists, closest, exact)
+
+        tree_matrix.append([
+            a, b, minimum / 2 - branches[a], minimum / 2 - branches[b]])
+        branches[idxNew] = minimum / 2
+        clusters[idxNew] = clusters[a] + clusters[b]
+        del clusters[a]
+        del clusters[b]
+
+        sums[idxNew] = sums[a] + sums[b]
+        sums[:, idxNew] = sums[idxNew]
+        sizes[idxNew] = sizes[a] + sizes[b]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            row = sums[idxNew] / (sizes[idxNew] * sizes)
+        active[a] = active[b] = False
+        row[~active] = np.inf
+        dists[idxNew] = row
+        dists[:, idxNew] = row
+        for i in (a, b):
+            dists[i] = np.inf
+            dists[:, i] = np.inf
+            closest[i] = np.inf
+
+        # the new cluster has the highest key and is a candidate for all
+        # others, unless the same distance is found for a lower key
+        research = active & ((nearest == a) | (nearest == b))
+        update = np.flatnonzero(active & ~research & (row < closest))
+        nearest[update] = idxNew
+        closest[update] = row[update]
+        for i in np.flatnonzero(research).tolist():
+            nearest[i], closest[i] = _nearest(dists, i)
+        active[idxNew] = True
+        idxNew += 1
 
 def neighbor(
         matrix,
@@ -500,10 +584,7 @@ def neighbor(
     ~lingpy.algorithm.clustering.upgma
     ~lingpy.algorithm.clustering.flat_upgma
     """
-# [autouncomment]     cdef int i,a,b
-# [autouncomment]     cdef float c,d
-# [autouncomment]     cdef str newick_string
-    
+# [autouncomment]     cdef int i
     x = len(taxa)
 
     clusters = dict([(i,[i]) for i in range(x)])
@@ -511,29 +592,7 @@ def neighbor(
 
     _neighbor(clusters,matrix,tree)
 
-    newick = dict([(i,taxa[i]) for i in range(x)])
-        
-    # create different output, depending on the options for the inclusion of
-    # distances or topology only
-    if distances:
-        for i,(a,b,c,d) in enumerate(tree):
-            newick[x+i] = '({0}:{2:.2f},{1}:{3:.2f})'.format(
-                    newick[a],
-                    newick[b],
-                    c,
-                    d
-                    )
-
-    else:
-        for i in range(len(tree)):
-            newick[x+i] = '({0},{1})'.format(
-                    newick[tree[i][0]],
-                    newick[tree[i][1]]
-                    )
-    
-    newick_string = newick[max(newick.keys())] + ';'
-
-    return newick_string
+    return _tree2nwk(tree, taxa, distances)
 
 def _neighbor(
         clusters,
@@ -544,150 +603,72 @@ def _neighbor(
         ):
     """
     Internal implementation of the neighbor-joining algorithm.
+
+    Notes
+    -----
+    The distances are kept in an array from which the joined cluster is
+    removed in each step, while the new cluster takes the place of the
+    cluster with the lower index. The divergences are summed in the order of
+    the rows, so that ties are resolved as in the exhaustive search.
     """
-# [autouncomment]     cdef int idxA,idxB,idxNew,N,i,j,key
-# [autouncomment]     cdef float sAX,sBX,new_score,score,dist_a,dist_b,dist_ab
-# [autouncomment]     cdef list line,new_matrix
-# [autouncomment]     cdef dict new_clusters
-# [autouncomment]     cdef list averages
+# [autouncomment]     cdef int a,b,N,idxNew
+# [autouncomment]     cdef float sAX,sBX
+# [autouncomment]     cdef list ids,members
 
     if len(clusters) == 1:
         return
 
-    # define a tracer for the order of the tree
-    if not tracer:
-        tracer = dict([(tuple([a]),b[0]) for (a,b) in clusters.items()])
-    # terminate when the dictionary is of length 1
-    if len(clusters) == 2:
-        
-        idxA,idxB = 0,1
-
-        # create the new index for the tracer
-        idxNew = max(tracer.values()) + 1
-
-        tracer[tuple(clusters[idxA]+clusters[idxB])] = idxNew
+    keys = sorted(clusters)
+    members = [clusters[key] for key in keys]
+    ids = [clusters[key][0] for key in keys]
+    idxNew = max(ids)
 
-        # append the indices to the tree matrix
-        sAX = matrix[idxA][idxB] / 2
-        sBX = matrix[idxA][idxB] / 2
-
-        tree_matrix.append(
-                (
-                    tracer[tuple(clusters[idxA])],
-                    tracer[tuple(clusters[idxB])],
-                    sAX,
-                    sBX
-                    )
-                )
+    buffer = np.array(matrix, dtype=float)
+    scores = np.empty_like(buffer)
+    lower = np.tri(len(buffer), dtype=bool)
+    N = len(buffer)
+    while N > 2:
+        dists = buffer[:N, :N]
 
-        # join the clusters according to the index
-        clusters[idxA] += clusters[idxB]
-        del clusters[idxB]
-        
-        return
+        # determine the average scores (divergence r), the sums over the
+        # columns of the symmetric matrix are added in the order of the rows
+        averages = np.add.reduce(dists, axis=0) / (N - 2.0)
 
-    # create the constant matrix when the process starts
-    if not constant_matrix:
-        constant_matrix = [[cell for cell in line] for line in matrix]
-    
-    # get the number of taxa
-    N = len(matrix)
+        # determine the minimal score
+        np.subtract(dists, averages, out=scores[:N, :N])
+        scores[:N, :N] -= averages[:, None]
+        np.copyto(scores[:N, :N], np.inf, where=lower[:N, :N])
+        a, b = divmod(int(np.argmin(scores[:N, :N])), N)
 
-    # determine the average scores (divergence r)
-    averages = []
-    for line in matrix:
-        averages.append(sum(line) / (N - 2.0))
-    
-    # create the new matrix
-    new_matrix = [[cell for cell in line] for line in matrix]
-    
-    # fill in the new scores
-    for i,line in enumerate(matrix):
-        for j,score in enumerate(line):
-            if i > j:
-                new_score = score - averages[i] - averages[j]
-                new_matrix[i][j] = new_score
-                new_matrix[j][i] = new_score
-    
-    # determine the minimal score
-    scores = []
-    indices = []
-    for i in sorted(clusters.keys()):
-        for j in sorted(clusters.keys()):
-            if i < j:
-                scores.append(new_matrix[i][j])
-                indices.append((i,j))
-
-    minimum = min(scores)
-    idxA,idxB = indices[scores.index(minimum)]
-
-    # check for the average of the clusters
-    vals = []
-    for i in clusters[idxA]:
-        for j in clusters[idxB]:
-            vals.append(constant_matrix[i][j])
-    tmp_score = sum(vals) / len(vals)
-
-    
-    # append the indices to the tree matrix
-    sAX = matrix[idxA][idxB] / 2.0 + (averages[idxA] - averages[idxB]) / 2
-        #(2.0 * (len(matrix) - 2))
-    sBX = matrix[idxA][idxB] - sAX
-    tree_matrix.append(
-            (
-                tracer[tuple(clusters[idxA])],
-                tracer[tuple(clusters[idxB])],
-                sAX,
-                sBX
-                )
-            )
-
-    # create the new index for the tracer
-    idxNew = max(tracer.values()) + 1
-    tracer[tuple(clusters[idxA]+clusters[idxB])] = idxNew
-
-    # join the clusters according to the index
-    clusters[idxA] += clusters[idxB]
-    del clusters[idxB]
-
-    # create new cluster-dictionary
-    new_clusters = {}
-
-    # insert values in new dictionary
-    for i,key in enumerate(sorted(clusters.keys())):
-        new_clusters[i] = clusters[key]
-
-    # create new matrix
-    new_matrix = []
-
-    # iterate over old matrix and fill in keys for new matrix
-    dist_ab = matrix[idxA][idxB]
-    for i,a in enumerate(sorted(clusters.keys())):
-        for j,b in enumerate(sorted(clusters.keys())):
-            if i < j and a != idxA and b != idxA:
-                new_matrix.append(matrix[a][b])
-            elif i < j and a == idxA:
-                dist_a = matrix[idxA][b]
-                dist_b = matrix[idxB][b]
-                new_matrix.append(((dist_a + dist_b) - dist_ab) / 2.0)
-            elif i < j and b == idxA:
-                dist_a = matrix[idxA][a]
-                dist_b = matrix[idxB][a]
-                new_matrix.append(((dist_a + dist_b) - dist_ab) / 2.0)
-    
-    # get values of new_clusters into clusters
-    clusters = {}
-    for key,val in new_clusters.items():
-        clusters[key] = val
-
-    # return score
-    return _neighbor(
-            clusters,
-            squareform(new_matrix),
-            tree_matrix,
-            constant_matrix,
-            tracer
-            )
+        # append the indices to the tree matrix
+        sAX = dists[a, b] / 2.0 + (averages[a] - averages[b]) / 2
+        sBX = dists[a, b] - sAX
+        tree_matrix.append((ids[a], ids[b], float(sAX), float(sBX)))
+
+        # join the clusters and compute the distances of the new cluster,
+        # which replace those of the first cluster, while the second one is
+        # removed by shifting the following rows and columns
+        row = ((dists[a] + dists[b]) - dists[a, b]) / 2.0
+        row[a] = 0
+        dists[a] = row
+        dists[:, a] = row
+        dists[b:N - 1] = dists[b + 1:N]
+        dists[:, b:N - 1] = dists[:, b + 1:N]
+        N -= 1
+
+        idxNew += 1
+        ids[a] = idxNew
+        members[a] += members[b]
+        del ids[b]
+        del members[b]
+
+    dists = buffer[:N, :N]
+    sAX = float(dists[0, 1]) / 2
+    tree_matrix.append((ids[0], ids[1], sAX, sAX))
+    members[0] += members[1]
+
+    clusters.clear()
+    clusters[0] = members[0]
 
 def _tree2nwk(
         tree,
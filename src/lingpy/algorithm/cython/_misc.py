@@ -1,4 +1,5 @@
 # [autouncomment] cdef extern from "math.h":
+import numpy as np
 from numpy import sqrt
 # [autouncomment]     double sqrt( double x)
 
@@ -118,6 +119,79 @@ class ScoreDict(object):
         except:
             return -22.5
 
+    @property
+    def array(self):
+        """
+        The scoring matrix as a two-dimensional numpy array.
+
+        Notes
+        -----
+        The array contains an additional last row and column which store the
+        default score for characters which are not in the scoring dictionary.
+        Use :py:meth:`ScoreDict.encode` to convert sequences to the indices of
+        the array.
+        """
+        array = self.__dict__.get('_array')
+        if array is None:
+            matrix = np.asarray(self.matrix, dtype=float)
+            array = np.full(
+                (matrix.shape[0] + 1, matrix.shape[1] + 1), -22.5)
+            array[:-1, :-1] = matrix
+            self._array = array
+        return array
+
+    def encode(
+            self,
+            seq
+            ):
+        """
+        Convert a sequence of characters to indices of the scoring array.
+
+        Parameters
+        ----------
+        seq : list
+            The sequence of characters.
+
+        Returns
+        -------
+        indices : list
+            The indices of the characters in :py:attr:`ScoreDict.array`.
+        """
+        unknown = len(self.matrix)
+        return [self.chars2int.get(char, unknown) for char in seq]
+
+    def lookup(
+            self,
+            idxA,
+            idxB
+            ):
+        """
+        Retrieve the scores of many pairs of characters at once.
+
+        Parameters
+        ----------
+        idxA, idxB : { int, list, :py:class:`numpy.ndarray` }
+            The indices of the characters, as returned by
+            :py:meth:`ScoreDict.encode`. Arrays of indices are broadcast
+            against each other.
+
+        Returns
+        -------
+        scores : :py:class:`numpy.ndarray`
+            The scores of the pairs of characters.
+
+        Examples
+        --------
+        Score all pairs of characters of two sequences::
+            >>> scorer = ScoreDict(['a', 'b'], [[1, -1], [-1, 1]])
+            >>> idxA = np.array(scorer.encode('ab'))
+            >>> idxB = np.array(scorer.encode('bX'))
+            >>> scorer.lookup(idxA[:, None], idxB[None, :])
+            array([[ -1. , -22.5],
+                   [  1. , -22.5]])
+        """
+        return self.array[np.asarray(idxA), np.asarray(idxB)]
+
     def __setitem__(
             self,
             x,
@@ -133,6 +207,14 @@ class ScoreDict(object):
         else:
             self.matrix[i][i] = y
 
+        # reset the array representation used by the compiled kernels
+        self.__dict__.pop('_array', None)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_array', None)
+        return state
+
     def __repr__(self):
         return str(list(self.chars2int.keys()))
 
@@ -198,24 +198,16 @@ def infomap_clustering(threshold, matrix, taxa=False, revert=False):
         raise ValueError("The package igraph is needed to run this analysis.")
     if not taxa:
         taxa = list(range(1, len(matrix) + 1))
-    G = igraph.Graph()
-    # add vertices to the graph
-    for i in range(len(matrix)):
-        G.add_vertex(i)
-
-    for i, row in enumerate(matrix):
-        for j, cell in enumerate(row):
-            if i < j:
-                if cell <= threshold:
-                    G.add_edge(i, j)
+    # add the vertices and the edges below the threshold to the graph
+    idxA, idxB = np.triu_indices(len(matrix), 1)
+    selected = np.asarray(matrix, dtype=float)[idxA, idxB] <= threshold
+    G = igraph.Graph(
+        n=len(matrix),
+        edges=list(zip(idxA[selected].tolist(), idxB[selected].tolist())))
 
     comps = G.community_infomap(edge_weights=None,
                                 vertex_weights=None)
-    D = {}
-    for i, comp in enumerate(comps.subgraphs()):
-        vertices = [v['name'] for v in comp.vs]
-        for vertex in vertices:
-            D[vertex] = i + 1
+    D = {vertex: i + 1 for vertex, i in enumerate(comps.membership)}
 
     if revert:
         return D
@@ -6,6 +6,8 @@ from itertools import combinations, combinations_with_replacement, product
 from collections import defaultdict
 from functools import partial
 
+import numpy as np
+
 from lingpy.algorithm import calign
 from lingpy.algorithm import talign
 from lingpy.algorithm import cluster
@@ -254,29 +256,44 @@ class Multiple:
                 return scoredict[x, y]
             return 1.0 if x == y else -1.0
 
-        self.scoredict = {}
-        for (i, seqA), (j, seqB) in combinations_with_replacement(
-            enumerate(self._numbers), 2):
-            if i < j:
-                for (numA, numB) in product(seqA, seqB):
-                    self.scoredict[numA, numB] = scorer(
-                        self._get(numA, '_classes'), self._get(numB, '_classes'))
-                    self.scoredict[numB, numA] = self.scoredict[numA, numB]
-            elif i == j:
-                for num in seqA:
-                    char = self._get(num, '_classes')
-                    self.scoredict[num, num] = scorer(char, char)
+        # the residues are scored in the order of the sequences, each pair of
+        # classes is only scored once, and only if it occurs across sequences
+        char2idx, first, last = {}, {}, {}
+        for i, seq in enumerate(self._classes):
+            for char in seq:
+                char2idx.setdefault(char, len(char2idx))
+                first.setdefault(char, i)
+                last[char] = i
+        table = np.empty((len(char2idx), len(char2idx)), dtype=object)
+        for charA, x in char2idx.items():
+            for charB, y in char2idx.items():
+                if x == y or first[charA] < last[charB]:
+                    table[x, y] = scorer(charA, charB)
+        idxs = [char2idx[char] for seq in self._classes for char in seq]
+        seqs = np.repeat(np.arange(self.height), [len(seq) for seq in self._classes])
+        matrix = table[np.ix_(idxs, idxs)]
+        matrix[np.tril_indices(len(idxs), -1)] = matrix.T[
+            np.tril_indices(len(idxs), -1)]
+        matrix[(seqs[:, None] == seqs[None, :]) & ~np.eye(len(idxs), dtype=bool)] = 0.0
+        self.scoredict = misc.ScoreDict(
+            [num for seq in self._numbers for num in seq], matrix.tolist())
 
     def _set_scorer(self, score_mode='classes'):
         """
         Functions sets the scorer to the simple class model or to the library
         model.
         """
+        scorer = getattr(self, 'scorer', None)
         if score_mode == 'classes':
             self.scorer = self.scoredict
         elif score_mode == 'library':
             self.scorer = self.library
 
+        # profile alignments, column scores, and self-similarities of the
+        # sequences are stored for each scorer
+        if self.scorer is not scorer:
+            self._profiles, self._columns, self._self_scores = {}, {}, {}
+
     def _get_pairwise_alignments(
         self,
         mode='global',
@@ -306,6 +323,10 @@ class Multiple:
             if not hasattr(self, 'weights'):
                 self._weights = list(map(make_pro_weights, self._prostrings))
 
+            if factor not in self._self_scores:
+                self._self_scores[factor] = [sum([
+                    (1 + factor) * self.scorer[num, num] for num in seq])
+                    for seq in self._numbers]
             alignments = calign.align_pairwise(
                 self._numbers,
                 self._weights,
@@ -315,7 +336,8 @@ class Multiple:
                 factor,
                 self.scorer,
                 restricted_chars,
-                mode)
+                mode,
+                self._self_scores[factor])
             k = 0
             for i, j in combinations_with_replacement(range(self.height), 2):
                 almA, almB, sim, dist = alignments[k]
@@ -352,87 +374,95 @@ class Multiple:
         """
         Method creates an extended library for alignments using the Tcoffee
         approach.
+
+        Notes
+        -----
+        The library is stored as a two-dimensional array in
+        :py:attr:`Multiple._library`, with the residues in the order of the
+        sequences, and as a scoring dictionary in
+        :py:attr:`Multiple.library`.
         """
-        self.library = {}
+        numbers = [num for seq in self._numbers for num in seq]
 
         # create library for non-sound-class approaches
         if not self._sonars:
-            for numA, numB in combinations_with_replacement(self._numbers, 2):
-                for k, l in product(numA, numB):
-                    self.library[k, l] = 0.0
-                    self.library[l, k] = 0.0
+            library = np.zeros((len(numbers), len(numbers)))
         else:
             # note that we somehow HAVE to include a sensitivity for V-C
             # distinctions in the library mode, otherwise it may get complicated
             # sometimes, therefore, the library is initialized by setting only the
             # scores for c-c and v-v matches to 0, the other scores get their
             # original penalty defined by the old scorer
-            for (i, numA), (j, numB) in combinations_with_replacement(
-                enumerate(self._numbers), 2):
-                if i < j:
-                    for k, l in product(numA, numB):
-                        # see the comment above for the add-on in this
-                        # line
-                        a = self._get(k, '_sonars')
-                        b = self._get(l, '_sonars')
-                        if a >= 7 or b >= 7 and a + b < 14:
-                            self.library[k, l] = self.scoredict[k, l]
-                            self.library[l, k] = self.scoredict[l, k]
-                        else:
-                            self.library[k, l] = 0.0
-                            self.library[l, k] = 0.0
-                elif i == j:
-                    for k, l in product(numA, numB):
-                        self.library[k, l] = 0.0
-                        self.library[l, k] = 0.0
+            seqs = np.repeat(
+                np.arange(self.height), [len(seq) for seq in self._numbers])
+            sonars = np.array([s for seq in self._sonars for s in seq])
+            a, b = sonars[:, None], sonars[None, :]
+            mask = ((a >= 7) | ((b >= 7) & (a + b < 14))) & (
+                seqs[:, None] < seqs[None, :])
+            library = np.where(mask, self.scoredict.array[:-1, :-1], 0.0)
+            library = np.triu(library) + np.triu(library, 1).T
+
+        self._library = library
+        self.library = misc.ScoreDict(numbers, library.tolist())
 
     def _extend_library(self):
         """
         Extend the library by new alignments.
         """
+        num2idx = self.library.chars2int
+        scores = self.scorer.array
+        library = self._library
+
+        def extend(idxA, idxB, sim):
+            # the similarity score is determined by taking the average of
+            # matrix score and the similarity score of the alignment of both
+            # sequences, residues of earlier sequences always come first, so
+            # that all values are added to the upper triangle in order
+            np.add.at(library, (idxA, idxB), (sim + scores[idxA, idxB]) / 2.0)
+
         # add the residue-pairs of all aligned sequences first
-        for i, j in [(i, j) for i in range(self.height)
-                     for j in range(self.height) if i <= j]:
-            for m, n in zip(self._alignments[i][j][0], self._alignments[i][j][1]):
-                if m != "-" and n != "-":
-                    # add the values to the library
-                    # the similarity score is determined by adding taking the
-                    # average of matrix score and the similarity score of the
-                    # alignment of both sequences
-                    score = self.scorer[m, n]
-                    sim = self._alignments[i][j][2] / float(
-                        len(self._alignments[i][j][0]))
-                    self.library[m, n] += (sim + score) / 2.0
-                    self.library[n, m] = self.library[m, n]
-
-        # add the residue-pairs resulting from an alignment via a third sequence
-
-        # create the indices for the loop
-        mappings = (
-            (i, j, k)
-            for i in range(self.height)
-            for j in range(self.height)
-            for k in range(self.height)
-            if i <= j and k != i and k != j)
-
-        for i, j, k in mappings:
-            almI, almIK, simIK = self._alignments[i][k]
-            almJ, almJK, simJK = self._alignments[j][k]
-
-            # determine, which of the values occur in both alignments
-            # with the third sequence
-            for char in self._numbers[k]:
-                try:
-                    valI = almI[almIK.index(char)]
-                    valJ = almJ[almJK.index(char)]
-                    if valI != "-" and valJ != "-":
-                        score = self.scorer[valI, valJ]
-                        sim = min(simIK, simJK) / ((len(almIK) + len(almJK)) / 2.0)
-
-                        self.library[valI, valJ] += (sim + score) / 2.0
-                        self.library[valJ, valI] = self.library[valI, valJ]
-                except:
-                    pass
+        idxA, idxB, sims = [], [], []
+        for i in range(self.height):
+            for j in range(i, self.height):
+                almA, almB, sim = self._alignments[i][j]
+                for m, n in zip(almA, almB):
+                    if m != "-" and n != "-":
+                        idxA.append(num2idx[m])
+                        idxB.append(num2idx[n])
+                        sims.append(sim / float(len(almA)))
+        extend(np.array(idxA, dtype=int), np.array(idxB, dtype=int),
+               np.array(sims))
+
+        # add the residue-pairs resulting from an alignment via a third
+        # sequence k, since the pairwise alignments are stored with the
+        # earlier sequence first, the sequences i <= j are looked up in the
+        # alignments with the sequences k which follow both of them
+        offset = 0
+        for k in range(self.height):
+            if k:
+                # map the residues of k to the residues aligned with them
+                aligned = np.full((k, len(self._numbers[k])), -1)
+                sims = np.empty(k)
+                lengths = np.empty(k)
+                for i in range(k):
+                    almI, almK, sims[i] = self._alignments[i][k]
+                    lengths[i] = len(almK)
+                    for m, n in zip(almI, almK):
+                        if m != "-" and n != "-":
+                            aligned[i, num2idx[n] - offset] = num2idx[m]
+
+                idxI, idxJ = np.triu_indices(k)
+                valI, valJ = aligned[idxI], aligned[idxJ]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    sim = np.minimum(sims[idxI], sims[idxJ]) / (
+                        (lengths[idxI] + lengths[idxJ]) / 2.0)
+                mask = (valI != -1) & (valJ != -1)
+                extend(valI[mask], valJ[mask],
+                       np.broadcast_to(sim[:, None], mask.shape)[mask])
+            offset += len(self._numbers[k])
+
+        self._library = np.triu(library) + np.triu(library, 1).T
+        self.library = misc.ScoreDict(list(num2idx), self._library.tolist())
 
     def _make_guide_tree(self, tree_calc='upgma'):
         """
@@ -476,6 +506,52 @@ class Multiple:
         o = len(profileA[0])
         p = len(profileB[0])
 
+        # identical profiles are only aligned once with the same scorer
+        key = ('calign', _profile_key(almsA), _profile_key(almsB), mode, gop,
+               scale, factor, gap_weight, restricted_chars)
+        if key not in self._profiles:
+            self._profiles[key] = self._calign_profile(
+                profileA, profileB, almsA, almsB, mode, gop, scale, factor,
+                gap_weight, restricted_chars)
+        almA, almB, sim = self._profiles[key]
+
+        if return_similarity:
+            return sim
+
+        # trace the gaps inserted in both aligned profiles and insert them
+        # in the original profiles
+        for i in range(len(almA)):
+            if almA[i] == '-':
+                profileA.insert(i, o * ['X'])
+            elif almB[i] == '-':
+                profileB.insert(i, p * ['X'])
+
+        # invert the profiles and the weight matrices by turning columns
+        # into rows and rows into columns
+        profileA = misc.transpose(profileA)
+        profileB = misc.transpose(profileB)
+
+        # return the aligned profiles and weight matrices
+        if iterate:
+            return profileA, profileB
+
+        return profileA + profileB
+
+    def _calign_profile(
+        self,
+        profileA,
+        profileB,
+        almsA,
+        almsB,
+        mode,
+        gop,
+        scale,
+        factor,
+        gap_weight,
+        restricted_chars):
+        """
+        Align two profiles with sonority weights.
+        """
         # create the weights by which the gap opening penalties will be modified
         sonarA = [[self._get(char, value='_sonars', error=('X', 0))
                    for char in line] for line in profileA]
@@ -519,7 +595,7 @@ class Multiple:
         weightsA, weightsB = prosodic_weights(prosA), prosodic_weights(prosB)
 
         # carry out the alignment
-        almA, almB, sim = calign.align_profile(
+        return calign.align_profile(
             profileA,
             profileB,
             weightsA,
@@ -534,27 +610,6 @@ class Multiple:
             mode,
             gap_weight)
 
-        if return_similarity:
-            return sim
-
-        # trace the gaps inserted in both aligned profiles and insert them
-        # in the original profiles
-        for i in range(len(almA)):
-            if almA[i] == '-':
-                profileA.insert(i, o * ['X'])
-            elif almB[i] == '-':
-                profileB.insert(i, p * ['X'])
-
-        # invert the profiles and the weight matrices by turning columns
-        # into rows and rows into columns
-        profileA = misc.transpose(profileA)
-        profileB = misc.transpose(profileB)
-
-        # return the aligned profiles and weight matrices
-        if iterate:
-            return profileA, profileB
-
-        return profileA + profileB
 
     def _talign_profile(
         self,
@@ -577,8 +632,12 @@ class Multiple:
         p = len(profileB[0])
 
         # carry out the alignment
-        almA, almB, sim = talign.align_profile(
-            profileA, profileB, gop, scale, self.scorer, mode, gap_weight)
+        key = ('talign', _profile_key(almsA), _profile_key(almsB), mode, gop,
+               scale, gap_weight)
+        if key not in self._profiles:
+            self._profiles[key] = talign.align_profile(
+                profileA, profileB, gop, scale, self.scorer, mode, gap_weight)
+        almA, almB, sim = self._profiles[key]
 
         if return_similarity:
             return sim
@@ -1117,22 +1176,22 @@ class Multiple:
 
         lenM = len(alm_matrix[0])
 
-        score = 0.0
-        args, kw = [], {}
-        if self._sonars:
-            algorithm = calign
-            kw = dict(gap_weight=gap_weight)
-        else:
-            algorithm = talign
-            args = [gop, gap_weight]
-
-        for i in range(lenM):
-            score += algorithm.score_profile(
-                [line[i] for line in alm_matrix],
-                [line[i] for line in alm_matrix],
+        # score all columns which were not scored before at once
+        columns = [tuple(line[i] for line in alm_matrix) for i in range(lenM)]
+        keys = [('sop', column, gap_weight, gop) for column in columns]
+        missing = {key[1]: key for key in keys if key not in self._columns}
+        if missing:
+            scores = _score_columns(
+                misc.transpose(list(missing)),
                 self.scorer,
-                *args,
-                **kw)
+                gap_weight=gap_weight,
+                gop=None if self._sonars else gop)
+            for key, value in zip(missing.values(), scores):
+                self._columns[key] = value
+
+        score = 0.0
+        for key in keys:
+            score += self._columns[key]
         return score / lenM
 
     def _swap_sum_of_pairs(self, alm_matrix, gap_weight=1.0, swap_penalty=-5):
@@ -1141,12 +1200,13 @@ class Multiple:
         algorithm = calign if self._sonars else talign
 
         for i in range(lenM):
-            score += algorithm.swap_score_profile(
-                [line[i] for line in alm_matrix],
-                [line[i] for line in alm_matrix],
-                self.scorer,
-                gap_weight=gap_weight,
-                swap_penalty=swap_penalty)
+            column = tuple(line[i] for line in alm_matrix)
+            key = ('swap', column, gap_weight, swap_penalty)
+            if key not in self._columns:
+                self._columns[key] = algorithm.swap_score_profile(
+                    list(column), list(column), self.scorer,
+                    gap_weight=gap_weight, swap_penalty=swap_penalty)
+            score += self._columns[key]
 
         return score / lenM
 
@@ -1494,14 +1554,7 @@ class Multiple:
 
 
         """
-        return [
-            calign.score_profile(
-                [k[i] for k in self._alm_matrix],
-                [k[i] for k in self._alm_matrix],
-                self.scorer,
-                gap_weight=gap_weight)
-            for i in range(len(self._alm_matrix[0]))
-            ]
+        return _score_columns(self._alm_matrix, self.scorer, gap_weight)
 
     def get_local_peaks(self, threshold=2, gap_weight=0.0):
         """
@@ -1918,6 +1971,47 @@ class Multiple:
         return False
 
 
+def _score_columns(alm_matrix, scorer, gap_weight=0.0, gop=None):
+    """
+    Compute the profile scores of all columns of an alignment at once.
+
+    Notes
+    -----
+    Each column is scored against itself, as with
+    :py:func:`~lingpy.algorithm.cython.calign.score_profile`, or with
+    :py:func:`~lingpy.algorithm.cython.talign.score_profile` if a gap opening
+    penalty "gop" is passed. Gaps ("X") are masked out of the encoded
+    alignment, and the pairs of cells of a column are summed in the same
+    order as in these functions, so that the scores are identical.
+    """
+    rows = np.array([scorer.encode(line) for line in alm_matrix], dtype=int)
+    gaps = np.array([[cell == 'X' for cell in line] for line in alm_matrix],
+                    dtype=bool)
+    height, length = rows.shape
+
+    # compare all cells of a column in the order (i, j), columns come first
+    rows, gaps = rows.T, gaps.T
+    scores = scorer.array[rows[:, :, None], rows[:, None, :]]
+    chars = ~gaps[:, :, None] & ~gaps[:, None, :]
+    if gop is None:
+        counts = np.where(chars, 1.0, gap_weight)
+        scores = np.where(chars, scores, 0.0)
+    else:
+        empty = gaps[:, :, None] & gaps[:, None, :]
+        counts = np.where(empty, gap_weight, 1.0)
+        scores = np.where(chars, scores, np.where(empty, 0.0, float(gop)))
+    scores = np.cumsum(scores.reshape(length, -1), axis=1)[:, -1]
+    counts = np.cumsum(counts.reshape(length, -1), axis=1)[:, -1]
+    return (scores / counts).tolist()
+
+
+def _profile_key(alms):
+    """
+    Convert the rows of an alignment to a hashable key.
+    """
+    return tuple(tuple(line) for line in alms)
+
+
 def mult_align(seqs, gop=-1, scale=0.5, tree_calc='upgma', scoredict=False,
                pprint=False):
     """
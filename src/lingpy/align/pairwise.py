@@ -3,6 +3,8 @@ Module provides classes and functions for pairwise alignment analyses.
 """
 from itertools import product
 
+import numpy as np
+
 from lingpy.util import setdefaults, multicombinations2, as_string
 from lingpy.settings import rcParams
 from lingpy.sequence.sound_classes import (
@@ -90,6 +92,8 @@ class Pairwise(object):
 
     def __call__(self, **keywords):
         self.align(**keywords)
+        if not keywords.get('alignments', True):
+            return self.scores
         return self.alignments
 
     def __repr__(self):
@@ -188,6 +192,18 @@ class Pairwise(object):
             will be used.
         pprint : bool (default=False)
             If set to *True*, the alignments are printed to the screen.
+        alignments : bool (default=True)
+            If set to *False*, only the similarities or distances are computed
+            and stored in the attribute "scores", without the alignments.
+            Global and overlap alignments then skip the traceback.
+        band : int (default=None)
+            If "alignments" is set to *False*, restrict global and overlap
+            alignments to a diagonal band of the given width, see
+            :py:func:`~lingpy.algorithm.cython.calign.align_batch`.
+        cutoff : float (default=None)
+            If "alignments" is set to *False* and "distance" to *True*, stop
+            global and overlap alignments as soon as their distance is
+            guaranteed to exceed the cutoff.
 
         """
         setdefaults(
@@ -200,7 +216,10 @@ class Pairwise(object):
             distance=False,
             model=rcParams['sca'],
             pprint=False,
-            transform=rcParams['align_transform'])
+            transform=rcParams['align_transform'],
+            alignments=True,
+            band=None,
+            cutoff=None)
 
         if hasattr(self, 'model'):
             if keywords['model'] != self.model:
@@ -208,6 +227,22 @@ class Pairwise(object):
         else:
             self._set_model(**keywords)
 
+        if not keywords['alignments']:
+            sims, dists = _align_batch(
+                self.classes,
+                self.weights,
+                self.prostrings,
+                keywords['gop'],
+                keywords['scale'],
+                keywords['factor'],
+                self.scoredict,
+                keywords['mode'],
+                keywords['restricted_chars'],
+                band=keywords['band'],
+                cutoff=keywords['cutoff'] if keywords['distance'] else None)
+            self.scores = (dists if keywords['distance'] else sims).tolist()
+            return
+
         # create the alignments array
         self._alignments = calign.align_pairs(
             self.classes,
@@ -248,6 +283,42 @@ def _as_lists(seqA, seqB):
     return seqA, seqB
 
 
+def _pad(rows, fill, dtype=int):
+    """Convert a list of sequences into a padded two-dimensional array."""
+    array = np.full(
+        (len(rows), max([len(row) for row in rows] or [0])), fill, dtype=dtype)
+    for i, row in enumerate(rows):
+        array[i, :len(row)] = row
+    return array
+
+
+def _align_batch(
+        seqs, gops, pros, gop, scale, factor, scorer, mode, restricted_chars,
+        alignments=False, band=None, cutoff=None, simsA=None, simsB=None):
+    """
+    Align a list of sequence pairs with :py:func:`calign.align_batch`.
+
+    Notes
+    -----
+    The arguments correspond to the ones of :py:func:`calign.align_pairs`,
+    with the scorer being a :py:class:`~lingpy.algorithm.cython.misc.ScoreDict`.
+    """
+    unknown = len(scorer.matrix)
+    arrays = []
+    for i in range(2):
+        arrays += [
+            _pad([scorer.encode(pair[i]) for pair in seqs], unknown),
+            np.array([len(pair[i]) for pair in seqs], dtype=int)]
+    return calign.align_batch(
+        arrays[0], arrays[2], arrays[1], arrays[3],
+        _pad([pair[0] for pair in gops], 0.0, float),
+        _pad([pair[1] for pair in gops], 0.0, float),
+        _pad([[ord(char) for char in pair[0]] for pair in pros], 0),
+        _pad([[ord(char) for char in pair[1]] for pair in pros], 0),
+        gop, scale, factor, scorer.array, mode, restricted_chars,
+        alignments, band, cutoff, simsA, simsB)
+
+
 # the following functions provide solutions for convenience
 def pw_align(
         seqA,
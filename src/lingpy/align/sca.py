@@ -26,6 +26,7 @@ from lingpy.algorithm import misc
 from lingpy.align._align import confidence
 from lingpy import util
 from lingpy import log
+from lingpy import cache
 
 
 class MSA(Multiple):
@@ -802,6 +803,50 @@ class Alignments(Wordlist):
 
         self.add_entries(alignment, tmp, lambda x: self._str_type(x), override=True)
 
+    def _current_seqs(self, ids, ref, key):
+        """
+        Return the sequences of the words of a cognate set from their tokens.
+        """
+        seqs = []
+        for idx in ids:
+            tokens = self[idx, self._segments]
+            if isinstance(tokens, str):
+                tokens = tokens.split(' ')
+            tokens = list(tokens)
+            if self._mode == 'fuzzy':
+                tokens = tokens2morphemes(tokens, tone='T')[
+                    self[idx, ref].index(key)]
+            seqs.append(tokens)
+        return seqs
+
+    def _update_numbers(self, idx, model, sonar):
+        """
+        Compute the numbers (and sonority profiles) of a word anew if they do
+        not match its tokens any longer.
+
+        Notes
+        -----
+        The numbers are computed as in :py:class:`~lingpy.compare.lexstat.LexStat`
+        with the given sound-class model and the default transformation of the
+        prosodic strings, keeping the language identifier of the word.
+        """
+        tokens = self[idx, self._segments]
+        numbers = self[idx, 'numbers']
+        classes = tokens2class(tokens, model, stress=rcParams['stress'])
+        if len(numbers) == len(classes) and all(
+                n.split('.')[1] == c for n, c in zip(numbers, classes)):
+            return
+        sonars = [int(i) for i in tokens2class(
+            tokens, rcParams['art'], stress=rcParams['stress'])]
+        langid = numbers[0].split('.')[0] if numbers else \
+            self[idx, 'langid']
+        transform = rcParams['lexstat_transform']
+        self[idx, 'numbers'] = [
+            util.charstring(langid, c, transform[p]) for c, p in zip(
+                classes, prosodic_string(sonars))]
+        if sonar:
+            self[idx, 'sonars'] = sonars
+
     def align(self, **keywords):
         """
         Carry out a multiple alignment analysis of the data.
@@ -875,6 +920,21 @@ class Alignments(Wordlist):
             should therefore be aligned specifically. This defaults to "T",
             since this is the character that represents tones in the prosodic
             strings of sequences.
+
+        processes : int (default=1)
+            The number of processes over which the alignments of the cognate
+            sets are distributed.
+
+        executor : :py:class:`concurrent.futures.Executor` (default=None)
+            An executor which is used instead of a new pool of "processes"
+            worker processes.
+
+        force : bool (default=False)
+            If set to True, all cognate sets are aligned. Otherwise, cognate
+            sets whose words, cognate identifiers, and alignment parameters
+            did not change since the last analysis (as stored in the
+            "msa_fingerprints" entry of the metadata, which is written to
+            file along with the other metadata) are not aligned again.
         """
         kw = dict(
             alignment=False,
@@ -900,6 +960,9 @@ class Alignments(Wordlist):
             style='plain',
             swap_check=False,
             tree_calc=rcParams['align_tree_calc'],
+            processes=1,
+            executor=None,
+            force=False,
         )
         kw.update(keywords)
         kw['ref'] = kw['ref'] or self._ref
@@ -923,25 +986,59 @@ class Alignments(Wordlist):
             kw['restricted_chars']
         ])
 
+        # cognate sets are only re-aligned if their data or the settings
+        # changed since the last analysis, the settings are taken from the
+        # keywords, since the params string rounds the parameters
+        settings = cache.fingerprint(
+            kw['method'], kw['model'].name,
+            _scorer_fingerprint(kw['model'].scorer), kw['gop'], kw['scale'],
+            kw['factor'], kw['gap_weight'], kw['tree_calc'],
+            kw['restricted_chars'],
+            kw.get('unique_seqs', rcParams['unique_sequences']),
+            kw['iteration'], kw['swap_check'], kw['mode'], kw['modes'],
+            kw['sonar'], kw['classes'], self._mode,
+            _scorer_fingerprint(kw['scoredict']))
+        fingerprints = self._meta.setdefault(
+            'msa_fingerprints', {}).setdefault(kw['ref'], {})
+
+        # the cognate sets are prepared here and aligned independently
+        task_kw = {k: v for k, v in kw.items()
+                   if k not in ['processes', 'executor', 'force']}
+        keys, tasks = [], []
         for key, value in sorted(self.msa[kw['ref']].items(), key=lambda x: x[0]):
             if key not in [0, '0', '']:
-                log.debug("Analyzing cognate set number {0}.".format(key))
+                fingerprint = cache.fingerprint(
+                    settings, value['ID'], value['taxa'],
+                    [str(self[idx, self._segments]) for idx in value['ID']],
+                    [str(self[idx, kw['ref']]) for idx in value['ID']])
+                if not kw['force'] and value.get('alignment') and \
+                        fingerprints.get(str(key)) == fingerprint:
+                    log.debug("Skipping unchanged cognate set number {0}.".format(
+                        key))
+                    continue
+                fingerprints[str(key)] = fingerprint
+                log.debug("Preparing cognate set number {0}.".format(key))
+
+                # the sequences are taken from the current words, which may
+                # have changed since the cognate set was created
+                value['seqs'] = self._current_seqs(value['ID'], kw['ref'], key)
 
                 # check for scorer keyword
                 if not kw['scoredict']:
-                    m = SCA(value, **kw)
+                    tasks.append((_plain_msa(value), None, task_kw))
                 else:
                     # get the tokens
+                    for idx in value['ID']:
+                        self._update_numbers(idx, kw['model'], kw['sonar'])
                     numbers = [self[idx, 'numbers'] for idx in value['ID']]
                     if kw['sonar']:
                         sonars = [self[idx, 'sonars'] for idx in value['ID']]
                     else:
                         sonars = False
+                    tokens = [self[idx, self._segments] for idx in value['ID']]
                     if self._mode == 'fuzzy':
                         cogs = [self[idx, self._ref] for idx in value['ID']]
                         idxs = [c.index(key) for c in cogs]
-                        tokens = [self[idx, self._segments] for idx in 
-                                value['ID']]
                         for i, (n, idx, t) in enumerate(zip(numbers, idxs,
                             tokens)):
                             nums = [[]]
@@ -959,44 +1056,29 @@ class Alignments(Wordlist):
                                     else:
                                         sons[-1] += [s]
                                 sonars[i] = sons[idx]
+                        tokens = [t.n[idx] for t, idx in zip(tokens, idxs)]
                     value['seqs'] = numbers
 
-                    m = SCA(value, **kw)
-                    kw['sonars'] = sonars
-                    kw['classes'] = False
-
-
-                if kw['method'] == 'progressive':
-                    m.prog_align(**kw)
-                elif kw['method'] == 'library':
-                    m.lib_align(**kw)
-
-                if kw['iteration']:
-                    m.iterate_similar_gap_sites()
-                    m.iterate_clusters(0.5)
-                    m.iterate_orphans()
-
-                if kw['swap_check']:
-                    m.swap_check()
-
-                # convert back to external format, if scoredict is set
-                if kw['scoredict']:
-                    for i, alm in enumerate(m.alm_matrix):
-                        tk = self[m.ID[i], self._segments]
-                        if self._mode == 'fuzzy':
-                            tk = tk.n[idxs[i]]
-                        new_tk = class2tokens(tk, alm)
-                        m.alm_matrix[i] = new_tk
-
-                if hasattr(m, 'swaps'):
-                    self._meta['msa'][kw['ref']][key]['swaps'] = m.swaps
-
-                self._meta['msa'][kw['ref']][key]['alignment'] = m.alm_matrix
-                self._meta['msa'][kw['ref']][key]['_sonority_consensus'] = \
-                    m._sonority_consensus
-                self._meta['msa'][kw['ref']][key]['stamp'] = rcParams['align_stamp'].format(
-                    m.dataset, m.seq_id, __version__, rcParams['timestamp'], params)
-                self._meta['msa'][kw['ref']][key]['parameters'] = params
+                    tasks.append((
+                        _plain_msa(value),
+                        [list(t) for t in tokens],
+                        dict(task_kw, sonars=sonars, classes=False)))
+                keys.append(key)
+
+        results = util.parallel_map(
+            _align_msa, tasks, processes=kw['processes'],
+            executor=kw['executor'])
+        for key, result in zip(keys, results):
+            msa = self._meta['msa'][kw['ref']][key]
+            if 'swaps' in result:
+                msa['swaps'] = result['swaps']
+
+            msa['alignment'] = result['alignment']
+            msa['_sonority_consensus'] = result['_sonority_consensus']
+            msa['stamp'] = rcParams['align_stamp'].format(
+                result['dataset'], result['seq_id'], __version__,
+                rcParams['timestamp'], params)
+            msa['parameters'] = params
 
         self._msa2col(ref=kw['ref'], alignment=kw['alignment'])
 
@@ -1321,6 +1403,64 @@ class Alignments(Wordlist):
                     log=False)
 
 
+def _scorer_fingerprint(scorer):
+    """
+    Compute a fingerprint of a scoring dictionary.
+    """
+    if hasattr(scorer, 'chars2int'):
+        return cache.fingerprint(
+            sorted(scorer.chars2int.items()), scorer.array.tobytes())
+    if scorer and hasattr(scorer, 'items'):
+        return cache.fingerprint(sorted(scorer.items()))
+    # no scorer or one which is not a mapping, such as the default False
+    return cache.fingerprint(repr(scorer))
+
+
+def _plain_msa(msa):
+    """
+    Convert the sequences of a cognate set to plain lists, so that the cognate
+    set can be passed to worker processes.
+    """
+    return {key: [list(v) if isinstance(v, list) else v for v in value]
+            if isinstance(value, list) else value
+            for key, value in msa.items()}
+
+
+def _align_msa(task):
+    """
+    Align the words of one cognate set, as prepared by
+    :py:meth:`Alignments.align`.
+    """
+    msa, tokens, kw = task
+    m = SCA(msa, **kw)
+    if kw['method'] == 'progressive':
+        m.prog_align(**kw)
+    elif kw['method'] == 'library':
+        m.lib_align(**kw)
+
+    if kw['iteration']:
+        m.iterate_similar_gap_sites()
+        m.iterate_clusters(0.5)
+        m.iterate_orphans()
+
+    if kw['swap_check']:
+        m.swap_check()
+
+    # convert back to external format, if scoredict is set
+    if tokens:
+        for i, alm in enumerate(m.alm_matrix):
+            m.alm_matrix[i] = class2tokens(tokens[i], alm)
+
+    result = dict(
+        alignment=m.alm_matrix,
+        _sonority_consensus=m._sonority_consensus,
+        dataset=m.dataset,
+        seq_id=m.seq_id)
+    if hasattr(m, 'swaps'):
+        result['swaps'] = m.swaps
+    return result
+
+
 def SCA(infile, **keywords):
     """
     Method returns alignment objects depending on input file or input data.
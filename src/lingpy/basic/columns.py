@@ -0,0 +1,583 @@
+"""
+Columnar storage for the data of word lists.
+
+The :py:class:`ColumnStore` replaces the dictionary of row lists in which
+:py:class:`~lingpy.basic.parser.QLCParser` stores its data. It stores one
+contiguous column per entry: integer and float columns are stored as NumPy
+arrays, string columns as codes into a table of strings, and token columns as
+offsets into a flat array of token codes. The
+store behaves like a dictionary of rows, so the data is accessed in the same
+way as with the default storage.
+"""
+import json
+import os
+import pickle
+from collections.abc import MutableMapping, Sequence
+
+import numpy as np
+
+from lingpy import basictypes
+from lingpy import util
+
+FORMAT = 'lingpy-columns'
+VERSION = 1
+
+
+class _Buffer(object):
+    """
+    A growable NumPy array.
+    """
+
+    def __init__(self, dtype, size=0, array=None):
+        if array is None:
+            self.size = size
+            self.array = np.zeros(max(size, 16), dtype=dtype)
+        else:
+            self.size = len(array)
+            self.array = array
+
+    def _reserve(self, size):
+        if size > len(self.array):
+            array = np.zeros(max(size, 2 * len(self.array)),
+                             dtype=self.array.dtype)
+            array[:self.size] = self.array[:self.size]
+            self.array = array
+
+    def append(self, value):
+        self._reserve(self.size + 1)
+        self.array[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        self._reserve(self.size + len(values))
+        self.array[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    @property
+    def values(self):
+        return self.array[:self.size]
+
+
+class _ListColumn(object):
+    """
+    A column of arbitrary Python objects.
+    """
+
+    def __init__(self, values=()):
+        self.values = list(values)
+
+    def accepts(self, value):
+        return True
+
+    def append(self, value):
+        self.values.append(value)
+
+    def __getitem__(self, pos):
+        return self.values[pos]
+
+    def __setitem__(self, pos, value):
+        self.values[pos] = value
+
+    def __len__(self):
+        return len(self.values)
+
+
+class _ArrayColumn(object):
+    """
+    A column of integers or floats.
+    """
+
+    def __init__(self, type_):
+        self.type = type_
+        self.buffer = _Buffer(np.int64 if type_ == int else np.float64)
+
+    def accepts(self, value):
+        if type(value) is not self.type:
+            return False
+        return self.type == float or -2 ** 63 <= value < 2 ** 63
+
+    def append(self, value):
+        self.buffer.append(value)
+
+    def __getitem__(self, pos):
+        return self.type(self.buffer.array[pos])
+
+    def __setitem__(self, pos, value):
+        self.buffer.array[pos] = value
+
+    def __len__(self):
+        return self.buffer.size
+
+
+class _TokenColumn(object):
+    """
+    A column of token sequences, stored as offsets into a flat array of token
+    codes.
+    """
+
+    def __init__(self, type_, symbols):
+        self.type = type_
+        self.symbols = symbols
+        self.codes = _Buffer(np.int32)
+        self.starts = _Buffer(np.int64)
+        self.stops = _Buffer(np.int64)
+
+    def accepts(self, value):
+        if type(value) is not self.type:
+            return False
+        if self.type == basictypes.lists:
+            return value.sep == ' + '
+        if self.type == basictypes._strings:
+            return value._type == str
+        return all(type(token) is str for token in value)
+
+    def _encode(self, value):
+        start = self.codes.size
+        self.codes.extend([self.symbols.encode(token) for token in value])
+        return start, self.codes.size
+
+    def append(self, value):
+        start, stop = self._encode(value)
+        self.starts.append(start)
+        self.stops.append(stop)
+
+    def __getitem__(self, pos):
+        tokens = [self.symbols.decode(code) for code in
+                  self.codes.array[
+                      self.starts.array[pos]:self.stops.array[pos]]]
+        if self.type == basictypes.lists:
+            return basictypes.lists(tokens)
+        if self.type == basictypes._strings:
+            return basictypes.strings(tokens)
+        return tokens
+
+    def __setitem__(self, pos, value):
+        self.starts.array[pos], self.stops.array[pos] = self._encode(value)
+
+    def __len__(self):
+        return self.starts.size
+
+
+class _StringColumn(object):
+    """
+    A column of strings, stored as codes into the table of symbols.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.codes = _Buffer(np.int32)
+
+    def accepts(self, value):
+        return type(value) is str
+
+    def append(self, value):
+        self.codes.append(self.symbols.encode(value))
+
+    def __getitem__(self, pos):
+        return self.symbols.decode(self.codes.array[pos])
+
+    def __setitem__(self, pos, value):
+        self.codes.array[pos] = self.symbols.encode(value)
+
+    def __len__(self):
+        return self.codes.size
+
+
+class _Symbols(object):
+    """
+    The table of the strings and tokens shared by all columns of a store.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.tokens = []
+
+    def encode(self, token):
+        try:
+            return self.codes[token]
+        except KeyError:
+            self.codes[token] = len(self.tokens)
+            self.tokens.append(token)
+            return self.codes[token]
+
+    def decode(self, code):
+        return self.tokens[code]
+
+
+class _StoredColumn(object):
+    """
+    A column of a word list in binary format, which is read from its files
+    when it is first accessed.
+    """
+
+    def __init__(self, path, i, spec, symbols):
+        self.path = path
+        self.i = i
+        self.spec = spec
+        self.symbols = symbols
+        self.modified = False
+        self._column = None
+
+    def _file(self, part):
+        return os.path.join(
+            self.path, 'column-{0}-{1}.npy'.format(self.i, part))
+
+    def _load(self, part):
+        try:
+            return np.load(
+                self._file(part), mmap_mode='c').view(np.ndarray)
+        except ValueError:  # empty arrays cannot be memory-mapped
+            return np.load(self._file(part))
+
+    @property
+    def column(self):
+        if self._column is None:
+            kind = self.spec['kind']
+            if kind in ('int', 'float'):
+                column = _ArrayColumn(int if kind == 'int' else float)
+                column.buffer = _Buffer(None, array=self._load('values'))
+            elif kind == 'str':
+                column = _StringColumn(self.symbols)
+                column.codes = _Buffer(None, array=self._load('codes'))
+            elif kind in _TOKEN_TYPES:
+                column = _TokenColumn(_TOKEN_TYPES[kind], self.symbols)
+                for part in ['codes', 'starts', 'stops']:
+                    setattr(column, part, _Buffer(None, array=self._load(part)))
+            else:
+                with open(os.path.join(
+                        self.path, 'column-{0}.pkl'.format(self.i)), 'rb') as f:
+                    column = _ListColumn(pickle.load(f))
+            self._column = column
+        return self._column
+
+    def accepts(self, value):
+        return self.column.accepts(value)
+
+    def append(self, value):
+        self.modified = True
+        self.column.append(value)
+
+    def __getitem__(self, pos):
+        return self.column[pos]
+
+    def __setitem__(self, pos, value):
+        self.modified = True
+        self.column[pos] = value
+
+    def __len__(self):
+        if self._column is None:
+            return self.spec['length']
+        return len(self._column)
+
+    def __getstate__(self):
+        # unmodified columns are read again from their files after unpickling
+        state = dict(self.__dict__)
+        if not self.modified:
+            state['_column'] = None
+        return state
+
+
+class _Row(Sequence):
+    """
+    A view on one row of a :py:class:`ColumnStore`.
+    """
+
+    def __init__(self, store, pos):
+        self._store = store
+        self._pos = pos
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('row index out of range')
+        return self._store._get(self._pos, i)
+
+    def __setitem__(self, i, value):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('row index out of range')
+        self._store._set(self._pos, i, value)
+
+    def __len__(self):
+        return self._store._widths[self._pos]
+
+    def append(self, value):
+        self._store._append(self._pos, value)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ColumnStore(MutableMapping):
+    """
+    Store the rows of a word list in contiguous columns.
+
+    Parameters
+    ----------
+    rows : dict (default=None)
+        A dictionary with integer keys and lists of values as rows, as used by
+        :py:class:`~lingpy.basic.parser.QLCParser`. The rows are removed from
+        the dictionary while they are added to the store.
+
+    Notes
+    -----
+    The type of a column is determined by its first value: integers and floats
+    are stored in NumPy arrays, strings as codes into a table of the strings
+    shared by all columns, token sequences (lists of strings,
+    :py:class:`~lingpy.basictypes.lists`, and
+    :py:class:`~lingpy.basictypes.strings`) as offsets into a flat array of
+    token codes, and all other values in a list. If a value does not fit the
+    type of its column, the column is converted to a list. Since token
+    sequences are decoded on access, modifying a token sequence in place does
+    not change the stored value, which needs to be assigned again.
+    """
+
+    def __init__(self, rows=None):
+        self._keys = {}
+        self._widths = []
+        self._columns = []
+        self._symbols = _Symbols()
+        for key in sorted(rows or []):
+            self[key] = rows.pop(key)
+
+    def _column(self, value):
+        if type(value) in (int, float):
+            column = _ArrayColumn(type(value))
+            if column.accepts(value):
+                return column
+        if type(value) is str:
+            return _StringColumn(self._symbols)
+        for type_ in [basictypes.lists, basictypes._strings, list]:
+            column = _TokenColumn(type_, self._symbols)
+            if column.accepts(value):
+                return column
+        return _ListColumn()
+
+    def _get(self, pos, i):
+        return self._columns[i][pos]
+
+    def _set(self, pos, i, value):
+        column = self._columns[i]
+        if not column.accepts(value):
+            column = self._columns[i] = _ListColumn(
+                column[j] for j in range(len(column)))
+        column[pos] = value
+
+    def _append(self, pos, value):
+        i = self._widths[pos]
+        if i == len(self._columns):
+            self._columns.append(self._column(value))
+        column = self._columns[i]
+        # fill the rows which lack the value with None
+        while len(column) < pos:
+            if not isinstance(column, _ListColumn):
+                column = self._columns[i] = _ListColumn(
+                    column[j] for j in range(len(column)))
+            column.append(None)
+        if len(column) == pos:
+            if not column.accepts(value):
+                column = self._columns[i] = _ListColumn(
+                    column[j] for j in range(len(column)))
+            column.append(value)
+        else:
+            self._set(pos, i, value)
+        self._widths[pos] += 1
+
+    def __getitem__(self, key):
+        return _Row(self, self._keys[key])
+
+    def __setitem__(self, key, row):
+        if key in self._keys:
+            pos = self._keys[key]
+            self._widths[pos] = 0
+        else:
+            pos = self._keys[key] = len(self._widths)
+            self._widths.append(0)
+        for value in row:
+            self._append(pos, value)
+
+    def __delitem__(self, key):
+        del self._keys[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def get_column(self, i):
+        """
+        Return the values of a column in the order of the keys of the store.
+        """
+        if not self._keys:
+            return []
+        column = self._columns[i]
+        if isinstance(column, _StoredColumn):
+            column = column.column
+        positions = list(self._keys.values())
+        if isinstance(column, _StringColumn):
+            tokens = column.symbols.tokens
+            return [tokens[code] for code in
+                    column.codes.array[positions].tolist()]
+        return [column[pos] for pos in positions]
+
+    def columns(self):
+        """
+        Return the columns of the store, loading the columns which have not
+        been accessed yet.
+        """
+        return [column.column if isinstance(column, _StoredColumn) else column
+                for column in self._columns]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+_TOKEN_TYPES = {
+    'lists': basictypes.lists, 'strings': basictypes._strings, 'list': list}
+
+
+def _kind(column):
+    if isinstance(column, _ArrayColumn):
+        return 'int' if column.type == int else 'float'
+    if isinstance(column, _StringColumn):
+        return 'str'
+    if isinstance(column, _TokenColumn):
+        return [k for k, v in _TOKEN_TYPES.items() if v == column.type][0]
+    return 'object'
+
+
+def write_columns(path, data, header, meta=None):
+    """
+    Write the data of a word list to a directory in binary format.
+
+    Parameters
+    ----------
+    path : str
+        The directory to which the data is written.
+    data : { dict, :py:class:`ColumnStore` }
+        The rows of the word list.
+    header : list
+        The names of the columns.
+    meta : dict (default=None)
+        The metadata of the word list, which is stored with :py:mod:`pickle`.
+
+    Notes
+    -----
+    Each column is stored in one or more NumPy files in the directory, which
+    are memory-mapped when the word list is read with :py:func:`read_columns`.
+    Strings are stored as codes into a table of strings, which is stored as
+    JSON. Columns holding other values are stored with :py:mod:`pickle`, so
+    only read word lists from trusted sources.
+    """
+    if not isinstance(data, ColumnStore):
+        data = ColumnStore({key: list(value) for key, value in data.items()})
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    # the keys of the rows ordered by their positions in the columns
+    keys = sorted(data._keys, key=lambda key: data._keys[key])
+    positions = [data._keys[key] for key in keys]
+
+    columns = []
+    for i, column in enumerate(data.columns()):
+        kind = _kind(column)
+        values = {}
+        if kind in ('int', 'float'):
+            values['values'] = column.buffer.values[positions]
+        elif kind == 'str':
+            values['codes'] = column.codes.values[positions]
+        elif kind in _TOKEN_TYPES:
+            # the tokens of overwritten values are dropped
+            starts = column.starts.values[positions]
+            lengths = column.stops.values[positions] - starts
+            stops = np.cumsum(lengths, dtype=np.int64)
+            values['codes'] = column.codes.values[
+                np.arange(stops[-1] if len(stops) else 0) + np.repeat(
+                    starts - (stops - lengths), lengths)]
+            values['starts'] = stops - lengths
+            values['stops'] = stops
+        else:
+            with open(os.path.join(
+                    path, 'column-{0}.pkl'.format(i)), 'wb') as f:
+                pickle.dump([column[pos] if pos < len(column) else None
+                             for pos in positions], f)
+        for part, array in values.items():
+            np.save(os.path.join(
+                path, 'column-{0}-{1}.npy'.format(i, part)), array)
+        columns.append(dict(kind=kind, length=len(keys)))
+
+    np.save(os.path.join(path, 'keys.npy'), np.array(keys, dtype=np.int64))
+    np.save(os.path.join(path, 'widths.npy'), np.array(
+        [data._widths[pos] for pos in positions], dtype=np.int64))
+    with open(os.path.join(path, 'meta.pkl'), 'wb') as f:
+        pickle.dump(meta or {}, f)
+    util.write_text_file(
+        os.path.join(path, 'symbols.json'), json.dumps(data._symbols.tokens),
+        log=False)
+    util.write_text_file(os.path.join(path, 'wordlist.json'), json.dumps(
+        dict(format=FORMAT, version=VERSION, header=header, columns=columns),
+        indent=2))
+
+
+def is_columns(path):
+    """
+    Check whether a path is a directory with a word list in binary format.
+    """
+    return os.path.isfile(os.path.join(path, 'wordlist.json'))
+
+
+def read_columns(path):
+    """
+    Read a word list in binary format.
+
+    Parameters
+    ----------
+    path : str
+        The directory to which the word list was written with
+        :py:func:`write_columns`.
+
+    Returns
+    -------
+    data, header, meta : tuple
+        The rows of the word list as a :py:class:`ColumnStore`, the names of
+        the columns, and the metadata.
+
+    Notes
+    -----
+    The columns are read only when they are first accessed, and the NumPy
+    arrays are memory-mapped, so that processes reading the same word list
+    share the pages of the files. Modifications of the data are not written
+    back to the files.
+    """
+    spec = json.loads(util.read_text_file(os.path.join(path, 'wordlist.json')))
+    if spec.get('format') != FORMAT or spec.get('version') != VERSION:
+        raise ValueError(
+            "The directory {0} does not contain a word list in binary "
+            "format.".format(path))
+
+    data = ColumnStore()
+    data._keys = {
+        key: pos for pos, key in enumerate(
+            np.load(os.path.join(path, 'keys.npy')).tolist())}
+    data._widths = np.load(os.path.join(path, 'widths.npy')).tolist()
+    data._symbols.tokens = json.loads(
+        util.read_text_file(os.path.join(path, 'symbols.json')))
+    data._symbols.codes = {
+        token: code for code, token in enumerate(data._symbols.tokens)}
+    data._columns = [
+        _StoredColumn(path, i, column, data._symbols)
+        for i, column in enumerate(spec['columns'])]
+    with open(os.path.join(path, 'meta.pkl'), 'rb') as f:
+        meta = pickle.load(f)
+    return data, spec['header'], meta
@@ -8,7 +8,8 @@ from collections import defaultdict
 from lingpy import basictypes
 assert basictypes  # Needed to make reading config values work!
 from lingpy.settings import rcParams
-from lingpy.read.qlc import read_qlc
+from lingpy.read.qlc import iter_qlc
+from lingpy.basic.columns import ColumnStore, is_columns, read_columns
 from lingpy import util
 from lingpy.util import confirm
 from lingpy import log
@@ -44,9 +45,22 @@ class QLCParser(object):
     """
     Basic class for the handling of text files in QLC format.
 
+    Parameters
+    ----------
+    filename : {dict, str}
+        The data, passed as a dictionary, a parser object, the path to a
+        file in QLC format, or the path to a directory with a word list in
+        binary format (see :py:func:`~lingpy.basic.columns.read_columns`).
+    conf : str (default='')
+        The path to the configuration file.
+    columnar : bool (default=False)
+        Store the data in a :py:class:`~lingpy.basic.columns.ColumnStore`
+        with one contiguous column per entry instead of a dictionary of
+        lists, which reduces the memory needed for large word lists.
+
     """
 
-    def __init__(self, filename, conf=''):
+    def __init__(self, filename, conf='', columnar=False):
         """
         Parse data regularly if the data has not been loaded from a pickled version.
         """
@@ -54,6 +68,7 @@ class QLCParser(object):
 
         # try to load the data
         internal_import = False
+        store = None
 
         # check whether it's a dictionary from which we load
         if isinstance(filename, dict):
@@ -79,8 +94,18 @@ class QLCParser(object):
             internal_import = True
             self.filename = rcParams['filename']
         # or whether the data is an actual file
+        # or whether it is a directory with a word list in binary format
+        elif isinstance(filename, str) and os.path.isdir(filename) and \
+                is_columns(filename):
+            store, header, input_data = read_columns(filename)
+            input_data[0] = header
+            internal_import = True
+            self.filename = filename
+        # the rows are read lazily and converted while they are stored
         elif isinstance(filename, str) and os.path.isfile(filename):
-            input_data = read_qlc(filename)
+            meta = {}
+            rows = iter_qlc(filename, meta=meta)
+            input_data = dict([next(rows)])
             self.filename = filename
         # raise an error otherwise
         elif isinstance(filename, str):
@@ -126,49 +151,54 @@ class QLCParser(object):
         # types, we don't check for type(x) == int, but instead use the
         # str.numeric-function that returns numeric values only if it is an
         # integer
-        self._data = {
-            int(k): v for k, v in input_data.items() if k != 0 and str(k).isnumeric()}
+        if store is not None:
+            rows, heads = [], []
+        elif internal_import:
+            rows = ((k, v) for k, v in input_data.items()
+                    if k != 0 and str(k).isnumeric())
+            heads = []
+        else:
+            # change the values according to the functions (only needed when
+            # reading from file), alternative names of a column are tried in
+            # turn if the conversion fails
+            heads = defaultdict(list)
+            for head, i in sorted(self._header.items(), key=lambda x: x[1]):
+                heads[i].append(head)
+            heads = sorted(heads.items())
+        logstring = 'Problem with row {0} in col {1}, expected' + \
+                    ' «{4}» as datatype but received «{3}» ' + \
+                    ' (ROW: {2}, entry {5}).'
+
+        if store is not None:
+            self._data = store
+        else:
+            self._data = ColumnStore() if columnar else {}
         # check for same length of all columns
         check_errors = ''
-        for k, v in self._data.items():
+        for k, v in rows:
             if len(v) != len(self.header):
                 check_errors += 'Row {0} in your data contains {1} fields (expected {2})\n'.format(
                     k, len(v), len(self.header))
+                continue
+            for i, names in heads:
+                for head in names:
+                    try:
+                        v[i] = self._class[head](v[i])
+                        break
+                    except (KeyError, ValueError):
+                        log.warning(
+                            logstring.format(
+                                k,
+                                i,
+                                '|'.join([str(x) for x in v]),
+                                v[i],
+                                self._class[head],
+                                head))
+            self._data[int(k)] = v
         if check_errors:
             raise ValueError(check_errors + '\n' + ', '.join(sorted(self.header)))
-
-        # iterate over self._data and change the values according to the
-        # functions (only needed when reading from file)
         if not internal_import:
-            heads = sorted(self._header.items(), key=lambda x: x[1])
-            for key in self._data:
-                check = []
-                for head, i in heads:
-                    if i not in check:
-                        logstring = 'Problem with row {0} in col {1}, expected' + \
-                                    ' «{4}» as datatype but received «{3}» ' + \
-                                    ' (ROW: {2}, entry {5}).'
-                        try:
-                            self._data[key][i] = self._class[head](self._data[key][i])
-                            check.append(i)
-                        except KeyError:
-                            log.warning(
-                                logstring.format(
-                                    key,
-                                    i,
-                                    '|'.join([str(x) for x in self._data[key]]),
-                                    self._data[key][i],
-                                    self._class[head],
-                                    head))
-                        except ValueError:
-                            log.warning(
-                                logstring.format(
-                                    key,
-                                    i,
-                                    '|'.join([str(x) for x in self._data[key]]),
-                                    self._data[key][i],
-                                    self._class[head],
-                                    head))
+            input_data.update(meta)
 
         # create entry attribute of the wordlist
         self.entries = sorted(set([b.lower() for a, b in self._alias.items() if b]))
@@ -392,8 +422,8 @@ class QLCParser(object):
 
 
 class QLCParserWithRowsAndCols(QLCParser):
-    def __init__(self, filename, row, col, conf):
-        QLCParser.__init__(self, filename, conf=conf)
+    def __init__(self, filename, row, col, conf, columnar=False):
+        QLCParser.__init__(self, filename, conf=conf, columnar=columnar)
 
         try:
             self._row_name = self._alias[row]
@@ -404,10 +434,12 @@ class QLCParserWithRowsAndCols(QLCParser):
             raise ValueError("Could not find row or col in configuration or input file!")
 
         def unique_sorted(idx, key):
-            return sorted(
-                set([self._data[k][idx] or '' for k in self._data
-                     if k != 0 and isinstance(k, int)]),
-                key=key)
+            if isinstance(self._data, ColumnStore):
+                values = self._data.get_column(idx)
+            else:
+                values = [self._data[k][idx] for k in self._data
+                          if k != 0 and isinstance(k, int)]
+            return sorted(set([value or '' for value in values]), key=key)
 
         # define rows and cols as attributes of the word list
         self.rows = unique_sorted(rowIdx, lambda x: ('%s' % x).lower())
@@ -422,12 +454,25 @@ class QLCParserWithRowsAndCols(QLCParser):
         self._rowIdx = rowIdx
         self._colIdx = colIdx
 
+        self._make_array()
+
+    def _make_array(self):
+        """
+        Create the index of the entries by rows and columns.
+        """
+        rowIdx, colIdx = self._rowIdx, self._colIdx
+
         # create a basic array which assigns ids for the entries in a starling manner.
         # first, find out, how many items (== synonyms) are there maximally for each row
         self._dict = defaultdict(lambda: defaultdict(list))
-        for key, value in [(k, v) for k, v in self._data.items()
-                           if k != 0 and str(k).isnumeric()]:
-            self._dict[value[rowIdx]][value[colIdx]].append(key)
+        if isinstance(self._data, ColumnStore):
+            items = zip(self._data, self._data.get_column(rowIdx),
+                        self._data.get_column(colIdx))
+        else:
+            items = [(k, v[rowIdx], v[colIdx]) for k, v in self._data.items()
+                     if k != 0 and str(k).isnumeric()]
+        for key, row, col in items:
+            self._dict[row][col].append(key)
 
         # We must cast to a regular dict to make the attribute picklable.
         self._dict = dict(self._dict)
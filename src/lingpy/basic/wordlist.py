@@ -15,6 +15,7 @@ import pycldf
 from lingpy.convert.strings import matrix2dst, pap2nex, pap2csv, multistate2nex
 from lingpy.settings import rcParams
 from lingpy.basic.parser import QLCParserWithRowsAndCols, read_conf
+from lingpy.basic.columns import write_columns
 from lingpy.basic.ops import (
     wl2dst, wl2dict, renumber, calculate_data, wl2qlc, tsv2triple,
     wl2multistate, coverage, iter_rows
@@ -71,6 +72,11 @@ class Wordlist(QLCParserWithRowsAndCols):
         A string defining the path to the configuration file (more information
         in the notes).
 
+    columnar : bool (default=False)
+        Store the data in contiguous columns instead of a dictionary of lists
+        (see :py:class:`~lingpy.basic.columns.ColumnStore`), which reduces
+        the memory needed for large word lists.
+
     Notes
     -----
     A word list is created from a dictionary containing the data. 
@@ -93,9 +99,11 @@ class Wordlist(QLCParserWithRowsAndCols):
     can be easily accessed as two separate two-dimensional lists.
 
     """
-    def __init__(self, filename, row='concept', col='doculect', conf=None):
+    def __init__(self, filename, row='concept', col='doculect', conf=None,
+                 columnar=False):
         QLCParserWithRowsAndCols.__init__(
-            self, filename, row, col, conf or util.data_path('conf', 'wordlist.rc'))
+            self, filename, row, col, conf or util.data_path('conf', 'wordlist.rc'),
+            columnar=columnar)
 
         # setup other local temporary storage
         self._etym_dict = {}
@@ -700,6 +708,12 @@ class Wordlist(QLCParserWithRowsAndCols):
                 return pap2nex(self.cols, paps, **kw)
             return pap2csv(self.cols, paps, **kw)
 
+        # binary format with one file per column
+        if fileformat == 'bin':
+            return write_columns(
+                keywords['filename'] + '.bin', self._data, self.columns,
+                self._meta)
+
         # simple printing of taxa
         if fileformat == 'taxa':
             assert hasattr(self, 'taxa')
@@ -854,10 +868,13 @@ class Wordlist(QLCParserWithRowsAndCols):
 
         Parameters
         ----------
-        fileformat : {"tsv","tre","nwk","dst", "taxa", "starling", "paps.nex", "paps.csv"}
+        fileformat : {"tsv","tre","nwk","dst", "taxa", "starling", "paps.nex", "paps.csv", "bin"}
             The format that is written to file. This corresponds to the file
             extension, thus 'tsv' creates a file in extended tsv-format, 'dst' creates
-            a file in Phylip-distance format, etc.
+            a file in Phylip-distance format, etc. 'bin' creates a directory
+            with the word list in binary format, which is loaded quickly by
+            passing the name of the directory to the class (see
+            :py:func:`~lingpy.basic.columns.write_columns`).
         filename : str
             Specify the name of the output file (defaults to a filename that
             indicates the creation date).
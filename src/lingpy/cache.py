@@ -5,6 +5,7 @@ results of these operations.
 """
 import pickle
 import pathlib
+import hashlib
 
 from appdirs import user_cache_dir
 from lingpy import __version__
@@ -18,8 +19,15 @@ def path(filename, d=DIR):
 
 
 def load(filename, d=DIR):
-    with path(filename, d=d).open('rb') as fp:
-        return pickle.load(fp)
+    p = path(filename, d=d)
+    with p.open('rb') as fp:
+        data = pickle.load(fp)
+    # mark the file as recently used, see prune
+    try:
+        p.touch()
+    except OSError:  # pragma: no cover
+        pass
+    return data
 
 
 def dump(data, filename, d=DIR):
@@ -27,3 +35,29 @@ def dump(data, filename, d=DIR):
         d.mkdir(parents=True)  # pragma: no cover
     with path(filename, d=d).open('wb') as fp:
         pickle.dump(data, fp)
+
+
+def fingerprint(*items):
+    """
+    Compute a hash of the string representations of the items.
+    """
+    digest = hashlib.sha256()
+    for item in items:
+        digest.update(repr(item).encode('utf8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def prune(max_size, d=DIR):
+    """
+    Remove the least recently used files from a cache directory until the size
+    of the remaining files does not exceed max_size bytes.
+    """
+    if not d.exists():
+        return
+    files = sorted(d.glob('*.pkl'), key=lambda p: p.stat().st_mtime)
+    size = sum(p.stat().st_size for p in files)
+    while files and size > max_size:
+        p = files.pop(0)
+        size -= p.stat().st_size
+        p.unlink()
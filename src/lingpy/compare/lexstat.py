@@ -1,5 +1,9 @@
+import json
+import os
+import pickle
 import random
-from itertools import product
+from itertools import product, chain
+from functools import partial
 from collections import Counter, defaultdict
 from copy import copy
 
@@ -11,9 +15,11 @@ from lingpy.sequence.sound_classes import (
     check_tokens
 )
 from lingpy.sequence.generate import MCPhon
+from lingpy.sequence.ngrams import get_n_ngrams, _PAD_SYMBOL
 from lingpy.basic.wordlist import Wordlist
 from lingpy.basic.ops import iter_rows
-from lingpy.align.pairwise import turchin, edit_dist
+from lingpy.align.pairwise import turchin, edit_dist, _pad, _align_batch
+from lingpy.compare import strings
 from lingpy.convert.strings import scorer2str
 from lingpy.algorithm import clustering
 from lingpy.algorithm import extra
@@ -21,9 +27,14 @@ from lingpy.algorithm import calign
 from lingpy.algorithm import talign
 from lingpy.algorithm import misc
 from lingpy import util
+from lingpy import cache
 from lingpy.util import charstring
 from lingpy import log
 
+# the format of the preprocessed data stored with a word list in binary format
+COMPILED_FORMAT = 'lingpy-lexstat'
+COMPILED_VERSION = 1
+
 
 def _check_tokens(key_and_tokens, cldf=False, diacritics=None, stress=None):
     """Generator for error reports on token strings.
@@ -52,20 +63,320 @@ def char_from_charstring(cstring):
     raise ValueError(cstring)
 
 
-def get_score_dict(chars, model):
-    matrix = [[0.0 for i in chars] for j in chars]
-    for (i, charA), (j, charB) in util.multicombinations2(enumerate(chars)):
-        matrix[i][j] = model(
-                char_from_charstring(charA), char_from_charstring(charB))
-        if i < j:
-            matrix[j][i] = matrix[i][j]
-    return misc.ScoreDict(chars, matrix)
+def get_score_dict(chars, model, scorer=None):
+    """
+    Create a scoring dictionary for language-specific characters.
+
+    Parameters
+    ----------
+    chars : list
+        The characters, as created by :py:func:`lingpy.util.charstring`.
+    model : :py:class:`~lingpy.data.model.Model`
+        The sound-class model which provides the scores.
+    scorer : :py:class:`~lingpy.algorithm.cython.misc.ScoreDict` (default=None)
+        A scoring dictionary created for other characters with the same
+        model, whose scores are reused.
+    """
+    # the model is only called once for each pair of sound classes
+    classes = sorted(set(char_from_charstring(char) for char in chars))
+    scores = np.array(
+        [[model(a, b) for b in classes] for a in classes], dtype=float)
+    index = {c: i for i, c in enumerate(classes)}
+    idx = [index[char_from_charstring(char)] for char in chars]
+    matrix = scores[np.ix_(idx, idx)] if chars else np.zeros((0, 0))
+
+    known = [(i, scorer.chars2int[char]) for i, char in enumerate(chars)
+             if scorer and char in scorer.chars2int]
+    if known:
+        pos, kidx = zip(*known)
+        matrix[np.ix_(pos, pos)] = scorer.lookup(
+            np.array(kidx)[:, None], np.array(kidx)[None, :])
+
+    # the scores of the upper triangle are mirrored
+    matrix = np.triu(matrix) + np.triu(matrix, 1).T
+    return misc.ScoreDict(chars, matrix.tolist())
 
 
 def _lexstat(x, y):
     return x if x != '-' else charstring(y)
 
 
+def _corrdist(
+        threshold, seqs, gops, pros, gop, scale, factor, scorer, mode,
+        restricted_chars, sims=(None, None)):
+    """
+    Compute a correspondence distribution with :py:func:`calign.align_batch`.
+
+    Notes
+    -----
+    This function returns the same results as :py:func:`calign.corrdist`.
+    The self-similarities of the sequences can be passed as a tuple of two
+    arrays.
+    """
+    corrs = defaultdict(int)
+    included = 0
+    if not seqs:
+        return corrs, included
+    sims, dists, alignments = _align_batch(
+        seqs, gops, pros, gop, scale, factor, scorer, mode, restricted_chars,
+        True, simsA=sims[0], simsB=sims[1])
+    for (seqA, seqB), dist, (almA, almB) in zip(seqs, dists, alignments):
+        if dist <= threshold:
+            included += 1
+            for a, b in zip(almA, almB):
+                corrs[
+                    seqA[a] if a != -1 else '-',
+                    seqB[b] if b != -1 else '-'] += 1
+    return corrs, included
+
+
+def _subscorer(scorer, seqs):
+    """
+    Reduce a scorer to the characters occurring in a list of sequences.
+
+    Notes
+    -----
+    Alignments computed with the reduced scorer are identical to the ones
+    computed with the full scorer, but the reduced scorer is much cheaper to
+    send to worker processes.
+    """
+    chars = sorted(set(
+        char for seq in seqs for char in seq if char in scorer.chars2int))
+    indices = scorer.encode(chars)
+    return misc.ScoreDict(
+        chars, scorer.array[np.ix_(indices, indices)].tolist())
+
+
+def _corrdists(tasks):
+    """Compute the correspondence distributions for all modes of one pair."""
+    return [_corrdist(*task) for task in tasks]
+
+
+def _mcl_logs(x):
+    return -np.log2((1 - x) ** 2)
+
+
+def _custom_distance(seqA, seqB, gop, scale, scorer):
+    return talign.align_pair(seqA, seqB, gop, scale, scorer, 'overlap', True)[2]
+
+
+def _item_distances(
+        words, lengths, pros, weights, gaps, gop, scale, factor, scorer, mode,
+        restricted_chars, pairs=None, band=None, cutoff=None, sims=None,
+        candidates=None):
+    """
+    Compute the distances between pairs of encoded sequences.
+
+    Notes
+    -----
+    The arguments are created by :py:meth:`LexStat._get_alignment_data`. If
+    no pairs are given, all pairs of sequences are compared, in the order of
+    :py:func:`lingpy.util.combinations2`. Band and cutoff are passed to
+    :py:func:`calign.align_batch`, as well as the self-similarities of the
+    sequences, if they are given. If a boolean mask of candidate pairs is
+    given, only these pairs are aligned, and all other pairs receive a
+    distance of 1.
+    """
+    idxA, idxB = pairs if pairs is not None else np.triu_indices(len(words), 1)
+    if candidates is not None:
+        distances = np.ones(len(idxA))
+        distances[candidates] = _item_distances(
+            words, lengths, pros, weights, gaps, gop, scale, factor, scorer,
+            mode, restricted_chars, (idxA[candidates], idxB[candidates]),
+            band, cutoff, sims)
+        return distances
+    if not len(idxA):
+        return np.zeros(0)
+    if gaps is not None:
+        # gap penalties depend on the language of the other sequence
+        gopsA = scorer[gaps[idxB][:, None], words[idxA]]
+        gopsB = scorer[gaps[idxA][:, None], words[idxB]]
+    else:
+        gopsA, gopsB = weights[idxA], weights[idxB]
+    simsA, simsB = (sims[idxA], sims[idxB]) if sims is not None else (
+        None, None)
+    return calign.align_batch(
+        words[idxA], words[idxB], lengths[idxA], lengths[idxB], gopsA, gopsB,
+        pros[idxA], pros[idxB], gop, scale, factor, scorer, mode,
+        restricted_chars, band=band, cutoff=cutoff, simsA=simsA,
+        simsB=simsB)[1]
+
+
+def _candidates(seqs, prefilter, threshold):
+    """
+    Select the pairs of sequences whose distance, as computed by a cheap \
+            prefilter, is lower than the threshold.
+
+    Notes
+    -----
+    The prefilter is either a callable returning the distance between two
+    sequences, or the name of a function in :py:mod:`lingpy.compare.strings`,
+    such as "dice" or "xdice". The pairs are returned as a boolean mask, in
+    the order of :py:func:`lingpy.util.combinations2`.
+    """
+    if not callable(prefilter):
+        prefilter = getattr(strings, prefilter)
+    return np.array(
+        [prefilter(seqA, seqB) < threshold for seqA, seqB in
+         util.combinations2(seqs)], dtype=bool)
+
+
+def _qgram_candidates(seqs, groups, q, k, max_postings=None):
+    """
+    Search the most similar sequences of other groups with an inverted index \
+            of q-grams.
+
+    Parameters
+    ----------
+    seqs : list
+        The sequences.
+    groups : list
+        The group of each sequence. Sequences of the same group are not
+        compared.
+    q : int
+        The length of the q-grams, which are padded at the word boundaries.
+    k : int
+        The number of candidates retrieved for each sequence.
+    max_postings : int (default=None)
+        Ignore q-grams which occur in more sequences. If set to None, the
+        limit is the square root of the number of sequences, but at least k.
+        Set to 0 in order to use all q-grams.
+
+    Returns
+    -------
+    idxA, idxB, dists : tuple
+        Arrays with the positions of the candidate pairs in the list of
+        sequences, with idxA < idxB, and their Dice distances computed from
+        the shared q-grams.
+
+    Notes
+    -----
+    Only sequences sharing at least one q-gram are compared. Q-grams which
+    consist of as much padding as sound classes, such as "$$$ $$$ K", are
+    shared by a large part of all words, so they are only used for words
+    which have no other q-grams. With the posting lists of the index limited
+    to P sequences, each of the N sequences is compared with at most P
+    sequences for each of its q-grams, so the search takes O(N * L * P)
+    steps for words of length L, which is O(N^1.5 * L) with the default
+    limit instead of O(N^2). Candidates which only share frequent q-grams
+    are missed.
+    """
+    grams, words, codes = {}, [], []
+    for i, seq in enumerate(seqs):
+        own = set(get_n_ngrams(seq, q))
+        inner = [gram for gram in own if 2 * gram.count(_PAD_SYMBOL) < q]
+        for gram in inner or own:
+            words += [i]
+            codes += [grams.setdefault(gram, len(grams))]
+    words = np.array(words, dtype=int)
+    codes = np.array(codes, dtype=int)
+    groups = np.array(groups)
+    sizes = np.bincount(words, minlength=len(seqs))
+
+    # the posting lists of the inverted index
+    order = np.argsort(codes, kind='stable')
+    postings = words[order]
+    counts = np.bincount(codes, minlength=len(grams))
+    starts = np.concatenate([[0], np.cumsum(counts)])
+    if max_postings is None:
+        max_postings = max(k, int(np.sqrt(len(seqs))))
+    if max_postings:
+        keep = counts[codes] <= max_postings
+        words, codes = words[keep], codes[keep]
+    grams_of = np.split(codes[np.argsort(words, kind='stable')], np.cumsum(
+        np.bincount(words, minlength=len(seqs)))[:-1])
+
+    pairs = {}
+    for i, own in enumerate(grams_of):
+        if not len(own):
+            continue
+        hits = np.concatenate(
+            [postings[starts[c]:starts[c + 1]] for c in own])
+        others, shared = np.unique(hits, return_counts=True)
+        valid = groups[others] != groups[i]
+        others, shared = others[valid], shared[valid]
+        if not len(others):
+            continue
+        dists = 1 - 2 * shared / (sizes[i] + sizes[others])
+        best = np.argsort(dists, kind='stable')[:k]
+        for j, dist in zip(others[best].tolist(), dists[best].tolist()):
+            pairs[min(i, j), max(i, j)] = dist
+
+    pairs = sorted(
+        [(i, j, dist) for (i, j), dist in pairs.items()],
+        key=lambda x: (x[2], x[0], x[1]))
+    idxA = np.array([x[0] for x in pairs], dtype=int)
+    idxB = np.array([x[1] for x in pairs], dtype=int)
+    return idxA, idxB, np.array([x[2] for x in pairs], dtype=float)
+
+
+def _concept_distances(task):
+    """
+    Compute the flat distance matrix for the words of one concept.
+
+    Notes
+    -----
+    The task is created by :py:meth:`LexStat._get_distance_task`. Distances
+    which cannot be computed because of a division by zero are returned as
+    NaN.
+    """
+    kind, data = task
+    if kind == 'alignments':
+        return _item_distances(**data)
+    if kind == 'pairs':
+        function, seqs, args = data
+        distances = []
+        for seqA, seqB in util.combinations2(seqs):
+            try:
+                distances += [function(seqA, seqB, *args)]
+            except ZeroDivisionError:
+                distances += [np.nan]
+        return np.array(distances, dtype=float)
+    return np.array(data, dtype=float)
+
+
+def _flat_cluster(
+        method, matrix, threshold, max_steps, inflation, expansion,
+        add_self_loops, mcl_logs, matrix_type, link_threshold,
+        mcl_sparse=False):
+    """Carry out one of the flat cluster methods of LexStat.cluster."""
+    taxa = list(range(len(matrix)))
+    if method == 'mcl':
+        return clustering.mcl(
+                threshold, matrix, taxa, max_steps=max_steps,
+                inflation=inflation, expansion=expansion,
+                add_self_loops=add_self_loops, logs=mcl_logs, revert=True,
+                sparse=mcl_sparse)
+    if method == 'infomap':
+        return extra.infomap_clustering(threshold, matrix, taxa, revert=True)
+    if method == 'link_clustering':
+        return clustering.link_clustering(
+                threshold, matrix, taxa, revert=True, fuzzy=False,
+                matrix_type=matrix_type, link_threshold=link_threshold)
+    return clustering.flat_cluster(method, threshold, matrix, revert=True)
+
+
+def _cluster_concept(task):
+    """
+    Compute the distances and the flat clusters for the words of one concept.
+
+    Notes
+    -----
+    Only the cluster labels and the positions of the distances which could
+    not be computed are returned, in order to keep the results of worker
+    processes small.
+    """
+    distance_task, fclust, threshold, trange = task
+    distances = _concept_distances(distance_task)
+    zeros = np.flatnonzero(np.isnan(distances))
+    distances[zeros] = 100
+    matrix = misc.squareform(distances.tolist())
+    if trange:
+        threshold = clustering.best_threshold(matrix, trange)
+    clusters = fclust(matrix, threshold)
+    return [clusters[i] for i in range(len(matrix))], zeros.tolist()
+
+
 class LexStat(Wordlist):
     """
     Basic class for automatic cognate detection.
@@ -184,6 +495,9 @@ class LexStat(Wordlist):
         in a reconstruction system, and the target is a proposed phonetic
         interpretation. This practice is also accepted by the `EDICTOR
         <http://edictor.digling.org>`_ tool.
+    columnar : bool (default=False)
+        Store the data in contiguous columns instead of a dictionary of lists
+        (see :py:class:`~lingpy.basic.columns.ColumnStore`).
 
     Attributes
     ----------
@@ -264,7 +578,8 @@ class LexStat(Wordlist):
             "row": "concept",
             "col": "doculect",
             "conf": None,
-            'cldf': True
+            'cldf': True,
+            'columnar': False
         }
         kw.update(keywords)
 
@@ -292,7 +607,7 @@ class LexStat(Wordlist):
         # initialize the wordlist
         Wordlist.__init__(
                 self, filename, row=kw['row'], col=kw['col'],
-                conf=kw['conf'])
+                conf=kw['conf'], columnar=kw['columnar'])
         assert self._segments in self.header or \
             self._transcription in self.header
 
@@ -393,32 +708,15 @@ class LexStat(Wordlist):
                     words.add(word)
             self.add_entries(self._duplicates, duplicates, lambda x: x)
 
+        # reuse the preprocessed data stored with a word list in binary format
+        if isinstance(filename, str) and os.path.isfile(
+                os.path.join(filename, 'lexstat.json')):
+            self._read_compiled(filename)
+
         # create an index
         if not hasattr(self, 'freqs'):
-            self.chars = set()
             self.freqs = {}
-            for taxon in self.cols:
-                self.freqs[taxon] = Counter()
-                for word in self.get_list(
-                        col=taxon, entry=self._numbers, flat=True):
-                    self.freqs[taxon].update(word)
-                self.chars = self.chars.union(self.freqs[taxon].keys())
-
-            self.rchars = sorted(
-                    set(char.split('.', 1)[1] for char in self.chars))
-            self.chars = sorted(self.chars) \
-                + [charstring(i + 1) for i in range(self.width)]
-            if not self.chars:
-                raise ValueError("Your input data contains no entries!")
-            self.bad_chars = [char for char in self.chars if char[2] == '0']
-            if len(self.bad_chars) / len(self.chars) > \
-                    rcParams['lexstat_bad_chars_limit']:
-                raise ValueError(
-                    "{0:.0f}% of the unique characters in your word "
-                    "list are not "
-                    "recognized by {1}. You should set check=True!".format(
-                        100 * len(self.bad_chars) / len(self.chars),
-                        util.PROG))
+            self._make_chars(self.cols)
 
         if not hasattr(self, "scorer"):
             self._meta['scorer'] = {}
@@ -436,33 +734,166 @@ class LexStat(Wordlist):
             if 'cscorer' in self._meta['scorer']:
                 self.cscorer = self._meta['scorer']['cscorer']
 
+        # self-similarities of the words, stored for each scorer
+        self._self_scores = {}
+
         # make the language pairs
         if not hasattr(self, "pairs"):
             self.pairs = {}
             self._same_vals = defaultdict(list)
-            for (i, taxonA), (j, taxonB) in util.multicombinations2(
-                    enumerate(self.cols)):
-                self.pairs[taxonA, taxonB] = []
-                dictA = self.get_dict(col=taxonA)
-                dictB = self.get_dict(col=taxonB)
-                if i < j:
-                    for c in sorted(set(dictA).intersection(dictB)):
-                        for idxA, idxB in product(dictA[c], dictB[c]):
-                            this_pair = '{0}-{1}/{2}-{3}'.format(
-                                    ''.join(self[idxA, self._segments]),
-                                    taxonA,
-                                    ''.join(self[idxB, self._segments]),
-                                    taxonB
-                                    )
-                            if not self._same_vals[this_pair]:
-                                self.pairs[taxonA, taxonB] += [(idxA, idxB)]
-                            self._same_vals[this_pair] += [(idxA, idxB)]
-                elif i == j:
-                    for c in sorted(dictA):
-                        for idx in dictA[c]:
-                            dAB = self[idx, self._duplicates]
-                            if dAB != 1:
-                                self.pairs[taxonA, taxonA] += [(idx, idx)]
+            self._make_pairs(util.multicombinations2(enumerate(self.cols)))
+
+    def _make_chars(self, taxa):
+        """
+        Count the characters of the given taxa and update the character \
+                inventories.
+        """
+        for taxon in taxa:
+            self.freqs[taxon] = Counter()
+            for word in self.get_list(
+                    col=taxon, entry=self._numbers, flat=True):
+                self.freqs[taxon].update(word)
+        self._update_chars()
+
+    def _update_chars(self):
+        """
+        Update the character inventories from the character frequencies.
+        """
+        chars = set()
+        for taxon in self.cols:
+            chars = chars.union(self.freqs[taxon].keys())
+
+        self.rchars = sorted(
+                set(char.split('.', 1)[1] for char in chars))
+        self.chars = sorted(chars) \
+            + [charstring(i + 1) for i in range(self.width)]
+        if not self.chars:
+            raise ValueError("Your input data contains no entries!")
+        self.bad_chars = [char for char in self.chars if char[2] == '0']
+        if len(self.bad_chars) / len(self.chars) > \
+                rcParams['lexstat_bad_chars_limit']:
+            raise ValueError(
+                "{0:.0f}% of the unique characters in your word "
+                "list are not "
+                "recognized by {1}. You should set check=True!".format(
+                    100 * len(self.bad_chars) / len(self.chars),
+                    util.PROG))
+
+    def _make_pairs(self, taxa):
+        """
+        Collect the word pairs for the given pairs of taxa.
+        """
+        for (i, taxonA), (j, taxonB) in taxa:
+            self.pairs[taxonA, taxonB] = []
+            dictA = self.get_dict(col=taxonA)
+            dictB = self.get_dict(col=taxonB)
+            if i < j:
+                for c in sorted(set(dictA).intersection(dictB)):
+                    for idxA, idxB in product(dictA[c], dictB[c]):
+                        this_pair = '{0}-{1}/{2}-{3}'.format(
+                                ''.join(self[idxA, self._segments]),
+                                taxonA,
+                                ''.join(self[idxB, self._segments]),
+                                taxonB
+                                )
+                        if not self._same_vals[this_pair]:
+                            self.pairs[taxonA, taxonB] += [(idxA, idxB)]
+                        self._same_vals[this_pair] += [(idxA, idxB)]
+            elif i == j:
+                for c in sorted(dictA):
+                    for idx in dictA[c]:
+                        dAB = self[idx, self._duplicates]
+                        if dAB != 1:
+                            self.pairs[taxonA, taxonA] += [(idx, idx)]
+
+    def _compiled_settings(self):
+        """
+        Return the settings on which the preprocessed data depends.
+        """
+        return dict(
+            columns=[self._segments, self._numbers, self._langid,
+                     self._duplicates],
+            taxa=self.cols,
+            rows=len(self),
+            data=cache.fingerprint(*[
+                [idx] + [self[idx, entry] for entry in [
+                    self._langid, self._row_name, self._numbers,
+                    self._duplicates]] for idx in sorted(self)]),
+            model=self.model.name)
+
+    def _write_compiled(self, path):
+        """
+        Store the preprocessed data with a word list in binary format.
+
+        Notes
+        -----
+        The character frequencies are stored as an array of taxon, character,
+        and count, with the characters in a table, and the word pairs as an
+        array of index pairs with the offsets of each pair of taxa. The
+        sequences themselves are integer-encoded in the columns of the word
+        list (see :py:func:`~lingpy.basic.columns.write_columns`).
+        """
+        chars = sorted(set(chain(*[self.freqs[taxon] for taxon in self.cols])))
+        codes = {char: i for i, char in enumerate(chars)}
+        freqs = [
+            (i, codes[char], count) for i, taxon in enumerate(self.cols) for
+            char, count in self.freqs[taxon].items()]
+        keys = list(self.pairs)
+        pairs = [pair for key in keys for pair in self.pairs[key]]
+        np.save(os.path.join(path, 'lexstat-freqs.npy'), np.array(
+            freqs, dtype=np.int64).reshape(-1, 3))
+        np.save(os.path.join(path, 'lexstat-pairs.npy'), np.array(
+            pairs, dtype=np.int64).reshape(-1, 2))
+        np.save(os.path.join(path, 'lexstat-offsets.npy'), np.cumsum(
+            [0] + [len(self.pairs[key]) for key in keys], dtype=np.int64))
+        util.write_text_file(os.path.join(path, 'lexstat.json'), json.dumps(
+            dict(format=COMPILED_FORMAT, version=COMPILED_VERSION,
+                 settings=self._compiled_settings(), chars=chars,
+                 pairs=keys), indent=2), log=False)
+
+    def _read_compiled(self, path):
+        """
+        Load the preprocessed data stored with a word list in binary format.
+
+        Notes
+        -----
+        The data is only used if it was written by the same version of the
+        format and for the same settings and words, otherwise it is computed
+        anew. The
+        basic scorers are reused if the sound-class model is the same.
+        """
+        spec = json.loads(util.read_text_file(
+            os.path.join(path, 'lexstat.json')))
+        settings = self._compiled_settings()
+        if spec.get('format') != COMPILED_FORMAT or \
+                spec.get('version') != COMPILED_VERSION or any(
+                    spec['settings'].get(key) != settings[key] for key in
+                    ['columns', 'taxa', 'rows', 'data']):
+            log.warning(
+                "The preprocessed data in {0} does not match and is "
+                "computed anew.".format(path))
+            return
+
+        self.freqs = {taxon: Counter() for taxon in self.cols}
+        chars = spec['chars']
+        for i, char, count in np.load(
+                os.path.join(path, 'lexstat-freqs.npy')).tolist():
+            self.freqs[self.cols[i]][chars[char]] = count
+        self._update_chars()
+
+        pairs = np.load(os.path.join(path, 'lexstat-pairs.npy')).tolist()
+        offsets = np.load(os.path.join(path, 'lexstat-offsets.npy')).tolist()
+        self.pairs = {}
+        for k, (taxonA, taxonB) in enumerate(spec['pairs']):
+            self.pairs[taxonA, taxonB] = [
+                tuple(pair) for pair in pairs[offsets[k]:offsets[k + 1]]]
+        self._same_vals = defaultdict(list)
+
+        if spec['settings']['model'] == settings['model'] and \
+                'scorer' in self._meta:
+            for name in ['bscorer', 'rscorer']:
+                if name in self._meta['scorer']:
+                    setattr(self, name, self._meta['scorer'][name])
 
     def __repr__(self):
         return "<lexstat-model {0}>".format(self.filename)
@@ -582,33 +1013,16 @@ class LexStat(Wordlist):
 
     def _cluster_method(self, method, **kw):
         """Helper method for flat clustering in cognate detection."""
-        def linkage(x, y):
-            return clustering.flat_cluster(method, y, x, revert=True)
-
-        def mcl(x, y):
-            return clustering.mcl(
-                    y, x, list(range(len(x))),
-                    max_steps=kw['max_steps'], inflation=kw['inflation'],
-                    expansion=kw['expansion'],
-                    add_self_loops=kw['add_self_loops'], logs=kw['mcl_logs'],
-                    revert=True)
-
-        def infomap(x, y):
-            return extra.infomap_clustering(
-                    y, x, list(range(len(x))), revert=True)
-
-        def lc(x, y):
-            return clustering.link_clustering(
-                    y, x, list(range(len(x))), revert=True, fuzzy=False,
-                    matrix_type=kw['matrix_type'],
-                    link_threshold=kw['link_threshold'])
-
-        return dict(zip(
-            (
+        return dict(
+            (name, partial(
+                _flat_cluster, name, max_steps=kw['max_steps'],
+                inflation=kw['inflation'], expansion=kw['expansion'],
+                add_self_loops=kw['add_self_loops'], mcl_logs=kw['mcl_logs'],
+                matrix_type=kw['matrix_type'],
+                link_threshold=kw['link_threshold'],
+                mcl_sparse=kw['mcl_sparse'])) for name in (
                 'single', 'upgma', 'complete', 'ward', 'mcl', 'infomap',
-                'link_clustering'),
-            (
-                linkage, linkage, linkage, linkage, mcl, infomap, lc)))[method]
+                'link_clustering'))[method]
 
     def get_subset(self, sublist, ref='concept'):
         """
@@ -651,10 +1065,15 @@ class LexStat(Wordlist):
             ref='scaid',
             restricted_chars=rcParams['restricted_chars'],
             threshold=rcParams['lexstat_scoring_threshold'],
-            subset=False)
+            subset=False,
+            processes=1,
+            executor=None,
+            taxa=None)
         kw.update(keywords)
 
-        self._included = {}
+        # only the given pairs of taxa are computed when updating a scorer
+        if kw['taxa'] is None:
+            self._included = {}
         corrdist = {}
 
         if kw['preprocessing']:
@@ -666,46 +1085,57 @@ class LexStat(Wordlist):
                     cluster_method=kw['cluster_method'],
                     ref=kw['ref'])
 
+        taxa = list(util.multicombinations2(enumerate(self.cols))) \
+            if kw['taxa'] is None else kw['taxa']
+        tasks = []
+        for (i, tA), (j, tB) in taxa:
+            pairs = self.pairs[tA, tB]
+            if kw['subset']:
+                pairs = [
+                        pair for pair in pairs if pair in
+                        self.subsets[tA, tB]]
+
+            # threshold and preprocessing, make sure threshold is
+            # different from pre-processing threshold when
+            # preprocessing is set to false
+            if kw['preprocessing']:
+                pairs = [pair for pair in pairs
+                         if self[pair, kw['ref']][0] == self[
+                             pair, kw['ref']][1]]
+                threshold = 10.0
+            else:
+                threshold = kw['threshold']
+
+            seqs = [self[pair, self._numbers] for pair in pairs]
+            scorer = _subscorer(self.bscorer, chain(*seqs))
+            sims = tuple(self._get_self_scores(
+                'bscorer', kw['factor'], [(pair[k], slice(None)) for pair in
+                                          pairs], [seq[k] for seq in seqs])
+                for k in range(2))
+            tasks += [[(
+                threshold,
+                seqs,
+                [self[pair, self._weights] for pair in pairs],
+                [self[pair, self._prostrings] for pair in pairs],
+                gop,
+                scale,
+                kw['factor'],
+                scorer,
+                mode,
+                kw['restricted_chars'],
+                sims) for mode, gop, scale in kw['modes']]]
+
         with util.pb(
                 desc='CORRESPONDENCE CALCULATION',
-                total=self.width ** 2 / 2) as pb:
-            for (i, tA), (j, tB) in util.multicombinations2(
-                    enumerate(self.cols)):
+                total=len(taxa)) as pb:
+            for ((i, tA), (j, tB)), results in zip(taxa, util.parallel_map(
+                    _corrdists, tasks, kw['processes'], kw['executor'])):
                 pb.update(1)
                 log.info("Calculating alignments for pair {0} / {1}.".format(
                     tA, tB))
 
                 corrdist[tA, tB] = defaultdict(float)
-                for mode, gop, scale in kw['modes']:
-                    pairs = self.pairs[tA, tB]
-                    if kw['subset']:
-                        pairs = [
-                                pair for pair in pairs if pair in
-                                self.subsets[tA, tB]]
-
-                    # threshold and preprocessing, make sure threshold is
-                    # different from pre-processing threshold when
-                    # preprocessing is set to false
-                    if kw['preprocessing']:
-                        pairs = [pair for pair in pairs
-                                 if self[pair, kw['ref']][0] == self[
-                                     pair, kw['ref']][1]]
-                        threshold = 10.0
-                    else:
-                        threshold = kw['threshold']
-
-                    corrs, self._included[tA, tB] = calign.corrdist(
-                        threshold,
-                        [self[pair, self._numbers] for pair in pairs],
-                        [self[pair, self._weights] for pair in pairs],
-                        [self[pair, self._prostrings] for pair in pairs],
-                        gop,
-                        scale,
-                        kw['factor'],
-                        self.bscorer,
-                        mode,
-                        kw['restricted_chars'])
-
+                for corrs, self._included[tA, tB] in results:
                     # change representation of gaps
                     for (a, b), d in corrs.items():
                         # XXX check for bias XXX
@@ -728,7 +1158,10 @@ class LexStat(Wordlist):
             runs=rcParams['lexstat_runs'],
             rands=rcParams['lexstat_rands'],
             limit=rcParams['lexstat_limit'],
-            method=rcParams['lexstat_scoring_method'])
+            method=rcParams['lexstat_scoring_method'],
+            processes=1,
+            executor=None,
+            taxa=None)
         kw.update(keywords)
 
         # determine the mode
@@ -736,7 +1169,9 @@ class LexStat(Wordlist):
             else 'shuffle'
 
         corrdist = {}
-        tasks = (self.width ** 2) / 2
+        taxa = list(util.multicombinations2(enumerate(self.cols))) \
+            if kw['taxa'] is None else kw['taxa']
+        tasks = []
 
         if method == 'markov':
             seqs, pros, weights = {}, {}, {}
@@ -746,10 +1181,11 @@ class LexStat(Wordlist):
                 [(i, j) for i in range(kw['rands']) for j in
                     range(kw['rands'])], kw['runs'])
 
+            needed = set(taxon for pair in taxa for i, taxon in pair)
             with util.pb(
                     desc='SEQUENCE GENERATION',
-                    total=len(self.cols)) as progress:
-                for i, taxon in enumerate(self.cols):
+                    total=len(needed)) as progress:
+                for taxon in [t for t in self.cols if t in needed]:
                     progress.update(1)
                     log.info("Analyzing taxon {0}.".format(taxon))
                     tokens = self.get_list(col=taxon, entry="tokens", flat=True)
@@ -787,31 +1223,36 @@ class LexStat(Wordlist):
                                  [self._transform[pr] for pr in pros[taxon][-1]]
                                  )])
 
+            for (i, tA), (j, tB) in taxa:
+                pairs = [(seqs[tA][x], seqs[tB][y]) for x, y in sample]
+                scorer = _subscorer(self.rscorer, chain(*pairs))
+                tasks += [[(
+                    10.0,
+                    pairs,
+                    [(weights[tA][x], weights[tB][y]) for x, y in sample],
+                    [(pros[tA][x], pros[tB][y]) for x, y in sample],
+                    gop,
+                    scale,
+                    kw['factor'],
+                    scorer,
+                    mode,
+                    kw['restricted_chars']) for mode, gop, scale in
+                    kw['modes']]]
+
             with util.pb(
                     desc='RANDOM CORRESPONDENCE CALCULATION',
-                    total=tasks) as progress:
-                for (i, tA), (j, tB) in util.multicombinations2(
-                        enumerate(self.cols)):
+                    total=len(taxa)) as progress:
+                for ((i, tA), (j, tB)), results in zip(
+                        taxa, util.parallel_map(
+                            _corrdists, tasks, kw['processes'],
+                            kw['executor'])):
                     progress.update(1)
                     log.info(
                         "Calculating random alignments"
                         " for pair {0}/{1}.".format(tA, tB)
                     )
                     corrdist[tA, tB] = defaultdict(float)
-                    for mode, gop, scale in kw['modes']:
-                        corrs, included = calign.corrdist(
-                            10.0,
-                            [(seqs[tA][x], seqs[tB][y]) for x, y in sample],
-                            [(weights[tA][x], weights[tB][y]) for x, y in
-                                sample],
-                            [(pros[tA][x], pros[tB][y]) for x, y in sample],
-                            gop,
-                            scale,
-                            kw['factor'],
-                            self.rscorer,
-                            mode,
-                            kw['restricted_chars'])
-
+                    for corrs, included in results:
                         # change representation of gaps
                         for a, b in list(corrs.keys()):
                             # get the correspondence count
@@ -829,53 +1270,61 @@ class LexStat(Wordlist):
                             corrdist[tA, tB][a, b] += d / len(kw['modes'])
         # use shuffle approach otherwise
         else:
-            tasks = self.width ** 2 / 2
+            # random samples are drawn here rather than in the worker
+            # processes, so that the results do not depend on the number of
+            # processes
+            for (i, tA), (j, tB) in taxa:
+                # get the number pairs etc.
+                numbers = [
+                        self[pair, self._numbers] for pair in
+                        self.pairs[tA, tB]]
+                gops = [
+                        self[pair, self._weights] for pair in
+                        self.pairs[tA, tB]]
+                prostrings = [
+                        self[pair, self._prostrings] for pair in
+                        self.pairs[tA, tB]]
+                sample = [
+                        (x, y)
+                        for x in range(len(numbers)) for y in
+                        range(len(numbers))]
+                if len(sample) > kw['runs']:
+                    sample = random.sample(sample, kw['runs'])
+
+                pairs = [(numbers[x][0], numbers[y][1]) for x, y in sample]
+                scorer = _subscorer(self.bscorer, chain(*pairs))
+                sims = tuple(self._get_self_scores(
+                    'bscorer', kw['factor'],
+                    [(self.pairs[tA, tB][x if k == 0 else y][k], slice(None))
+                     for x, y in sample], [pair[k] for pair in pairs])
+                    for k in range(2))
+                tasks += [[(
+                    10.0,
+                    pairs,
+                    [(gops[x][0], gops[y][1]) for x, y in sample],
+                    [(prostrings[x][0], prostrings[y][1]) for x, y in sample],
+                    gop,
+                    scale,
+                    kw['factor'],
+                    scorer,
+                    mode,
+                    kw['restricted_chars'],
+                    sims) for mode, gop, scale in kw['modes']]]
+
             with util.pb(
                     desc='RANDOM CORRESPONDENCE CALCULATION',
-                    total=tasks) as progress:
-                for (i, tA), (j, tB) in util.multicombinations2(
-                        enumerate(self.cols)):
+                    total=len(taxa)) as progress:
+                for ((i, tA), (j, tB)), results in zip(
+                        taxa, util.parallel_map(
+                            _corrdists, tasks, kw['processes'],
+                            kw['executor'])):
                     progress.update(1)
                     log.info(
                         "Calculating random alignments"
                         "for pair {0}/{1}.".format(tA, tB)
                     )
                     corrdist[tA, tB] = defaultdict(float)
-
-                    # get the number pairs etc.
-                    numbers = [
-                            self[pair, self._numbers] for pair in
-                            self.pairs[tA, tB]]
-                    gops = [
-                            self[pair, self._weights] for pair in
-                            self.pairs[tA, tB]]
-                    prostrings = [
-                            self[pair, self._prostrings] for pair in
-                            self.pairs[tA, tB]]
-                    sample = [
-                            (x, y)
-                            for x in range(len(numbers)) for y in
-                            range(len(numbers))]
-                    if len(sample) > kw['runs']:
-                        sample = random.sample(sample, kw['runs'])
-
-                    for mode, gop, scale in kw['modes']:
-                        corrs, included = calign.corrdist(
-                            10.0,
-                            [(
-                                numbers[s[0]][0],
-                                numbers[s[1]][1]) for s in sample],
-                            [(gops[s[0]][0], gops[s[1]][1]) for s in sample],
-                            [(
-                                prostrings[s[0]][0],
-                                prostrings[s[1]][1]) for s in sample],
-                            gop,
-                            scale,
-                            kw['factor'],
-                            self.bscorer,
-                            mode,
-                            kw['restricted_chars'])
-
+                    for corrs, included in results:
                         # change representation of gaps
                         for a, b in list(corrs.keys()):
                             # get the correspondence count
@@ -953,6 +1402,27 @@ class LexStat(Wordlist):
             a very small constant, by which the score is divided in this case.
             Not that this constant is only relevant in those cases where the
             shuffling procedure was not carried out long enough.
+        processes : int (default=1)
+            The number of processes over which the alignments of the language
+            pairs are distributed.
+        executor : :py:class:`concurrent.futures.Executor` (default=None)
+            An executor which is used instead of a new pool of "processes"
+            worker processes.
+
+        cache : bool (default=False)
+            Store the scorer in the lingpy cache directory and reuse it when
+            a scorer is computed with the same parameters from the same data,
+            unless "force" is set to True.
+        cache_size : int (default=1073741824)
+            The maximal size of the cached scorers in bytes. If the size is
+            exceeded, the least recently used scorers are removed.
+
+        Notes
+        -----
+        All random samples are drawn in the main process, so the scorer does
+        not depend on the number of processes. Seed the :py:mod:`random`
+        module to make the results reproducible. Note that a cached scorer is
+        reused regardless of the state of the :py:mod:`random` module.
 
         """
         kw = dict(
@@ -977,7 +1447,11 @@ class LexStat(Wordlist):
             defaults=False,
             unattested=-5,
             unexpected=0.00001,
-            smooth=1
+            smooth=1,
+            processes=1,
+            executor=None,
+            cache=rcParams['lexstat_cache'],
+            cache_size=rcParams['lexstat_cache_size']
         )
         kw.update(keywords)
         if kw['defaults']:
@@ -1044,65 +1518,265 @@ class LexStat(Wordlist):
         self.params = {'cscorer': params}
         self._meta['params'] = self.params
         self._stamp += "# Parameters: " + parstring + '\n'
+        self._scorer_kw = dict(
+            (key, value) for key, value in kw.items() if key not in [
+                'processes', 'executor', 'force', 'defaults', 'taxa'])
+
+        if kw['cache']:
+            fingerprint = self._get_fingerprint(**kw)
+            try:
+                scorer = None if kw['force'] else cache.load(
+                    fingerprint, d=cache.DIR / 'scorers')
+            except (IOError, EOFError, pickle.UnpicklingError):
+                scorer = None
+            if scorer:
+                log.info("Loaded scorer {0} from cache.".format(fingerprint))
+                self._corrdist, self._randist, self._included = scorer[:3]
+                self.cscorer = scorer[3]
+                self._meta['scorer']['cscorer'] = self.cscorer
+                return
 
         # get the correspondence distribution
         self._corrdist = self._get_corrdist(**kw)
         # get the random distribution
         self._randist = self._get_randist(**kw)
+        self._make_cscorer(**kw)
 
+        if kw['cache']:
+            cache.dump(
+                (self._corrdist, self._randist, self._included, self.cscorer),
+                fingerprint, d=cache.DIR / 'scorers')
+            cache.prune(kw['cache_size'], d=cache.DIR / 'scorers')
+
+    def _make_cscorer(self, **kw):
+        """
+        Create the scorer from the correspondence and random distributions.
+        """
         # get the average gop
         gop = sum([m[1] for m in kw['modes']]) / len(kw['modes'])
 
         # create the new scoring matrix
-        matrix = [[c for c in line] for line in self.bscorer.matrix]
+        matrix = np.array(self.bscorer.array[:-1, :-1])
         char_dict = self.bscorer.chars2int
 
+        # characters which are not in the scorer or lack a prosodic value are
+        # not scored
+        def encode(chars):
+            idx = np.array(self.bscorer.encode(chars))
+            valid = np.array([char in char_dict and len(char) > 4
+                              for char in chars], dtype=bool)
+            vowels = np.array([len(char) > 4 and char[4] in self.vowels
+                               for char in chars], dtype=bool)
+            gaps = np.array([rcParams['gap_symbol'] in char for char in chars],
+                            dtype=bool)
+            return idx, valid, vowels, gaps
+
+        def distribution(dist, posA, posB):
+            array = np.zeros((len(posA), len(posB)))
+            for (charA, charB), value in dist.items():
+                if charA in posA and charB in posB:
+                    array[posA[charA], posB[charB]] = value
+            return array
+
         for (i, tA), (j, tB) in util.multicombinations2(enumerate(self.cols)):
-            for charA, charB in product(
-                list(self.freqs[tA]) + [charstring(i + 1)],
-                list(self.freqs[tB]) + [charstring(j + 1)]
-            ):
-                exp = self._randist.get(
-                        (tA, tB), {}).get((charA, charB), False)
-                att = self._corrdist.get(
-                        (tA, tB), {}).get((charA, charB), False)
-                # in the following we follow the former lexstat protocol
-                if att <= kw['smooth'] and i != j:
-                    att = False
-
-                if att and exp:
-                    score = np.log2((att ** 2) / (exp ** 2))
-                elif att and not exp:
-                    score = np.log2((att ** 2) / kw['unexpected'])
-                elif exp and not att:
-                    score = kw['unattested']  # XXX gop ???
-                else:  # elif not exp and not att:
-                    score = -90  # ???
-
-                # combine the scores
-                if rcParams['gap_symbol'] not in charA + charB:
-                    sim = self.bscorer[charA, charB]
-                else:
-                    sim = gop
+            charsA = list(self.freqs[tA]) + [charstring(i + 1)]
+            charsB = list(self.freqs[tB]) + [charstring(j + 1)]
+            posA = {char: k for k, char in enumerate(charsA)}
+            posB = {char: k for k, char in enumerate(charsB)}
+            exp = distribution(self._randist.get((tA, tB), {}), posA, posB)
+            att = distribution(self._corrdist.get((tA, tB), {}), posA, posB)
+            # in the following we follow the former lexstat protocol
+            if i != j:
+                att[att <= kw['smooth']] = 0
+
+            score = np.full(att.shape, -90.0)
+            with np.errstate(divide='ignore'):
+                both = (att != 0) & (exp != 0)
+                score[both] = np.log2((att[both] ** 2) / (exp[both] ** 2))
+                only = (att != 0) & (exp == 0)
+                score[only] = np.log2((att[only] ** 2) / kw['unexpected'])
+            score[(att == 0) & (exp != 0)] = kw['unattested']
+
+            # combine the scores
+            idxA, validA, vowelsA, gapsA = encode(charsA)
+            idxB, validB, vowelsB, gapsB = encode(charsB)
+            sim = np.where(
+                gapsA[:, None] | gapsB[None, :], gop,
+                self.bscorer.lookup(idxA[:, None], idxB[None, :]))
+
+            # get the real score and use the vowel scale
+            rscore = (kw['ratio'][0] * score + kw['ratio'][1] * sim) \
+                / sum(kw['ratio'])
+            rscore = np.where(
+                vowelsA[:, None] & vowelsB[None, :], kw['vscale'] * rscore,
+                rscore)
+
+            # the scores of the pairs of characters of the same language are
+            # symmetrized in favor of the lower triangle, as the pairs are
+            # visited in row order
+            if i == j:
+                rscore = np.tril(rscore) + np.tril(rscore, -1).T
+            rscore = rscore[np.ix_(validA, validB)]
+            idxA, idxB = idxA[validA], idxB[validB]
+            matrix[np.ix_(idxA, idxB)] = rscore
+            matrix[np.ix_(idxB, idxA)] = rscore.T
+
+        matrix = matrix.tolist()
+        self.cscorer = misc.ScoreDict(self.chars, matrix)
+        self._meta['scorer']['cscorer'] = self.cscorer
 
-                # get the real score
-                rscore = (kw['ratio'][0] * score + kw['ratio'][1] * sim) \
-                    / sum(kw['ratio'])
+    def _get_fingerprint(self, **keywords):
+        """
+        Compute a hash of the data and the parameters from which a scorer is
+        computed.
+        """
+        ref = keywords['ref'] if keywords['preprocessing'] else None
+        # models are only known by name, so their scores are added as well
+        bscorer = getattr(self, 'bscorer', None)
+        items = [
+            getattr(self.model, 'name', self.model),
+            bscorer.array.tobytes() if bscorer is not None else None,
+            self.cols,
+            sorted(
+                (key, value) for key, value in keywords.items() if key not in [
+                    'processes', 'executor', 'cache', 'cache_size', 'force',
+                    'defaults', 'taxa'])]
+        for idx in sorted(self):
+            items += [[self[idx, entry] if entry in self.header else None
+                       for entry in [
+                           self._row_name, self._col_name, self._numbers,
+                           self._prostrings, self._weights, ref]]]
+        if keywords['subset']:
+            items += [sorted(self.subsets.items())]
+        return 'scorer-' + cache.fingerprint(*items)
+
+    def add_doculect(self, data, **keywords):
+        """
+        Add the words of one or more new doculects to the wordlist.
 
-                try:
-                    iA = char_dict[charA]
-                    iB = char_dict[charB]
+        Parameters
+        ----------
+        data : {dict, str, :py:class:`~lingpy.basic.wordlist.Wordlist`}
+            The words of the new doculects, passed in any of the formats
+            accepted by :py:class:`~lingpy.basic.wordlist.Wordlist`. The
+            identifiers of the words are reassigned.
 
-                    # use the vowel scale
-                    if charA[4] in self.vowels and charB[4] in self.vowels:
-                        matrix[iA][iB] = matrix[iB][iA] = kw['vscale'] * rscore
-                    else:
-                        matrix[iA][iB] = matrix[iB][iA] = rscore
-                except:
-                    pass
+        Notes
+        -----
+        The new doculects receive the language identifiers following the ones
+        of the existing doculects, so the statistics computed for the existing
+        pairs of doculects remain valid. Use :py:meth:`LexStat.update_scorer`
+        to compute the statistics for the new pairs of doculects and to update
+        the scorer. Additional keywords (such as "merge_vowels" or "tokenize")
+        are passed to :py:class:`LexStat` in order to prepare the new words.
+        """
+        new = Wordlist(data, row=self._row_name, col=self._col_name)
+        taxa = new.cols
+        if set(taxa).intersection(self.cols):
+            raise ValueError(
+                "The doculects {0} are already in the wordlist.".format(
+                    ', '.join(sorted(set(taxa).intersection(self.cols)))))
+
+        # assign language identifiers following the existing ones
+        langids = dict(zip(
+            taxa, [str(self.width + i + 1) for i in range(len(taxa))]))
+        header = [name for name in new.columns if name != self._langid]
+        D = {0: header + [self._langid]}
+        for idx in new:
+            D[idx] = [new[idx, name] for name in header] + [
+                langids[new[idx, self._col_name]]]
+        kw = dict(
+            model=self.model,
+            transform=getattr(self, '_transform', rcParams['lexstat_transform']),
+            no_bscorer=True,
+            segments=self._segments,
+            numbers=self._numbers,
+            classes=self._classes,
+            transcription=self._transcription,
+            prostrings=self._prostrings,
+            weights=self._weights,
+            sonars=self._sonars,
+            langid=self._langid,
+            duplicates=self._duplicates,
+            row=self._row_name,
+            col=self._col_name,
+            cldf=self._cldf)
+        kw.update(keywords)
+        new = LexStat(D, **kw)
+
+        # add the words to the data
+        key = max(self._data) if self._data else 0
+        for idx in sorted(new):
+            key += 1
+            row = []
+            for name in self.columns:
+                if name in new.header:
+                    row += [new[idx, name]]
+                else:
+                    try:
+                        row += [self._class[name]()]
+                    except (KeyError, TypeError):
+                        row += ['']
+            self._data[key] = row
+
+        self.rows = sorted(
+            set(self.rows).union(new.rows), key=lambda x: ('%s' % x).lower())
+        self.height = len(self.rows)
+        self.cols.extend(taxa)
+        self.width = len(self.cols)
+        self._make_array()
+
+        # update the characters, the scorers, and the pairs
+        self._make_chars(taxa)
+        if hasattr(self, 'bscorer'):
+            self._meta['scorer']['bscorer'] = self.bscorer = get_score_dict(
+                self.chars, self.model, self.bscorer)
+        self._meta['scorer']['rscorer'] = self.rscorer = get_score_dict(
+            self.rchars, self.model, self.rscorer)
+        self._make_pairs([
+            ((i, tA), (j, tB)) for (i, tA), (j, tB) in
+            util.multicombinations2(enumerate(self.cols)) if tB in taxa])
+
+    def update_scorer(self, **keywords):
+        """
+        Update the scorer after new doculects have been added.
 
-        self.cscorer = misc.ScoreDict(self.chars, matrix)
-        self._meta['scorer']['cscorer'] = self.cscorer
+        Notes
+        -----
+        Only the correspondence and random distributions of the pairs of
+        doculects which were not yet analyzed are computed, using the
+        parameters of the last call to :py:meth:`LexStat.get_scorer`, which can
+        be modified by passing them as keywords. The scorer is then rebuilt
+        from the distributions of all pairs of doculects. If no scorer has been
+        computed before, a new scorer is computed with
+        :py:meth:`LexStat.get_scorer`. When using a subset of the word pairs,
+        call :py:meth:`LexStat.get_subset` again before updating the scorer.
+        """
+        if not hasattr(self, '_scorer_kw'):
+            keywords['force'] = True
+            return self.get_scorer(**keywords)
+        kw = dict(self._scorer_kw, **keywords)
+
+        taxa = [
+            ((i, tA), (j, tB)) for (i, tA), (j, tB) in
+            util.multicombinations2(enumerate(self.cols))
+            if (tA, tB) not in self._corrdist]
+        if not taxa:
+            return
+
+        # the preliminary cognates need to be computed for the new words
+        if kw['preprocessing']:
+            self.cluster(
+                method=kw['preprocessing_method'],
+                threshold=kw['preprocessing_threshold'],
+                gop=kw['gop'],
+                cluster_method=kw['cluster_method'],
+                ref=kw.setdefault('ref', 'scaid'),
+                override=True)
+        kw['taxa'] = taxa
+        self._corrdist.update(self._get_corrdist(**kw))
+        self._randist.update(self._get_randist(**kw))
+        self._make_cscorer(**kw)
 
     def align_pairs(self, idxA, idxB, concept=None, **keywords):
         """
@@ -1261,36 +1935,192 @@ class LexStat(Wordlist):
         kw = dict(
             defaults=False,
             external_scorer=False,  # external scoring function
+            band=None,
+            cutoff=None,
+            prefilter=None,
+            prefilter_threshold=1.0,
         )
         kw.update(keywords)
-        function = self._distance_method(
-                method, scale=scale, factor=factor,
-                restricted_chars=restricted_chars, mode=mode, gop=gop,
-                restriction=restriction, external_scorer=kw['external_scorer'])
         concepts = [concept] if concept else sorted(self.rows)
+        if kw['prefilter']:
+            self._meta['prefiltered'] = 0
         for c in concepts:
             log.info("Analyzing words for concept <{0}>.".format(c))
             indices = self.get_list(row=c, flat=True)
-            matrix = []
-            for idxA, idxB in util.combinations2(indices):
-                try:
-                    d = function(idxA, idxB)
-                except ZeroDivisionError:
-                    log.warning(
-                        "Encountered Zero-Division for the comparison of "
-                        "{0} ({2}) and {1} ({3})".format(
-                            ''.join(self[idxA, self._segments]),
-                            ''.join(self[idxB, self._segments]),
-                            idxA, idxB
-                            ))
-                    d = 100
-                matrix += [d]
-            matrix = misc.squareform(matrix)
+            task = self._get_distance_task(
+                indices, method, scale=scale, factor=factor,
+                restricted_chars=restricted_chars, mode=mode, gop=gop,
+                restriction=restriction, external_scorer=kw['external_scorer'],
+                band=kw['band'], cutoff=kw['cutoff'],
+                prefilter=kw['prefilter'],
+                prefilter_threshold=kw['prefilter_threshold'])
+            if kw['prefilter']:
+                self._meta['prefiltered'] += self._count_prefiltered([task])
+            distances = _concept_distances(task)
+            matrix = misc.squareform(
+                self._check_distances(indices, distances).tolist())
             if not concept:
                 yield c, indices, matrix
             else:
                 yield matrix
 
+    def _count_prefiltered(self, tasks):
+        """
+        Report the number of alignments which are skipped by the prefilter.
+        """
+        skipped, total = 0, 0
+        for kind, data in tasks:
+            if kind == 'alignments' and data.get('candidates') is not None:
+                skipped += int((~data['candidates']).sum())
+                total += len(data['candidates'])
+        if total:
+            log.info("The prefilter skipped {0} of {1} alignments.".format(
+                skipped, total))
+        return skipped
+
+    def _zero_division_warnings(self, indices, zeros):
+        idxA, idxB = np.triu_indices(len(indices), 1)
+        for k in zeros:
+            log.warning(
+                "Encountered Zero-Division for the comparison of "
+                "{0} ({2}) and {1} ({3})".format(
+                    ''.join(self[indices[idxA[k]], self._segments]),
+                    ''.join(self[indices[idxB[k]], self._segments]),
+                    indices[idxA[k]], indices[idxB[k]]
+                    ))
+
+    def _check_distances(self, indices, distances):
+        """
+        Replace distances which could not be computed by 100 and warn.
+        """
+        zeros = np.flatnonzero(np.isnan(distances))
+        self._zero_division_warnings(indices, zeros)
+        distances[zeros] = 100
+        return distances
+
+    def _get_alignment_data(
+            self, items, method, scale, factor, restricted_chars, mode, gop):
+        """
+        Encode sequences for the computation of distances with \
+                :py:func:`_item_distances`.
+
+        Parameters
+        ----------
+        items : list
+            A list of tuples of word identifiers and slices of the words which
+            shall be compared.
+
+        Notes
+        -----
+        The scorer is reduced to the characters of the sequences, so the data
+        can be passed cheaply to worker processes.
+        """
+        numbers = [self[idx, self._numbers][slc] for idx, slc in items]
+        if method == 'lexstat':
+            gaps = [charstring(self[idx, self._langid]) for idx, slc in items]
+            scorer = _subscorer(self.cscorer, numbers + [gaps])
+            weights, gaps, gop = None, np.array(scorer.encode(gaps)), 1
+            sims = self._get_self_scores('cscorer', factor, items, numbers)
+        else:
+            numbers = [[n.split('.', 1)[1] for n in seq] for seq in numbers]
+            scorer = _subscorer(self.rscorer, numbers)
+            sims = self._get_self_scores('rscorer', factor, items, numbers)
+            weights, gaps = _pad(
+                [self[idx, self._weights][slc] for idx, slc in items], 0.0,
+                float), None
+        seqs = [scorer.encode(seq) for seq in numbers]
+        return dict(
+            words=_pad(seqs, len(scorer.matrix)),
+            lengths=np.array([len(seq) for seq in seqs], dtype=int),
+            pros=_pad([[ord(char) for char in self[idx, self._prostrings][
+                slc]] for idx, slc in items], 0),
+            weights=weights,
+            gaps=gaps,
+            gop=gop,
+            scale=scale,
+            factor=factor,
+            scorer=scorer.array,
+            mode=mode,
+            restricted_chars=restricted_chars,
+            sims=sims)
+
+    def _get_self_scores(self, name, factor, items, seqs):
+        """
+        Return the self-similarities of words, which are computed only once \
+                for each scorer and factor.
+
+        Parameters
+        ----------
+        name : {'cscorer', 'rscorer', 'bscorer'}
+            The name of the scorer.
+        factor : float
+            The factor for extra scores for identical prosodic segments.
+        items : list
+            A list of tuples of word identifiers and slices of the words.
+        seqs : list
+            The sequences of the items, as characters of the scorer.
+
+        Notes
+        -----
+        The stored values are discarded as soon as the scorer is replaced, for
+        example by :py:meth:`LexStat.get_scorer`.
+        """
+        scorer = getattr(self, name)
+        stored, cache = self._self_scores.get(name, (None, None))
+        if stored is not scorer:
+            cache = {}
+            self._self_scores[name] = (scorer, cache)
+        keys = [(factor, idx, slc.start, slc.stop) for idx, slc in items]
+        missing = [i for i, key in enumerate(keys) if key not in cache]
+        if missing:
+            codes = [scorer.encode(seqs[i]) for i in missing]
+            for i, sim in zip(missing, calign.self_scores(
+                    _pad(codes, len(scorer.matrix)),
+                    np.array([len(code) for code in codes], dtype=int),
+                    factor, scorer.array).tolist()):
+                cache[keys[i]] = sim
+        return np.array([cache[key] for key in keys], dtype=float)
+
+    def _get_distance_task(
+            self, indices, method, scale, factor, restricted_chars, mode, gop,
+            restriction='', external_scorer=False, band=None, cutoff=None,
+            prefilter=None, prefilter_threshold=1.0):
+        """
+        Collect the data needed to compute the distances between the words \
+                of one concept with :py:func:`_concept_distances`.
+
+        Notes
+        -----
+        The distances are identical to the ones computed by the functions of
+        :py:meth:`LexStat._distance_method`, unless a band, a cutoff, or a
+        prefilter is used for the methods "lexstat" and "sca". The prefilter
+        is applied to the sound-class strings of the words, see
+        :py:func:`_candidates`.
+        """
+        if method in ['lexstat', 'sca']:
+            data = self._get_alignment_data(
+                [(idx, slice(None)) for idx in indices], method, scale,
+                factor, restricted_chars, mode, gop)
+            data.update(band=band, cutoff=cutoff)
+            if prefilter:
+                data['candidates'] = _candidates(
+                    [self[idx, self._classes] for idx in indices], prefilter,
+                    prefilter_threshold)
+            return 'alignments', data
+        if method == 'edit-dist':
+            return 'pairs', (
+                edit_dist,
+                [list(self[idx, self._segments]) for idx in indices],
+                (True, restriction))
+        if method == 'turchin':
+            return 'pairs', (
+                turchin,
+                [list(self[idx, self._segments]) for idx in indices], ())
+        return 'pairs', (
+            _custom_distance,
+            [list(self[idx, 'user_tokens']) for idx in indices],
+            (gop, scale, external_scorer))
+
     def cluster(
             self,
             method='sca',
@@ -1344,6 +2174,42 @@ class LexStat(Wordlist):
             Specify the inflation parameter for the use of the MCL algorithm.
         expansion : int (default=2)
             Specify the expansion parameter for the use of the MCL algorithm.
+        mcl_sparse : bool (default=False)
+            Iterate the MCL algorithm on pruned sparse matrices, which is
+            much faster for concepts with many words (requires scipy).
+        processes : int (default=1)
+            The number of processes over which the concepts are distributed.
+            The distances and flat clusters of each concept are computed in
+            the worker processes, so cluster methods passed as
+            "external_function" need to be picklable.
+        executor : :py:class:`concurrent.futures.Executor` (default=None)
+            An executor which is used instead of a new pool of "processes"
+            worker processes.
+        band : int (default=None)
+            For the methods "lexstat" and "sca" in "global" or "overlap"
+            mode, restrict the alignments to a diagonal band of the given
+            width. The distances then approximate the ones of full
+            alignments.
+        cutoff : float (default=None)
+            For the methods "lexstat" and "sca" in "global" or "overlap"
+            mode, stop aligning a word pair as soon as its distance is
+            guaranteed to exceed the cutoff. Such pairs receive a lower bound
+            of their distance which still exceeds the cutoff. With a cutoff
+            not lower than the threshold, "single" and "complete" linkage
+            clusters are unchanged, while other cluster methods may be
+            affected.
+        prefilter : {str, callable} (default=None)
+            For the methods "lexstat" and "sca", compare the sound-class
+            strings of all word pairs with a cheap distance first, either a
+            function of :py:mod:`lingpy.compare.strings`, such as "dice" or
+            "xdice", or a callable taking two sequences. Pairs whose prefilter
+            distance is not lower than "prefilter_threshold" are not aligned
+            and receive a distance of 1. The number of skipped alignments is
+            stored in the "prefiltered" entry of the metadata.
+        prefilter_threshold : float (default=1.0)
+            The prefilter distance from which on word pairs are not aligned.
+            With "dice" and the default threshold, only pairs which do not
+            share any bigram of sound classes are skipped.
 
         """
         kw = dict(
@@ -1353,13 +2219,20 @@ class LexStat(Wordlist):
             add_self_loops=True,
             guess_threshold=False,
             gt_trange=(0.4, 0.6, 0.02),
-            mcl_logs=lambda x: -np.log2((1 - x) ** 2),
+            mcl_logs=_mcl_logs,
+            mcl_sparse=False,
             gt_mode='average',
             matrix_type='distances',
             link_threshold=False,
             _return_matrix=False,  # help function for test purposes
             defaults=False,
             external_scorer=False,  # external scoring dictionary
+            processes=1,
+            executor=None,
+            band=None,
+            cutoff=None,
+            prefilter=None,
+            prefilter_threshold=1.0,
         )
         kw.update(keywords)
         if kw['defaults']:
@@ -1389,25 +2262,33 @@ class LexStat(Wordlist):
         clr = {}
         k = 0
 
-        # create a matrix iterator
-        matrices = self._get_matrices(
-            method=method,
-            scale=scale,
-            factor=factor,
-            restricted_chars=restricted_chars,
-            mode=mode,
-            gop=gop,
-            restriction=restriction,
-            **kw)
+        # collect the data for the computation of the distances of each
+        # concept, which are computed in the worker processes
+        concepts = sorted(self.rows)
+        indices = [self.get_list(row=c, flat=True) for c in concepts]
+        tasks = [self._get_distance_task(
+            idxs, method, scale=scale, factor=factor,
+            restricted_chars=restricted_chars, mode=mode, gop=gop,
+            restriction=restriction, external_scorer=kw['external_scorer'],
+            band=kw['band'], cutoff=kw['cutoff'], prefilter=kw['prefilter'],
+            prefilter_threshold=kw['prefilter_threshold'])
+            for idxs in indices]
+        if kw['prefilter']:
+            self._meta['prefiltered'] = self._count_prefiltered(tasks)
 
         if kw['guess_threshold']:
             thresholds = []
             # check for full consideration of basic t
             if kw['gt_mode'] == 'average':
-                matrices = list(matrices)
-                for c, i, m in matrices:
-                    thresholds.append(
-                            clustering.best_threshold(m, kw['gt_trange']))
+                distances = util.parallel_map(
+                        _concept_distances, tasks, kw['processes'],
+                        kw['executor'])
+                tasks = []
+                for idxs, dists in zip(indices, distances):
+                    dists = self._check_distances(idxs, dists).tolist()
+                    thresholds.append(clustering.best_threshold(
+                        misc.squareform(dists), kw['gt_trange']))
+                    tasks.append(('distances', dists))
 
             # new method for threshold estimation based on calculating
             # approximate random distributions of similarities for each
@@ -1433,40 +2314,33 @@ class LexStat(Wordlist):
                 threshold = sum(thresholds) / len(thresholds) * 0.5
                 self._meta['guessed_threshold'] = threshold
 
+        # check for keyword to guess the threshold
+        trange = kw['gt_trange'] if kw['guess_threshold'] and \
+            kw['gt_mode'] == 'item' else None
+        results = util.parallel_map(
+                _cluster_concept,
+                [(task, fclust, threshold, trange) for task in tasks],
+                kw['processes'], kw['executor'])
+
+        # cluster identifiers are assigned in the order of the concepts, so
+        # they do not depend on the number of processes
         with util.pb(
                 desc='SEQUENCE CLUSTERING',
                 total=len(self.rows)) as progress:
-            for concept, indices, matrix in matrices:
+            for concept, idxs, (c, zeros) in zip(concepts, indices, results):
                 progress.update(1)
+                log.info("Analyzing words for concept <{0}>.".format(concept))
+                self._zero_division_warnings(idxs, zeros)
 
-                # check for keyword to guess the threshold
-                if kw['guess_threshold'] and kw['gt_mode'] == 'item':
-                    t = clustering.best_threshold(matrix, kw['gt_trange'])
-                # FIXME: considering new function here JML
-                # elif kw['guess_threshold'] and kw['gt_mode'] == 'nullditem':
-                #    pass
-                else:
-                    t = threshold
-
-                c = fclust(matrix, t)
-
-                # specific clustering for fuzzy methods, currently not yet
-                # supported if cluster_method in ['fuzzy']:  #
-                # ['link_communities','lc','lcl']: clusters = [[d + k for d in
-                # c[i]] for i in range(len(matrix))] tests = [] for clrx in
-                # clusters: for x in clrx: tests += [x] k = max(tests) for
-                # idxA, idxB in zip(indices, clusters): clr[idxA] = idxB
-                # else:
-                if 1:
-                    # extract the clusters
-                    clusters = [c[i] + k for i in range(len(matrix))]
+                # extract the clusters
+                clusters = [x + k for x in c]
 
-                    # reassign the "k" value
-                    k = max(clusters)
+                # reassign the "k" value
+                k = max(clusters)
 
-                    # add values to cluster dictionary
-                    for idxA, idxB in zip(indices, clusters):
-                        clr[idxA] = idxB
+                # add values to cluster dictionary
+                for idxA, idxB in zip(idxs, clusters):
+                    clr[idxA] = idxB
 
         if not ref:
             ref = method + 'id' if method in [
@@ -1477,9 +2351,36 @@ class LexStat(Wordlist):
         # assign thresholds to parameters
         self._current_threshold = threshold
 
+    def _pair_distances(self, pairs, method, mode, scale, factor, gop, band):
+        """
+        Compute the distances of word pairs in one batch, as they are \
+                computed by :py:meth:`LexStat.align_pairs`.
+        """
+        seqs, gops, pros = [], [], []
+        for idxA, idxB in pairs:
+            seqs += [(self[idxA, self._numbers], self[idxB, self._numbers])]
+            pros += [(self[idxA, self._prostrings], self[idxB, self._prostrings])]
+            if method == 'lexstat':
+                lA, lB = self[idxA, self._langid], self[idxB, self._langid]
+                gops += [(
+                    [self.cscorer[charstring(lA), n] for n in seqs[-1][0]],
+                    [self.cscorer[charstring(lB), n] for n in seqs[-1][1]])]
+            else:
+                gops += [(self[idxA, self._weights], self[idxB, self._weights])]
+        name = 'cscorer' if method == 'lexstat' else 'bscorer'
+        if method == 'lexstat':
+            gop = abs(gop)
+        sims = [self._get_self_scores(
+            name, factor, [(pair[k], slice(None)) for pair in pairs],
+            [seq[k] for seq in seqs]) for k in range(2)]
+        # the restricted characters are the defaults of align_pairs
+        return _align_batch(
+            seqs, gops, pros, gop, scale, factor, getattr(self, name), mode,
+            '_T', band=band, simsA=sims[0], simsB=sims[1])[1]
+
     def _get_distances(
             self, method, mode, scale, factor, gop, sample,
-            edit_dist_normalized):
+            edit_dist_normalized, band=None):
         """
         Parameters
         ----------
@@ -1488,6 +2389,9 @@ class LexStat(Wordlist):
             pairs passed as sole argument.
         edit_dist_normalized : bool
             Whether edit_dist should be normalized.
+        band : int (default=None)
+            The band width for global and overlap alignments with the methods
+            "lexstat" and "sca".
 
         Returns
         -------
@@ -1499,8 +2403,18 @@ class LexStat(Wordlist):
                 factor=factor, gop=gop, normalized=edit_dist_normalized)
 
         for taxA, taxB in util.combinations2(self.cols):
+            pairs = list(sample(self.pairs[taxA, taxB]))
+            if method in ['lexstat', 'sca']:
+                distances = self._pair_distances(
+                    pairs, method, mode, scale, factor, gop, band).tolist()
+                for i, d in enumerate(distances):
+                    if np.isnan(d):
+                        self.log.error("Zero-Warning")
+                        distances[i] = 1.0
+                yield distances
+                continue
             distances = []
-            for pA, pB in sample(self.pairs[taxA, taxB]):
+            for pA, pB in pairs:
                 try:
                     d = function(pA, pB)
                 except ZeroDivisionError:
@@ -1517,7 +2431,8 @@ class LexStat(Wordlist):
             gop=-2,
             scale=0.5,
             factor=0.3,
-            restricted_chars='T_'):
+            restricted_chars='T_',
+            band=None):
         """
         Method calculates randoms scores for unrelated words in a dataset.
 
@@ -1538,6 +2453,10 @@ class LexStat(Wordlist):
         restricted_chars : str (default="T_")
             Select the restricted chars (boundary markers) in the prosodic
             strings in order to enable secondary alignment.
+        band : int (default=None)
+            Restrict global and overlap alignments of the methods "lexstat"
+            and "sca" to a diagonal band of the given width. The alignments
+            are computed without traceback in any case.
 
         Returns
         -------
@@ -1554,7 +2473,7 @@ class LexStat(Wordlist):
 
         D = []
         for distances in self._get_distances(
-                method, mode, scale, factor, gop, sample, False):
+                method, mode, scale, factor, gop, sample, False, band):
             D.extend(distances)
         return sorted(D)
 
@@ -1566,7 +2485,8 @@ class LexStat(Wordlist):
             scale=0.5,
             factor=0.3,
             restricted_chars='T_',
-            aggregate=True):
+            aggregate=True,
+            band=None):
         """
         Method calculates different distance estimates for language pairs.
 
@@ -1590,6 +2510,10 @@ class LexStat(Wordlist):
         aggregate : bool (default=True)
             Return aggregated distances in form of a distance matrix for all
             taxa in the data.
+        band : int (default=None)
+            Restrict global and overlap alignments of the methods "lexstat"
+            and "sca" to a diagonal band of the given width. The alignments
+            are computed without traceback in any case.
 
         Returns
         -------
@@ -1598,13 +2522,92 @@ class LexStat(Wordlist):
         """
         D = []
         for distances in self._get_distances(
-                method, mode, scale, factor, gop, util.identity, True):
+                method, mode, scale, factor, gop, util.identity, True, band):
             if aggregate:
                 D.append(sum(distances) / len(distances))
             else:
                 D.extend(distances)
         return misc.squareform(D) if aggregate else sorted(D)
 
+    def get_candidates(
+            self,
+            k=10,
+            q=3,
+            max_postings=None,
+            method=None,
+            scale=0.5,
+            factor=0.3,
+            restricted_chars='_T',
+            mode='overlap',
+            gop=-2):
+        """
+        Search candidate cognates across concepts.
+
+        Parameters
+        ----------
+        k : int (default=10)
+            The number of candidates retrieved for each word.
+        q : int (default=3)
+            The length of the q-grams of sound classes by which the words are
+            indexed. The q-grams are padded at the word boundaries.
+        max_postings : int (default=None)
+            Ignore q-grams which occur in more words than this number. This
+            keeps the search fast on large wordlists, at the expense of
+            missing candidates which only share frequent q-grams. If set to
+            None, the limit is the square root of the number of words (but at
+            least k), set it to 0 in order to use all q-grams.
+        method : {None, 'sca', 'lexstat'} (default=None)
+            If set, the candidate pairs are aligned with the given method and
+            ranked by their alignment distance. Otherwise, they are ranked by
+            the Dice distance of their q-grams.
+        scale : float (default=0.5)
+            Select the scale for the gap extension penalty.
+        factor : float (default=0.3)
+            Select the factor for extra scores for identical prosodic segments.
+        restricted_chars : str (default="_T")
+            Select the restricted chars (boundary markers) in the prosodic
+            strings in order to enable secondary alignment.
+        mode : {'global','local','overlap','dialign'} (default='overlap')
+            Select the mode for the alignment analysis.
+        gop : int (default=-2)
+            If 'sca' is selected as a method, define the gap opening penalty.
+
+        Returns
+        -------
+        candidates : list
+            A list of tuples of the identifiers of two words of different
+            concepts and their distance, sorted by increasing distance.
+
+        Notes
+        -----
+        Words are only compared when they share at least one q-gram of their
+        sound classes, using an inverted index, so the search does not compare
+        all pairs of words in the wordlist. Q-grams which are mostly padding
+        are ignored, and with the default limit of the posting lists, the
+        search grows with N^1.5 for N words instead of N^2. This allows to search for cognates
+        with semantic shifts, which :py:meth:`LexStat.cluster` misses, since
+        it only compares the words of the same concept. The method "lexstat"
+        requires a scorer, see :py:meth:`LexStat.get_scorer`.
+        """
+        indices = sorted(self)
+        idxA, idxB, dists = _qgram_candidates(
+            [self[idx, self._classes] for idx in indices],
+            [self[idx, self._row_name] for idx in indices], q, k,
+            max_postings)
+        if method in ['sca', 'lexstat'] and len(idxA):
+            # only the words of the candidate pairs are encoded
+            words, pairs = np.unique(
+                np.concatenate([idxA, idxB]), return_inverse=True)
+            dists = _item_distances(
+                pairs=(pairs[:len(idxA)], pairs[len(idxA):]),
+                **self._get_alignment_data(
+                    [(indices[i], slice(None)) for i in words.tolist()],
+                    method, scale, factor, restricted_chars, mode, gop))
+            dists[np.isnan(dists)] = 100
+        order = np.argsort(dists, kind='stable')
+        return [(indices[idxA[i]], indices[idxB[i]], float(dists[i])) for i in
+                order.tolist()]
+
     def get_frequencies(self, ftype='sounds', ref='tokens', aggregated=False):
         """
         Computes the frequencies of a given wordlist.
@@ -1661,10 +2664,13 @@ class LexStat(Wordlist):
         Parameters
         ----------
         fileformat : {'tsv', 'tre','nwk','dst', 'taxa','starling', \
-                'paps.nex', 'paps.csv'}
+                'paps.nex', 'paps.csv', 'bin'}
             The format that is written to file. This corresponds to the file
             extension, thus 'tsv' creates a file in tsv-format, 'dst' creates
-            a file in Phylip-distance format, etc.
+            a file in Phylip-distance format, etc. 'bin' writes the word list
+            in binary format together with the preprocessed data of LexStat,
+            so that a new LexStat instance created from the directory skips
+            the preprocessing.
         filename : str
             Specify the name of the output file (defaults to a filename that
             indicates the creation date).
@@ -1723,3 +2729,5 @@ class LexStat(Wordlist):
                     kw.get('scorer', self.rscorer)))
         else:
             self._output(fileformat, **kw)
+            if fileformat == 'bin':
+                self._write_compiled(kw['filename'] + '.bin')
@@ -3,7 +3,8 @@ Module provides a class for partial cognate detection, expanding the LexStat cla
 
 """
 from collections import defaultdict
-from itertools import combinations, product
+from functools import partial
+from itertools import combinations
 import random
 
 import numpy as np
@@ -13,14 +14,9 @@ import lingpy
 from lingpy.settings import rcParams
 from lingpy.algorithm import clustering, extra, misc
 from lingpy.algorithm import calign
-from lingpy.compare.lexstat import LexStat
+from lingpy.compare.lexstat import LexStat, _item_distances, _mcl_logs
 from lingpy import util, log 
 
-try:
-    from lingpy.algorithm.cython import calign
-except ImportError:
-    from lingpy.algorithm.cython import _calign as calign
-
 # taking functions from lexstat source code here
 def _charstring(id_, char='X', cls='-'):
     return '{0}.{1}.{2}'.format(id_, char, cls)
@@ -48,6 +44,126 @@ def _get_slices(tokens, **keywords):
         current = current+len(morpheme)+(1 if not kw['split_on_tones'] else 0)
     return out
 
+def _partial_matrix(data, words, imap_mode):
+    """
+    Compute the distance matrix of the morphemes of one concept.
+
+    Notes
+    -----
+    We have two basic constraints in the algorithm: a) set cognacy between
+    morphemes in the same word to zero, b) set cognacy for those parts to
+    zero which are superceded by another part in all comparisons of two words
+    ("imap_mode"). Essentially, setting things to zero, means setting them to
+    1, since we are dealing with distances here.
+
+    Returns
+    -------
+    matrix, zeros : tuple
+        The distance matrix and the pairs of morphemes for which the distance
+        could not be computed because of a division by zero.
+    """
+    words = np.array(words, dtype=int)
+    idxA, idxB = np.triu_indices(len(words), 1)
+    keep = words[idxA] != words[idxB]
+    pairs = idxA[keep], idxB[keep]
+    distances = _item_distances(pairs=pairs, **data)
+    nans = np.isnan(distances)
+    zeros = list(zip(pairs[0][nans].tolist(), pairs[1][nans].tolist()))
+    distances[nans] = 100
+
+    if not imap_mode:
+        flat = np.ones(len(idxA))
+        flat[keep] = distances
+        return misc.squareform(flat.tolist()), zeros
+
+    # now, iterate for each string pair, asses the scores, and make
+    # sure, we only assign the best of those to the matrix
+    table = np.zeros((len(words), len(words)))
+    table[pairs] = distances
+    table = table.tolist()
+    matrix = [[0 for i in words] for j in words]
+    parts = [list(np.flatnonzero(words == word)) for word in sorted(
+        set(words.tolist()))]
+    for partsA, partsB in combinations(parts, r=2):
+        scores = []
+        idxs = []
+        for posA in partsA:
+            for posB in partsB:
+                scores += [table[posA][posB]]
+                idxs += [(posA, posB)]
+
+        visited_seqs = set([])
+        while scores:
+            min_score_index = scores.index(min(scores))
+            min_score = scores.pop(min_score_index)
+            posA, posB = idxs.pop(min_score_index)
+            if posA in visited_seqs or posB in visited_seqs:
+                matrix[posA][posB] = 1
+                matrix[posB][posA] = 1
+            else:
+                matrix[posA][posB] = min_score
+                matrix[posB][posA] = min_score
+                visited_seqs.add(posA)
+                visited_seqs.add(posB)
+
+    # reset the self-constraints
+    for positions in parts:
+        for posA, posB in combinations(positions, r=2):
+            matrix[posA][posB] = 1
+            matrix[posB][posA] = 1
+    return matrix, zeros
+
+
+def _partial_flat_cluster(
+        cluster_method, threshold, matrix, max_steps, inflation, expansion,
+        add_self_loops, mcl_logs, external_function):
+    """Carry out one of the flat cluster methods of Partial.partial_cluster."""
+    if external_function:
+        return external_function(threshold, matrix,
+                taxa=list(range(len(matrix))), revert=True)
+    elif cluster_method == 'infomap':
+        return extra.infomap_clustering(threshold,
+                matrix, taxa=list(range(len(matrix))),
+                revert=True)
+    elif cluster_method == 'mcl':
+        return clustering.mcl(threshold, matrix,
+                taxa = list(range(len(matrix))),
+                max_steps=max_steps,
+                inflation=inflation,
+                expansion=expansion,
+                add_self_loops=add_self_loops,
+                logs=mcl_logs,
+                revert=True)
+    elif cluster_method in ['upgma', 'single', 'complete', 'ward']:
+        return clustering.flat_cluster(cluster_method,
+                threshold, matrix,
+                revert=True)
+    raise ValueError("No suitable cluster method specified.")
+
+
+def _partial_cluster_concept(task):
+    """
+    Compute the distances and the flat clusters for the morphemes of one \
+            concept.
+
+    Notes
+    -----
+    Besides the cluster labels, only the average distances of the morphemes,
+    which are needed for the post-processing, are returned, in order to keep
+    the results of worker processes small.
+    """
+    matrix_task, fclust, threshold, post_processing = task
+    matrix, zeros = _partial_matrix(*matrix_task)
+    c = fclust(threshold, matrix)
+    clusters = [c[i] for i in range(len(matrix))]
+    if not post_processing:
+        return clusters, None, zeros
+    scores = [
+        sum(row[i] for row in matrix) / len(matrix)
+        for i in range(len(matrix))]
+    return clusters, scores, zeros
+
+
 class Partial(LexStat):
     """
     Extended class for automatic detection of partial cognates.
@@ -531,59 +647,42 @@ class Partial(LexStat):
         # get the random distribution
         self._randist = self._get_partial_randist(**kw)
 
-        # get the average gop
-        gop = sum([m[1] for m in kw['modes']]) / len(kw['modes'])
+        self._make_cscorer(**kw)
 
-        # create the new scoring matrix
-        matrix = [[c for c in line] for line in self.bscorer.matrix]
-        char_dict = self.bscorer.chars2int
-
-        for (i, tA), (j, tB) in util.multicombinations2(enumerate(self.cols)):
-            for charA, charB in product(
-                list(self.freqs[tA]) + [util.charstring(i + 1)],
-                list(self.freqs[tB]) + [util.charstring(j + 1)]
+    def _get_partial_task(
+            self,
+            indices,
+            method,
+            scale,
+            factor,
+            restricted_chars,
+            mode,
+            gop,
+            imap_mode,
+            **keywords
             ):
-                exp = self._randist.get(
-                        (tA, tB), {}).get((charA, charB), False)
-                att = self._corrdist.get(
-                        (tA, tB), {}).get((charA, charB), False)
-                # in the following we follow the former lexstat protocol
-                if att <= kw['smooth'] and i != j:
-                    att = False
-
-                if att and exp:
-                    score = np.log2((att ** 2) / (exp ** 2))
-                elif att and not exp:
-                    score = np.log2((att ** 2) / kw['unexpected'])
-                elif exp and not att:
-                    score = kw['unattested']  # XXX gop ???
-                else:  # elif not exp and not att:
-                    score = -90  # ???
-
-                # combine the scores
-                if rcParams['gap_symbol'] not in charA + charB:
-                    sim = self.bscorer[charA, charB]
-                else:
-                    sim = gop
-
-                # get the real score
-                rscore = (kw['ratio'][0] * score + kw['ratio'][1] * sim) \
-                    / sum(kw['ratio'])
-
-                try:
-                    iA = char_dict[charA]
-                    iB = char_dict[charB]
-
-                    # use the vowel scale
-                    if charA[4] in self.vowels and charB[4] in self.vowels:
-                        matrix[iA][iB] = matrix[iB][iA] = kw['vscale'] * rscore
-                    else:
-                        matrix[iA][iB] = matrix[iB][iA] = rscore
-                except:
-                    pass
+        """
+        Collect the data needed to compute the partial distance matrix for the
+        words of one concept with :py:func:`_partial_matrix`.
+        """
+        tracer = []
+        words = []
+        for i, idx in enumerate(indices):
+            # we need the slices for both words, so let's just take the
+            # tokens for this time
+            tokens = self[idx, self._segments]
+
+            # now get the slices with the function
+            slices = _get_slices(tokens, **keywords)
+
+            for j, slc in enumerate(slices):
+                tracer += [(idx, j, slc)]
+                words += [i]
 
-        self.cscorer = misc.ScoreDict(self.chars, matrix)
-        self._meta['scorer']['cscorer'] = self.cscorer
+        data = self._get_alignment_data(
+                [(idx, slice(*slc)) for idx, j, slc in tracer], method, scale,
+                factor, restricted_chars, mode, gop)
+        return tracer, (data, words, imap_mode)
 
     def _get_partial_matrices(
             self,
@@ -614,139 +713,29 @@ class Partial(LexStat):
             split_on_tones=False
         )
         kw.update(keywords)
-        
-        def function(idxA, idxB, sA, sB, **keywords):
-            if method == 'lexstat':
-                args = [
-                        self[idxA, self._numbers][sA[0]:sA[1]],
-                        self[idxB, self._numbers][sB[0]:sB[1]],
-                        [self.cscorer[_charstring(
-                            self[idxB, self._langid]
-                            ), n]
-                            for n in self[idxA, self._numbers][sA[0]:sA[1]]],
-                        [self.cscorer[_charstring(
-                            self[idxA, self._langid]), n]
-                            for n in self[idxB, self._numbers][sB[0]:sB[1]]],
-                        self[idxA, self._prostrings][sA[0]:sA[1]],
-                        self[idxB, self._prostrings][sB[0]:sB[1]],
-                        1,
-                        scale,
-                        factor,
-                        self.cscorer,
-                        mode,
-                        restricted_chars,
-                        1]
-            elif method == 'sca':
-                args = [
-                        [n.split('.', 1)[1] for n in self[idxA,
-                            self._numbers][sA[0]:sA[1]]],
-                        [n.split('.', 1)[1] for n in self[idxB,
-                            self._numbers][sB[0]:sB[1]]],
-                        self[idxA, self._weights][sA[0]:sA[1]],
-                        self[idxB, self._weights][sB[0]:sB[1]],
-                        self[idxA, self._prostrings][sA[0]:sA[1]],
-                        self[idxB, self._prostrings][sB[0]:sB[1]],
-                        gop,
-                        scale,
-                        factor,
-                        self.rscorer,
-                        mode,
-                        restricted_chars,
-                        1]
-            return calign.align_pair(*args)[2]
-        
+
         concepts = [concept] if concept else sorted(self.rows)
-        
-        # we have two basic constraints in the algorithm:
-        # a) set cognacy between morphemes in the same word to zero
-        # b) set cognacy for those parts to zero which are superceded by
-        # another part in all comparisons of two words
-        # essentially, setting things to zero, means setting them to 1, since
-        # we are dealing with distances here
+
         for c in concepts:
-            
             indices = self.get_list(row=c, flat=True)
-            matrix = []
-            tracer = []
-            
-            # first assemble all partial parts
-            trace = defaultdict(list) # stores where the stuff is in the matrix
-            count = 0
-            for idx in indices:
-                
-                # we need the slices for both words, so let's just take the
-                # tokens for this time
-                tokens = self[idx, self._segments]
-                
-                # now get the slices with the function
-                slices = _get_slices(tokens, **kw)
-
-                for i,slc in enumerate(slices):
-                    tracer += [(idx, i, slc)]
-                    trace[idx] += [(i, slc, count)]
-                    count += 1
-            
-            if kw['imap_mode']:
-                # now, iterate for each string pair, asses the scores, and make
-                # sure, we only assign the best of those to the matrix
-
-                matrix = [[0 for i in tracer] for j in tracer]
-                # reset the self-constraints (we missed it before)
-
-
-                for idxA, idxB in combinations(indices, r=2):
-                    # iterate over all parts
-                    scores = []
-                    idxs = []
-                    for i,sliceA,posA in trace[idxA]:
-                        for j,sliceB,posB in trace[idxB]:
-                            d = function(idxA, idxB, sliceA, sliceB)
-                            scores += [d]
-                            idxs += [(posA,posB)]
-                    
-                    visited_seqs = set([])
-                    while scores:
-                        min_score_index = scores.index(min(scores))
-                        min_score = scores.pop(min_score_index)
-                        posA, posB = idxs.pop(min_score_index)
-                        if posA in visited_seqs or posB in visited_seqs:
-                            matrix[posA][posB] = 1
-                            matrix[posB][posA] = 1
-                        else:
-                            matrix[posA][posB] = min_score
-                            matrix[posB][posA] = min_score
-                            visited_seqs.add(posA)
-                            visited_seqs.add(posB)
-                for idx in indices:
-                    for i,(_,sliceA,posA) in enumerate(trace[idx]):
-                        for j,(_,sliceB,posB) in enumerate(trace[idx]):
-
-                            if i < j:
-                                matrix[posA][posB] = 1
-                                matrix[posB][posA] = 1
-            else:
-                matrix = []
-                for (idxA, posA, sliceA), (idxB, posB, sliceB) in combinations(tracer, r=2):
-                    
-                    if idxA == idxB:
-                        d = 1
-                    else:
-                        try:
-                            d = function(idxA, idxB, sliceA, sliceB)
-                        except ZeroDivisionError:
-                            lingpy.log.warning(
-                                "Encountered Zero-Division for the comparison of "
-                                "{0} and {1}".format(
-                                    ''.join(self[idxA, self._tokens]),
-                                    ''.join(self[idxB, self._tokens])))
-                            d = 100
-                    matrix += [d]
-                matrix = lingpy.algorithm.misc.squareform(matrix)
+            tracer, task = self._get_partial_task(
+                    indices, method, scale, factor, restricted_chars, mode,
+                    gop, **kw)
+            matrix, zeros = _partial_matrix(*task)
+            self._partial_zero_division_warnings(tracer, zeros)
             if not concept:
                 yield c, tracer, matrix
             else:
                 yield matrix
 
+    def _partial_zero_division_warnings(self, tracer, zeros):
+        for a, b in zeros:
+            lingpy.log.warning(
+                "Encountered Zero-Division for the comparison of "
+                "{0} and {1}".format(
+                    ''.join(self[tracer[a][0], self._tokens]),
+                    ''.join(self[tracer[b][0], self._tokens])))
+
     def partial_cluster(
             self,
             method='sca',
@@ -803,6 +792,14 @@ class Partial(LexStat):
             Specify the inflation parameter for the use of the MCL algorithm.
         expansion : int (default=2)
             Specify the expansion parameter for the use of the MCL algorithm.
+        processes : int (default=1)
+            The number of processes over which the concepts are distributed.
+            The distances and flat clusters of each concept are computed in
+            the worker processes, so cluster methods passed as
+            "external_function" need to be picklable.
+        executor : :py:class:`concurrent.futures.Executor` (default=None)
+            An executor which is used instead of a new pool of "processes"
+            worker processes.
         
         """
         kw = dict(
@@ -816,7 +813,9 @@ class Partial(LexStat):
                 word_sep=lingpy.settings.rcParams['word_separator'],
                 word_seps=lingpy.settings.rcParams['word_separators'],
                 seps=lingpy.settings.rcParams['morpheme_separators'],
-                mcl_logs=lambda x: -np.log2((1 - x) ** 2)
+                mcl_logs=_mcl_logs,
+                processes=1,
+                executor=None
                 )
         kw.update(keywords)        
 
@@ -828,39 +827,38 @@ class Partial(LexStat):
             method, cluster_method, threshold)
         self._stamp += '# Partial Cluster: ' + self.params['partial_cluster']
 
-        matrices = self._get_partial_matrices(method=method, scale=scale,
-                factor=factor, restricted_chars=restricted_chars, mode=mode,
-                gop=gop, imap_mode=kw['imap_mode'],
-                split_on_tones=split_on_tones)
+        fclust = partial(
+                _partial_flat_cluster, cluster_method,
+                max_steps=kw['max_steps'],
+                inflation=kw['inflation'],
+                expansion=kw['expansion'],
+                add_self_loops=kw['add_self_loops'],
+                mcl_logs=kw['mcl_logs'],
+                external_function=external_function)
+        concepts = sorted(self.rows)
+        tracers, tasks = [], []
+        for concept in concepts:
+            tracer, task = self._get_partial_task(
+                    self.get_list(row=concept, flat=True), method, scale,
+                    factor, restricted_chars, mode, gop, kw['imap_mode'],
+                    split_on_tones=split_on_tones)
+            tracers += [tracer]
+            tasks += [(task, fclust, threshold, kw['post_processing'])]
+        results = util.parallel_map(
+                _partial_cluster_concept, tasks, kw['processes'],
+                kw['executor'])
+
+        # cluster identifiers are assigned in the order of the concepts, so
+        # they do not depend on the number of processes
         k = 0
         C = defaultdict(list) # stores the pcogids
         G = {} # stores the graphs
         with util.pb(desc='PARTIAL SEQUENCE CLUSTERING', total=len(self.rows)) as progress:
-            for concept, trace, matrix in matrices:
+            for concept, trace, (c, scores, zeros) in zip(
+                    concepts, tracers, results):
                 progress.update(1)
                 lingpy.log.info('Analyzing concept {0}...'.format(concept))
-                if external_function:
-                    c = external_function(threshold, matrix,
-                            taxa=list(range(len(matrix))), revert=True)
-                elif cluster_method == 'infomap':
-                    c = extra.infomap_clustering(threshold,
-                            matrix, taxa=list(range(len(matrix))), 
-                            revert=True)
-                elif cluster_method == 'mcl':
-                    c = clustering.mcl(threshold, matrix, 
-                            taxa = list(range(len(matrix))),
-                            max_steps=kw['max_steps'],
-                            inflation=kw['inflation'],
-                            expansion=kw['expansion'],
-                            add_self_loops=kw['add_self_loops'],
-                            logs=kw['mcl_logs'],
-                            revert=True)
-                elif cluster_method in ['upgma', 'single', 'complete', 'ward']:
-                    c = clustering.flat_cluster(cluster_method,
-                            threshold, matrix,
-                            revert=True)
-                else:
-                    raise ValueError("No suitable cluster method specified.")
+                self._partial_zero_division_warnings(trace, zeros)
                 
                 for i, (idx, pos, slc) in enumerate(trace):
                     C[idx] += [c[i] + k]
@@ -875,12 +873,7 @@ class Partial(LexStat):
                             if n1[1] == n2[1]:
                                 # get scores for n1 and n2 with all the rest in
                                 # the matrix to decide for one
-                                sn1, sn2 = 0, 0
-                                for i,row in enumerate(matrix):
-                                    sn1 += matrix[i][n1[0]]
-                                    sn2 += matrix[i][n2[0]]
-                                sn1 = sn1 / len(matrix)
-                                sn2 = sn2 / len(matrix)
+                                sn1, sn2 = scores[n1[0]], scores[n2[0]]
                                 if sn1 <= sn2:
                                     remove_edges += [n2]
                                 else:
@@ -896,7 +889,7 @@ class Partial(LexStat):
                     
                     G[concept] = _g
 
-                k += len(matrix) + 1 
+                k += len(c) + 1 
         self.add_entries(ref or self._partials, C, lambda x: x)
         self.graphs = G
 
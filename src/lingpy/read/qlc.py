@@ -4,7 +4,7 @@ from lingpy.algorithm import misc
 from lingpy.read.phylip import read_dst, read_scorer
 from lingpy.thirdparty import cogent as cg
 from lingpy import log
-from lingpy.util import read_text_file, setdefaults
+from lingpy.util import read_text_file, iter_text_file, setdefaults
 
 def reduce_alignment(alignment):
     """
@@ -219,9 +219,9 @@ def read_msa(infile, comment="#", ids=False, header=True, normalize=True, **keyw
     return _list2msa(msa_lines, header=header, ids=ids, normalize=normalize, **keywords)
 
 
-def read_qlc(infile, comment='#'):
+def iter_qlc(infile, comment='#', meta=None):
     """
-    Simple function that loads qlc-format into a dictionary.
+    Iterate lazily over the rows of a file in qlc-format.
 
     Parameters
     ----------
@@ -230,18 +230,28 @@ def read_qlc(infile, comment='#'):
     comment : str (default="#")
         The comment character. If a line starts with this character, it will be
         ignored.
+    meta : dict (default=None)
+        A dictionary in which the metadata of the file (lines starting with
+        "@" and blocks such as "<json>" or "<msa>") is stored while the file is
+        read.
 
     Returns
     -------
-    d : dict
-        A dictionary with integer keys corresponding to the order of the lines
-        of the input file. The header is given 0 as a specific key.
+    rows : generator
+        A generator of tuples of an integer key and the list of cells of each
+        row, in the order of the lines of the input file. The header is given
+        0 as a specific key and is yielded first.
+
+    Notes
+    -----
+    The file is read in one pass and only the current line or block is held
+    in memory. The metadata is complete once the generator is exhausted.
     """
-    lines = read_text_file(infile, lines=True, normalize="NFC")
-    data, meta, dtype = [], {}, False
+    lines = iter_text_file(infile, normalize="NFC")
+    meta = {} if meta is None else meta
+    header, local_id, i = None, False, 0
 
-    while lines:
-        line = lines.pop(0)
+    for line in lines:
         if line.startswith(comment) or not line:
             continue
 
@@ -265,149 +275,171 @@ def read_qlc(infile, comment='#'):
                         meta[key] = [meta[key]] + [value]
         # line starts with complex stuff
         elif line.startswith('<'):
-            tmp = line[1:line.index('>')]
-            # check for specific keywords
-            if ' ' in tmp:
-                dtype = tmp.split(' ')[0]
-                keys = {k: v[1:-1]
-                        for k, v in [key.split('=') for key in tmp.split(' ')[1:]]}
-            else:
-                dtype = tmp.strip()
-                keys = {}
-
-            tmp = []
-
-            while True:
-                line = lines.pop(0)
-                if line.startswith('</' + dtype + '>'):
-                    break
-                tmp += [line]
-
-            tmp = '\n'.join(tmp)
-
-            # check for data stuff
-            if dtype == "json":
-                tmp = json.loads(tmp)
-                if not keys:
-                    for key in tmp:
-                        meta[key] = tmp[key]
-                elif keys:
-                    meta[keys["id"]] = {}
-                    for k in tmp:
-                        meta[keys["id"]][k] = tmp[k]
-            elif dtype in ['tre', 'nwk']:
-                if "trees" not in meta:
-                    meta["trees"] = {}
-
-                if not keys:
-                    keys["id"] = "1"
-
-                # XXX consider switching to Tree here XXX
-                meta['trees'][keys["id"]] = cg.LoadTree(treestring=tmp)
-            elif dtype in ['csv']:
-                meta[keys["id"]] = {}
-                ncol = int(keys.get('ncol', 2))
-
-                if "dtype" in keys:
-                    transf = eval(keys["dtype"])
-                else:
-                    transf = str
-
-                # split tmp into lines
-                tmp = tmp.split('\n')
-                for l in tmp:
-                    if ncol == 2:
-                        a, b = l.split('\t')
-                        b = transf(b)
-                    else:
-                        l = l.split('\t')
-                        a = l[0]
-                        b = [transf(b) for b in l[1:]]
-                    meta[keys["id"]][a] = b
-            elif dtype == 'msa':
-                tmp = tmp.split('\n')
-                if 'msa' not in meta:
-                    meta['msa'] = {}
-
-                ref = keys.get('ref', 'cogid')
-                if ref not in meta['msa']:
-                    meta['msa'][ref] = {}
-
-                tmp_msa = {}
+            _read_block(line, lines, meta, infile, comment)
+        elif header is None:
+            # check for first line, if a local ID is given in the header (or
+            # simply "ID"), take this line as the ID, otherwise create it
+            header = [l.strip() for l in line.split('\t')]
+            local_id = header[0].lower() in ['id', 'local_id', 'localid']
+            yield 0, [x.lower() for x in (header[1:] if local_id else header)]
+        else:
+            line = [l.strip() for l in line.split('\t')]
+            if local_id:
                 try:
-                    tmp_msa['dataset'] = meta['dataset']
-                except:
-                    tmp_msa['dataset'] = infile.replace('.csv', '')
+                    yield int(line[0]), line[1:]
+                except ValueError as e:  # pragma: no cover
+                    raise Exception("Error processing line {0}:\n".format(i) +
+                                    str(line) + '\nOriginal error message: ' + str(e))
+            else:
+                yield i + 1, line
+            i += 1
 
-                tmp_msa['seq_id'] = keys['id']
+    if header is None:
+        raise ValueError("The file {0} contains no data.".format(infile))
 
-                # add consensus string to msa, if it appears in the keys
-                if "consensus" in keys:
-                    tmp_msa['consensus'] = keys['consensus']
+    if 'trees' in meta and 'tree' not in meta:
+        meta['tree'] = sorted(meta['trees'].items(), key=lambda x: x[0])[0][1]
 
-                msad = []
-                for l in tmp:
-                    if not l.startswith(comment):
-                        msad.append([x.strip().rstrip('.') for x in l.split('\t')])
-                tmp_msa = _list2msa(msad, header=False, ids=True, **tmp_msa)
 
-                try:
-                    meta['msa'][ref][int(keys['id'])] = tmp_msa
-                except ValueError:
-                    meta['msa'][ref][keys['id']] = tmp_msa
-
-            elif dtype == 'dst':
-                taxa, matrix = read_dst(tmp)
-                distances = [[0.0 for _ in matrix] for _ in matrix]
-                for i, line in enumerate(matrix):
-                    for j, cell in enumerate(line):
-                        if i < j:
-                            distances[i][j] = cell
-                            distances[j][i] = cell
-                meta['distances'] = distances
-            elif dtype == 'scorer':
-                scorer = read_scorer(tmp)
-                if 'scorer' not in meta:
-                    meta['scorer'] = {}
-                keys.setdefault('id', 'basic')
-                meta['scorer'][keys['id']] = scorer
-
-            elif dtype == 'taxa':
-                meta['taxa'] = [t.strip() for t in tmp.split('\n')]
-        else:
-            data += [[l.strip() for l in line.split('\t')]]
-
-    # create the dictionary in which the data will be stored
-    d = {}
+def _read_block(line, lines, meta, infile, comment):
+    """
+    Read a block of metadata, such as "<json>" or "<msa>", into the metadata.
+    """
+    tmp = line[1:line.index('>')]
+    # check for specific keywords
+    if ' ' in tmp:
+        dtype = tmp.split(' ')[0]
+        keys = {k: v[1:-1]
+                for k, v in [key.split('=') for key in tmp.split(' ')[1:]]}
+    else:
+        dtype = tmp.strip()
+        keys = {}
 
-    # check for first line, if a local ID is given in the header (or simply
-    # "ID"), take this line as the ID, otherwise create it
-    local_id = data[0][0].lower() in ['id', 'local_id', 'localid']
+    tmp = []
 
-    # iterate over data and fill the dictionary (a bit inefficient, but enough
-    # for the moment)
-    try:
-        i = 1
-        for j, line in enumerate(data[1:]):
-            if local_id:
-                d[int(line[0])] = line[1:]
-            else:
-                d[i] = line
-                i += 1
-    except ValueError as e:  # pragma: no cover
-        raise Exception("Error processing line {0}:\n".format(j) +
-                        str(data[1:][j]) + '\nOriginal error message: ' + str(e))
-
-    # assign the header to d[0]
-    if local_id:
-        d[0] = [x.lower() for x in data[0][1:]]
+    for line in lines:
+        if line.startswith('</' + dtype + '>'):
+            break
+        tmp += [line]
     else:
-        d[0] = [x.lower() for x in data[0]]
+        raise ValueError("Block <{0}> is not closed.".format(dtype))
+
+    tmp = '\n'.join(tmp)
+
+    # check for data stuff
+    if dtype == "json":
+        tmp = json.loads(tmp)
+        if not keys:
+            for key in tmp:
+                meta[key] = tmp[key]
+        elif keys:
+            meta[keys["id"]] = {}
+            for k in tmp:
+                meta[keys["id"]][k] = tmp[k]
+    elif dtype in ['tre', 'nwk']:
+        if "trees" not in meta:
+            meta["trees"] = {}
+
+        if not keys:
+            keys["id"] = "1"
+
+        # XXX consider switching to Tree here XXX
+        meta['trees'][keys["id"]] = cg.LoadTree(treestring=tmp)
+    elif dtype in ['csv']:
+        meta[keys["id"]] = {}
+        ncol = int(keys.get('ncol', 2))
+
+        if "dtype" in keys:
+            transf = eval(keys["dtype"])
+        else:
+            transf = str
+
+        # split tmp into lines
+        tmp = tmp.split('\n')
+        for l in tmp:
+            if ncol == 2:
+                a, b = l.split('\t')
+                b = transf(b)
+            else:
+                l = l.split('\t')
+                a = l[0]
+                b = [transf(b) for b in l[1:]]
+            meta[keys["id"]][a] = b
+    elif dtype == 'msa':
+        tmp = tmp.split('\n')
+        if 'msa' not in meta:
+            meta['msa'] = {}
+
+        ref = keys.get('ref', 'cogid')
+        if ref not in meta['msa']:
+            meta['msa'][ref] = {}
+
+        tmp_msa = {}
+        try:
+            tmp_msa['dataset'] = meta['dataset']
+        except:
+            tmp_msa['dataset'] = infile.replace('.csv', '')
+
+        tmp_msa['seq_id'] = keys['id']
+
+        # add consensus string to msa, if it appears in the keys
+        if "consensus" in keys:
+            tmp_msa['consensus'] = keys['consensus']
+
+        msad = []
+        for l in tmp:
+            if not l.startswith(comment):
+                msad.append([x.strip().rstrip('.') for x in l.split('\t')])
+        tmp_msa = _list2msa(msad, header=False, ids=True, **tmp_msa)
+
+        try:
+            meta['msa'][ref][int(keys['id'])] = tmp_msa
+        except ValueError:
+            meta['msa'][ref][keys['id']] = tmp_msa
+
+    elif dtype == 'dst':
+        taxa, matrix = read_dst(tmp)
+        distances = [[0.0 for _ in matrix] for _ in matrix]
+        for i, line in enumerate(matrix):
+            for j, cell in enumerate(line):
+                if i < j:
+                    distances[i][j] = cell
+                    distances[j][i] = cell
+        meta['distances'] = distances
+    elif dtype == 'scorer':
+        scorer = read_scorer(tmp)
+        if 'scorer' not in meta:
+            meta['scorer'] = {}
+        keys.setdefault('id', 'basic')
+        meta['scorer'][keys['id']] = scorer
+
+    elif dtype == 'taxa':
+        meta['taxa'] = [t.strip() for t in tmp.split('\n')]
 
-    for m in meta:
-        d[m] = meta[m]
 
-    if 'trees' in d and 'tree' not in d:
-        d['tree'] = sorted(d['trees'].items(), key=lambda x: x[0])[0][1]
+def read_qlc(infile, comment='#'):
+    """
+    Simple function that loads qlc-format into a dictionary.
 
+    Parameters
+    ----------
+    infile : str
+        The name of the input file.
+    comment : str (default="#")
+        The comment character. If a line starts with this character, it will be
+        ignored.
+
+    Returns
+    -------
+    d : dict
+        A dictionary with integer keys corresponding to the order of the lines
+        of the input file. The header is given 0 as a specific key.
+
+    See also
+    --------
+    iter_qlc
+    """
+    meta = {}
+    d = dict(iter_qlc(infile, comment=comment, meta=meta))
+    d.update(meta)
     return d
@@ -34,7 +34,9 @@ lexstat = dict(
     lexstat_preprocessing_method='sca',
     lexstat_preprocessing_threshold=0.7,
     lexstat_bad_chars_limit=0.1,
-    lexstat_scoring_threshold=0.7
+    lexstat_scoring_threshold=0.7,
+    lexstat_cache=False,
+    lexstat_cache_size=2 ** 30
 )
 rcParams.update(lexstat)
 
@@ -4,6 +4,7 @@ import random
 import unicodedata
 import logging
 from tempfile import NamedTemporaryFile
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
 import itertools
 import types
@@ -186,6 +187,33 @@ def read_text_file(path, normalize=None, lines=False):
             return _normalize(fp.read())
 
 
+def iter_text_file(path, normalize=None):
+    """
+    Iterate over the lines of a text file encoded in utf-8.
+
+    Parameters
+    ----------
+    path : { Path, str }
+        File-system path of the file.
+    normalize : { None, "NFC", "NFC" }
+        If not `None` a valid unicode normalization mode must be passed.
+
+    Returns
+    -------
+    lines : generator
+        The lines of the file (without the line-separation character), read
+        lazily from the file.
+    """
+    if normalize is not None:
+        _normalize = partial(unicodedata.normalize, normalize)
+    else:
+        _normalize = identity
+
+    with io.open(_str_path(path), "r", encoding="utf-8-sig") as fp:
+        for line in fp:
+            yield _normalize(line.strip("\r\n"))
+
+
 def as_string(obj, pprint=False):
     obj = str(obj)
     if get_level() <= logging.ERROR and pprint:
@@ -218,6 +246,38 @@ def identity(x):
     return x
 
 
+def parallel_map(function, iterable, processes=1, executor=None):
+    """
+    Apply a function to all items of an iterable, optionally in parallel.
+
+    Parameters
+    ----------
+    function : callable
+        The function to apply. When the items are processed in separate
+        processes, the function and the items need to be picklable.
+    iterable : iterable
+        The items to which the function is applied.
+    processes : int (default=1)
+        The number of worker processes. If set to 1, the items are processed
+        in the current process.
+    executor : :py:class:`concurrent.futures.Executor` (default=None)
+        An executor which is used instead of a new process pool.
+
+    Returns
+    -------
+    results : list
+        The results, in the order of the items.
+    """
+    items = list(iterable)
+    if executor is None and (processes or 1) <= 1:
+        return [function(item) for item in items]
+    chunksize = max(1, len(items) // (4 * (processes or 1)))
+    if executor is not None:
+        return list(executor.map(function, items, chunksize=chunksize))
+    with ProcessPoolExecutor(processes) as executor:
+        return list(executor.map(function, items, chunksize=chunksize))
+
+
 def nexus_slug(s):
     """
     Converts a string to a nexus "safe" representation (i.e. removes
@@ -1,11 +1,14 @@
 import os
+import random
 
+import numpy as np
 import pytest
 
 
 from lingpy.algorithm.clustering import best_threshold, check_taxon_names, \
     find_threshold, flat_cluster, link_clustering, matrix2groups, matrix2tree, \
-    neighbor, partition_density, upgma
+    mcl, neighbor, partition_density, partition_densities, upgma, \
+    _link_communities, _prune_matrix
 
 
 @pytest.fixture
@@ -80,9 +83,25 @@ def test_link_clustering(matrix, taxa):
     with pytest.raises(ValueError):
         link_clustering(0.5, matrix, taxa, matrix_type="dummy")
 
+    assert link_clustering(0.5, matrix, taxa) == {
+        1: ['Dutch', 'English', 'German'], 2: ['Icelandic', 'Swedish']}
+    assert link_clustering(0.65, matrix, taxa, link_threshold=0.5) == {
+        1: ['Dutch', 'German', 'Swedish'], 2: ['Icelandic', 'Swedish'],
+        3: ['Dutch', 'English']}
+
+    # a triangle with a tail, whose edges are only linked inside the triangle
+    idxA, idxB = np.array([0, 0, 1, 2, 3]), np.array([1, 2, 2, 3, 4])
+    assert _link_communities(5, idxA, idxB, 0.5).tolist() == [0, 0, 0, 3, 4]
+    assert _link_communities(5, idxA, idxB, False).tolist() == [0] * 5
+
 
 def test_partition_density(matrix):
     partition_density(matrix, 0.5)
+    assert partition_density(matrix, 0.5) == (0.0, 2)
+    assert partition_density(matrix, 0.1) == (0.0, 5)
+    assert partition_density(matrix, 0.65) == pytest.approx((0.1, 1))
+    assert partition_densities(matrix, [0.65, 0.1, 0.5]) == [
+        partition_density(matrix, t) for t in [0.65, 0.1, 0.5]]
 
 
 def test_best_threshold(matrix):
@@ -105,3 +124,128 @@ def test_flat_cluster(matrix, taxa):
         flat_cluster(method, 0.5, matrix, taxa, revert=True)
         flat_cluster(method, 0.5, matrix, taxa, revert=False)
         flat_cluster(method, 0.5, matrix, False, revert=False)
+
+
+def _exhaustive_cluster(method, threshold, matrix):
+    linkage = dict(upgma=np.mean, single=np.min, complete=np.max)[method]
+    clusters = [[i] for i in range(len(matrix))]
+    while len(clusters) > 1:
+        score, i, j = min(
+            (linkage(matrix[np.ix_(clusters[i], clusters[j])]), i, j)
+            for i in range(len(clusters)) for j in range(i + 1, len(clusters)))
+        if score > threshold:
+            break
+        clusters[i] += clusters.pop(j)
+    return sorted(sorted(cluster) for cluster in clusters)
+
+
+def test_flat_cluster_linkage():
+    random.seed(1)
+    for _ in range(30):
+        n = random.randint(2, 20)
+        # distances in steps of 1/16 are summed exactly
+        matrix = np.zeros((n, n))
+        for i in range(n):
+            for j in range(i + 1, n):
+                matrix[i, j] = matrix[j, i] = random.randint(0, 16) / 16
+        for method in ['upgma', 'single', 'complete']:
+            for threshold in [0.25, 0.5, 0.75]:
+                clusters = flat_cluster(method, threshold, matrix)
+                assert sorted(sorted(c) for c in clusters.values()) == \
+                    _exhaustive_cluster(method, threshold, matrix)
+                assert all(key == min(c) for key, c in clusters.items())
+
+    # averages of these distances differ only in the last bit, the lowest of
+    # them is merged first, as in the exhaustive search
+    matrix = [
+        [0.0, 0.5, 0.3, 0.3, 0.5, 0.1, 0.5],
+        [0.5, 0.0, 0.1, 0.1, 0.2, 0.3, 0.1],
+        [0.3, 0.1, 0.0, 0.3, 0.7, 0.1, 0.2],
+        [0.3, 0.1, 0.3, 0.0, 0.2, 0.3, 0.2],
+        [0.5, 0.2, 0.7, 0.2, 0.0, 0.3, 0.7],
+        [0.1, 0.3, 0.1, 0.3, 0.3, 0.0, 0.1],
+        [0.5, 0.1, 0.2, 0.2, 0.7, 0.1, 0.0]]
+    assert flat_cluster('upgma', 0.3, matrix) == {
+        0: [0, 5], 1: [1, 2, 6], 3: [3, 4]}
+
+    # large concepts no longer hit the recursion limit
+    matrix = np.ones((1200, 1200)) - np.eye(1200)
+    assert len(flat_cluster('single', 1.0, matrix)) == 1
+
+
+def test_tree_building(matrix, taxa):
+    assert upgma(matrix, taxa, distances=False) == \
+        '((Swedish,Icelandic),(English,(German,Dutch)));'
+    assert neighbor(matrix, taxa, distances=False) == \
+        '(((German,(Swedish,Icelandic)),Dutch),English);'
+    assert upgma(matrix, taxa) == '((Swedish:0.20,Icelandic:0.20):0.14,' \
+        '(English:0.28,(German:0.10,Dutch:0.10):0.18):0.06);'
+
+    # averages which differ only by rounding are compared as in the
+    # exhaustive search, which takes the lowest of them
+    matrix = [
+        [0.0, 0.7, 0.3, 0.3, 0.2, 0.2, 0.1],
+        [0.7, 0.0, 0.3, 0.7, 0.5, 0.7, 0.1],
+        [0.3, 0.3, 0.0, 0.3, 0.7, 0.7, 0.1],
+        [0.3, 0.7, 0.3, 0.0, 0.5, 0.2, 0.5],
+        [0.2, 0.5, 0.7, 0.5, 0.0, 0.5, 0.2],
+        [0.2, 0.7, 0.7, 0.2, 0.5, 0.0, 0.2],
+        [0.1, 0.1, 0.1, 0.5, 0.2, 0.2, 0.0]]
+    assert upgma(matrix, ['t{0}'.format(i) for i in range(7)]) == \
+        '((t1:0.20,(t4:0.18,(t2:0.10,(t0:0.05,t6:0.05):0.05):0.08):0.02)' \
+        ':0.03,(t3:0.10,t5:0.10):0.13);'
+
+    # large taxon sets no longer hit the recursion limit
+    taxa = ['t{0}'.format(i) for i in range(1200)]
+    matrix = np.random.RandomState(1).rand(1200, 1200)
+    matrix = (matrix + matrix.T) / 2
+    for tree in [upgma(matrix, taxa), neighbor(matrix, taxa)]:
+        assert tree.count('(') == tree.count(')') == 1199
+        assert all(taxon + ':' in tree for taxon in taxa)
+
+
+def _partition(clusters):
+    groups = {}
+    for key, label in clusters.items():
+        groups.setdefault(label, []).append(key)
+    return sorted(groups.values())
+
+
+def test_mcl(matrix, taxa, mocker):
+    csc_matrix = pytest.importorskip('scipy.sparse').csc_matrix
+    assert mcl(0.5, matrix, taxa) == {
+        1: ['German', 'English', 'Dutch'], 2: ['Swedish', 'Icelandic']}
+    assert sorted(mcl(0.5, matrix, taxa, sparse=True).values()) == \
+        sorted(mcl(0.5, matrix, taxa).values())
+    assert mcl(0.5, matrix, taxa, logs=lambda x: 1 - x, revert=True) == \
+        {0: 1, 1: 2, 2: 2, 3: 1, 4: 1}
+
+    labels = np.random.RandomState(1).randint(0, 30, 150)
+    rand = np.random.RandomState(2).rand(150, 150)
+    distances = np.where(labels[:, None] == labels, rand / 2, 0.4 + rand / 2)
+    distances = (distances + distances.T) / 2
+    clusters = _partition(mcl(
+        0.45, distances, list(range(150)), revert=True, sparse=True))
+    assert clusters == _partition(mcl(
+        0.45, distances, list(range(150)), revert=True))
+    assert len(mcl(
+        0.45, distances, list(range(150)), revert=True, sparse=True,
+        max_entries=30)) == 150
+
+    pruned = _prune_matrix(csc_matrix(np.array(
+        [[0.5, 0.1], [0.3, 0.0], [0.2, 1e-6]])), 1e-5, 2).toarray()
+    assert pruned.tolist() == [[0.5, 0.1], [0.3, 0.0], [0.0, 0.0]]
+    pruned = _prune_matrix(csc_matrix(np.array(
+        [[1e-6, 1e-6], [1e-6, 1e-12]])), 1e-5, None).toarray()
+    assert pruned.tolist() == [[1e-6, 1e-6], [1e-6, 0.0]]
+
+    # the entries of large cliques are tiny after the inflation
+    distances = np.full((400, 400), 0.2)
+    np.fill_diagonal(distances, 0)
+    assert set(mcl(
+        0.5, distances, list(range(400)), revert=True, sparse=True).values()) \
+        == {1}
+
+    mocker.patch('lingpy.algorithm.clustering.scipy_sparse', False)
+    with pytest.raises(ValueError):
+        mcl(0.5, matrix, taxa, sparse=True)
@@ -1,6 +1,10 @@
 from unittest import TestCase
 
+import numpy as np
+import pytest
+
 from lingpy.algorithm.cython import _talign, _calign, _malign
+from lingpy.algorithm.cython._misc import ScoreDict
 
 
 class Tests(TestCase):
@@ -399,3 +403,191 @@ class Tests(TestCase):
                                      mode, '1')
             assert corr1[0]['b', 'b'] == 2
             assert corr2[0]['a', 'a'] == 2
+
+    def test__calign_jit(self):
+        _calign_jit = pytest.importorskip(
+            'lingpy.algorithm.cython._calign_jit')
+        scorer = ScoreDict(
+            ['a', 'b', '1'], [[1, -1, -1], [-1, 1, -1], [-1, -1, 1]])
+
+        for score_dict in [self.scorer, scorer]:
+            for name in ['globalign', 'semi_globalign', 'localign']:
+                args = (self.seqA, self.seqB, self.gopA, self.gopB, self.proA,
+                        self.proB, self.m, self.n, self.scale, self.factor,
+                        score_dict)
+                assert getattr(_calign_jit, name)(*args) == \
+                    getattr(_calign, name)(*args)
+                args = (self.seqA2, self.seqB2, self.gopA2, self.gopB2,
+                        self.proA2, self.proB2, len(self.seqA2),
+                        len(self.seqB2), self.scale, self.factor,
+                        score_dict, '1')
+                assert getattr(_calign_jit, 'secondary_' + name)(*args) == \
+                    getattr(_calign, 'secondary_' + name)(*args)
+            args = (self.seqB, self.seqA, self.proB, self.proA, self.n,
+                    self.m, self.scale, self.factor, score_dict)
+            assert _calign_jit.dialign(*args) == _calign.dialign(*args)
+            args = (self.seqA2, self.seqB2, self.proA2, self.proB2,
+                    len(self.seqA2), len(self.seqB2), self.scale, self.factor,
+                    score_dict, '1')
+            assert _calign_jit.secondary_dialign(*args) == \
+                _calign.secondary_dialign(*args)
+
+        # unknown characters receive the default score of the ScoreDict
+        args = (list('abx'), list('ab'), [-1, -1, -1], [-1, -1], 'abc', 'ab',
+                3, 2, self.scale, self.factor, scorer)
+        assert _calign_jit.globalign(*args) == _calign.globalign(*args)
+
+        # scores do not need to be symmetric
+        scorer = ScoreDict(['a', 'b'], [[1, -3], [2, 1]])
+        args = (list('ab'), list('ba'), [-1, -1], [-1, -1], 'aa', 'aa', 2, 2,
+                self.scale, self.factor, scorer)
+        assert _calign_jit.globalign(*args) == _calign.globalign(*args)
+
+        for mode in ['global', 'overlap', 'local', 'dialign']:
+            args = ([[self.seqA2, self.seqB2]],
+                    [[self.weightA2, self.weightB2]],
+                    [[self.proA2, self.proB2]], self.gop, self.scale,
+                    self.factor, self.scorer, mode, '1', 2)
+            assert _calign_jit.align_pairs(*args) == \
+                _calign.align_pairs(*args)
+            args = (0.5, [[self.seqA, self.seqB]],
+                    [[self.weightA, self.weightB]], [[self.proA, self.proB]],
+                    self.gop, self.scale, self.factor, self.scorer, mode, '1')
+            assert _calign_jit.corrdist(*args) == _calign.corrdist(*args)
+
+    def test_align_batch(self):
+        scorer = ScoreDict(
+            ['a', 'b', '1'], [[1, -1, -1], [-1, 1, -1], [-1, -1, 1]])
+        seqs = [self.seqA2, self.seqB2, ['b', 'a']]
+        gops = [self.weightA2, self.weightB2, [-1, -1]]
+        pros = [self.proA2, self.proB2, 'CV']
+        pairs = [(0, 1), (1, 2), (2, 0)]
+
+        def pad(rows, fill=0):
+            out = np.full((len(rows), max(len(r) for r in rows)), fill)
+            for i, row in enumerate(rows):
+                out[i, :len(row)] = row
+            return out
+
+        codes = [scorer.encode(seq) for seq in seqs]
+        args = [pad([codes[i] for i, j in pairs]),
+                pad([codes[j] for i, j in pairs]),
+                np.array([len(seqs[i]) for i, j in pairs]),
+                np.array([len(seqs[j]) for i, j in pairs]),
+                pad([gops[i] for i, j in pairs], 0.0),
+                pad([gops[j] for i, j in pairs], 0.0),
+                pad([[ord(c) for c in pros[i]] for i, j in pairs]),
+                pad([[ord(c) for c in pros[j]] for i, j in pairs]),
+                self.gop, self.scale, self.factor, scorer.array]
+        modules = [_calign]
+        try:
+            from lingpy.algorithm.cython import _calign_jit
+            modules += [_calign_jit]
+        except ImportError:
+            pass
+
+        for module in modules:
+            for mode in ['global', 'overlap', 'local', 'dialign']:
+                sims, dists, alms = module.align_batch(
+                    *args + [mode, '1'], alignments=True)
+                for k, (i, j) in enumerate(pairs):
+                    almA, almB, sim = _calign.align_pair(
+                        seqs[i], seqs[j], gops[i], gops[j], pros[i], pros[j],
+                        self.gop, self.scale, self.factor, scorer, mode, '1',
+                        0)
+                    assert sims[k] == sim
+                    assert dists[k] == _calign.align_pair(
+                        seqs[i], seqs[j], gops[i], gops[j], pros[i], pros[j],
+                        self.gop, self.scale, self.factor, scorer, mode, '1',
+                        1)[2]
+                    if mode == 'local':
+                        almA, almB = almA[1], almB[1]
+                    assert len(alms[k][0]) == len(almA)
+                    assert [x == -1 for x in alms[k][0]] == \
+                        [x == '-' for x in almA]
+                    assert [x == -1 for x in alms[k][1]] == \
+                        [x == '-' for x in almB]
+            with pytest.raises(ValueError):
+                module.align_batch(*args + ['pairwise', '1'])
+
+    def test_align_batch_score_only(self):
+        scorer = ScoreDict(
+            ['a', 'b', 'c', '1'],
+            [[2, -1, 0, -1], [-1, 2, -1, -1], [0, -1, 2, -1], [-1, -1, -1, 1]])
+        rng = np.random.RandomState(1)
+        seqs = [list(rng.choice(['a', 'b', 'c'], rng.randint(1, 9)))
+                for i in range(20)]
+        seqs[3][len(seqs[3]) // 2] = '1'
+        pros = [''.join('1' if x == '1' else 'CVc'[k % 3] for k, x in
+                        enumerate(seq)) for seq in seqs]
+        idxA, idxB = np.triu_indices(len(seqs), 1)
+        lengths = np.array([len(seq) for seq in seqs])
+        codes = np.full((len(seqs), lengths.max()), 4)
+        prostrings = np.zeros((len(seqs), lengths.max()), dtype=int)
+        gops = np.zeros((len(seqs), lengths.max()))
+        for i, seq in enumerate(seqs):
+            codes[i, :len(seq)] = scorer.encode(seq)
+            prostrings[i, :len(seq)] = [ord(c) for c in pros[i]]
+            gops[i, :len(seq)] = rng.uniform(0.5, 1.5, len(seq))
+        args = [codes[idxA], codes[idxB], lengths[idxA], lengths[idxB],
+                gops[idxA], gops[idxB], prostrings[idxA], prostrings[idxB],
+                -2, 0.5, 0.3, scorer.array]
+        modules = [_calign]
+        try:
+            from lingpy.algorithm.cython import _calign_jit
+            modules += [_calign_jit]
+        except ImportError:
+            pass
+
+        for module in modules:
+            for mode in ['global', 'overlap']:
+                sims, dists, alms = module.align_batch(
+                    *args + [mode, '1'], alignments=True)
+                fsims, fdists = module.align_batch(*args + [mode, '1'])
+                assert np.allclose(sims, fsims)
+                assert np.allclose(dists, fdists)
+
+                # a band wide enough for all pairs does not change anything
+                bsims, bdists = module.align_batch(
+                    *args + [mode, '1'], band=10)
+                assert np.allclose(sims, bsims)
+                # narrow bands can only lower the similarity
+                bsims, bdists = module.align_batch(
+                    *args + [mode, '1'], band=0)
+                assert (bsims <= sims + 1e-6).all()
+
+                cdists = module.align_batch(
+                    *args + [mode, '1'], cutoff=0.4)[1]
+                below = dists <= 0.4
+                assert np.allclose(cdists[below], dists[below])
+                assert (cdists[~below] > 0.4).all()
+                assert (cdists[~below] <= dists[~below] + 1e-6).all()
+
+            simsA = module.self_scores(args[0], args[2], 0.3, scorer.array)
+            simsB = module.self_scores(args[1], args[3], 0.3, scorer.array)
+            assert simsA.tolist() == [
+                sum([1.3 * scorer[x, x] for x in seqs[i]]) for i in idxA]
+            for mode in ['global', 'overlap', 'local', 'dialign']:
+                assert (module.align_batch(*args + [mode, '1'])[1]
+                        == module.align_batch(*args + [mode, '1'], simsA=simsA,
+                                              simsB=simsB)[1]).all()
+                assert (module.align_batch(
+                    *args + [mode, '1'], simsA=simsA * 2,
+                    simsB=simsB * 2)[1] != dists).any()
+
+            with pytest.raises(ValueError):
+                module.align_batch(*args + ['local', '1'], band=2)
+            with pytest.raises(ValueError):
+                module.align_batch(
+                    *args + ['global', '1'], alignments=True, cutoff=0.5)
+
+    def test_score_dict_lookup(self):
+        scorer = ScoreDict(['a', 'b'], [[1, -3], [2, 1]])
+        idxA = np.array(scorer.encode('abX'))
+        idxB = np.array(scorer.encode('ba'))
+        scores = scorer.lookup(idxA[:, None], idxB[None, :])
+        assert scores.tolist() == [
+            [scorer[a, b] for b in 'ba'] for a in 'abX']
+        assert scorer.lookup(idxA, idxA).tolist() == [1, 1, -22.5]
+        scorer['a', 'b'] = 0
+        assert scorer.lookup(0, 1) == 0
@@ -6,27 +6,19 @@ from lingpy.algorithm.extra import *
 @pytest.fixture
 def Igraph(mocker):
     class Components:
-        def __init__(self, nodes):
-            self.vs = nodes
-
-        def subgraphs(self):
-            return [Igraph_.Graph([v['name']]) for v in self.vs]
+        def __init__(self, n):
+            self.membership = list(range(n))
 
     class Igraph_(mocker.MagicMock):
         pass
 
         class Graph:
-            def __init__(self, vs=[]):
-                self.vs = [{'name': v} for v in vs]
-
-            def add_edge(self, a, b):
-                pass
-
-            def add_vertex(self, vertex):
-                self.vs += [{'name': vertex}]
+            def __init__(self, n=0, edges=()):
+                self.n = n
+                self.edges = list(edges)
 
             def community_infomap(self, *args, **kw):
-                return Components(self.vs)
+                return Components(self.n)
 
     return Igraph_()
 
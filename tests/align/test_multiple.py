@@ -4,6 +4,8 @@ Testing multiple module.
 import pytest
 
 from lingpy.align import Multiple, mult_align
+from lingpy.align.multiple import _score_columns
+from lingpy.algorithm import calign, talign
 
 
 @pytest.fixture
@@ -41,6 +43,18 @@ def test_lib_align(msa):
     assert msa.alm_matrix[0] == list('w-aldemar-')
 
 
+def test_library(msa, seqs):
+    msa.lib_align()
+    assert msa._library.shape == (25, 25)
+    assert (msa._library == msa._library.T).all()
+    assert msa.library['1.1', '2.1'] == msa._library[0, 8]
+    assert msa.library['1.1', '2.1'] > msa.library['1.1', '2.2']
+
+    msa = Multiple(seqs * 20, unique_seqs=False)
+    msa.lib_align()
+    assert msa.alm_matrix[-3] == list('w-aldemar-')
+
+
 def test_get_pid(msa):
     msa.prog_align()
     pid = int(msa.get_pid() * 100)
@@ -92,6 +106,42 @@ def test_iterate_clusters(msa):
     assert first == secnd
 
 
+def test_memo(msa):
+    msa.prog_align()
+    profiles = len(msa._profiles)
+    assert profiles == 2
+    msa.iterate_all_sequences()
+    profiles = len(msa._profiles)
+    msa.iterate_all_sequences()
+    assert len(msa._profiles) == profiles
+
+    sop = msa.sum_of_pairs()
+    columns = len(msa._columns)
+    assert msa.sum_of_pairs() == sop and len(msa._columns) == columns
+    msa.swap_check(score_mode='classes')
+    assert len(msa._columns) > columns
+    msa.prog_align(model='dolgo')
+    assert len(msa._profiles) == 2
+
+    msa.lib_align()
+    assert list(msa._self_scores) == [0.3]
+    msa._set_scorer('classes')
+    assert msa._self_scores == {}
+
+
+def test_score_columns(msa):
+    msa.prog_align()
+    alm = msa._alm_matrix
+    for i, column in enumerate(zip(*alm)):
+        column = list(column)
+        for gap_weight in [0.0, 0.3, 1.0]:
+            assert _score_columns(alm, msa.scorer, gap_weight)[i] == \
+                calign.score_profile(column, column, msa.scorer, gap_weight)
+            assert _score_columns(alm, msa.scorer, gap_weight, -2)[i] == \
+                talign.score_profile(column, column, msa.scorer, -2, gap_weight)
+    assert msa.get_peaks() == _score_columns(alm, msa.scorer)
+
+
 def test_sum_of_pairs(msa):
     msa.prog_align()
     assert 8 > msa.sum_of_pairs() > 7
@@ -71,3 +71,15 @@ def test_turchin():
 
 def test_editdist():
     assert edit_dist('waldemar', 'vladimir', restriction="cv") == 5
+
+
+def test_align_scores():
+    pairs = Pairwise([('waldemar', 'vladimir'), ('mama', 'papa'), ('a', 'x')])
+    for mode in ['global', 'overlap', 'local', 'dialign']:
+        for distance in [True, False]:
+            pairs.align(mode=mode, distance=distance)
+            scores = pairs(mode=mode, distance=distance, alignments=False)
+            assert scores == pytest.approx(
+                [sim for almA, almB, sim in pairs.alignments])
+    scores = pairs(distance=True, alignments=False, cutoff=0.1, band=1)
+    assert all(score > 0.1 for score in scores)
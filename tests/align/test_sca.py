@@ -134,3 +134,75 @@ def test_partial_alignments_with_lexstat(test_data):
             ref='cogids', sonar=True, segments='tokens')
     alms.align(scorer=lex.bscorer)
     assert '-' in alms.msa['cogids'][12]['alignment'][-1]
+
+
+def test_align_processes(test_data):
+    alms = Alignments(str(test_data / 'KSL.qlc'), ref='cogid')
+    alms.align(method='library')
+    alms2 = Alignments(str(test_data / 'KSL.qlc'), ref='cogid')
+    alms2.align(method='library', processes=2)
+    assert [alms[idx, 'alignment'] for idx in alms] == \
+        [alms2[idx, 'alignment'] for idx in alms2]
+    assert alms.msa['cogid'][1]['stamp'] == alms2.msa['cogid'][1]['stamp']
+
+
+def test_align_changed_numbers(test_data, tmp_path):
+    lex = lp.LexStat(str(test_data / 'KSL.qlc'))
+    lex.output('tsv', filename=str(tmp_path / 'ksl'), ignore='all')
+    alms = Alignments(str(tmp_path / 'ksl.tsv'), ref='cogid')
+    alms.align(scoredict=lex.bscorer)
+    key = sorted(alms.msa['cogid'])[0]
+    idx = alms.msa['cogid'][key]['ID'][0]
+    alms[idx, 'tokens'] = alms[idx, 'tokens'] + ['p']
+    alms.align(scoredict=lex.bscorer)
+    assert alms[idx, 'numbers'][:-1] == lex[idx, 'numbers']
+    assert alms[idx, 'numbers'][-1].split('.')[1] == 'P'
+    assert alms.msa['cogid'][key]['alignment'][0][-1] == 'p'
+
+
+def test_align_incremental(test_data, tmp_path):
+    alms = Alignments(str(test_data / 'KSL.qlc'), ref='cogid')
+    alms.align()
+    fingerprints = dict(alms._meta['msa_fingerprints']['cogid'])
+    assert len(fingerprints) == len(alms.msa['cogid'])
+
+    alms.output('tsv', filename=str(tmp_path / 'ksl'), ignore=[])
+    alms2 = Alignments(str(tmp_path / 'ksl.tsv'), ref='cogid')
+    assert alms2._meta['msa_fingerprints']['cogid'] == fingerprints
+
+    # unchanged cognate sets are kept, changed ones are aligned again
+    a, b = sorted(alms2.msa['cogid'])[:2]
+    for key in [a, b]:
+        alms2.msa['cogid'][key]['alignment'] = [
+            ['x'] for _ in alms2.msa['cogid'][key]['ID']]
+    idx = alms2.msa['cogid'][b]['ID'][0]
+    alms2[idx, 'tokens'] = alms2[idx, 'tokens'] + ['a']
+    alms2.align()
+    assert alms2.msa['cogid'][a]['alignment'][0] == ['x']
+    row = alms2.msa['cogid'][b]['ID'].index(idx)
+    assert [t for t in alms2.msa['cogid'][b]['alignment'][row] if t != '-'] \
+        == list(alms2[idx, 'tokens'])
+    assert alms2.msa['cogid'][b]['seqs'][row][-1] == 'a'
+    assert alms2._meta['msa_fingerprints']['cogid'][str(b)] != \
+        fingerprints[str(b)]
+    alms2.align(force=True)
+    assert alms2.msa['cogid'][a]['alignment'] == alms.msa['cogid'][a]['alignment']
+    alms2.align(model='dolgo')
+    assert alms2._meta['msa_fingerprints']['cogid'][str(a)] != \
+        fingerprints[str(a)]
+
+    # parameters are compared without rounding
+    alms2.align(factor=0.3)
+    fingerprints = dict(alms2._meta['msa_fingerprints']['cogid'])
+    alms2.align(factor=0.32)
+    assert alms2._meta['msa_fingerprints']['cogid'][str(a)] != \
+        fingerprints[str(a)]
+
+    # without a scorer, the second run keeps the cognate sets of the first
+    alms2.align(scoredict=False)
+    fingerprints = dict(alms2._meta['msa_fingerprints']['cogid'])
+    alms2.msa['cogid'][a]['alignment'] = [
+        ['x'] for _ in alms2.msa['cogid'][a]['ID']]
+    alms2.align(scoredict=False)
+    assert alms2.msa['cogid'][a]['alignment'][0] == ['x']
+    assert alms2._meta['msa_fingerprints']['cogid'] == fingerprints
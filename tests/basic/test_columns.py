@@ -0,0 +1,116 @@
+import pickle
+
+import pytest
+
+from lingpy import Wordlist, LexStat
+from lingpy.basictypes import lists, strings
+from lingpy.basic.columns import ColumnStore, write_columns, read_columns
+
+
+@pytest.fixture
+def store():
+    return ColumnStore({
+        1: ['a', 1, 0.5, lists('a b + c'), strings('a b'), ['x', 'y'], [1]],
+        2: ['b', 2, 1.5, lists('c'), strings(''), [], [2, 3]]})
+
+
+def test_store(store):
+    assert len(store) == 2
+    assert list(store) == [1, 2]
+    assert store[1] == ['a', 1, 0.5, ['a', 'b', '+', 'c'], ['a', 'b'],
+                        ['x', 'y'], [1]]
+    assert store[1][-1] == [1]
+    assert store[2][1:3] == [2, 1.5]
+    assert isinstance(store[1][1], int)
+    assert isinstance(store[1][3], lists)
+    assert store[1][3].n == [['a', 'b'], ['c']]
+    assert isinstance(store[1][4], type(strings('')))
+    with pytest.raises(IndexError):
+        store[1][7]
+    with pytest.raises(KeyError):
+        store[3]
+
+    store[1][0] = 'c'
+    store[1][3] = lists('d')
+    store[2][1] = 'x'
+    assert store[1][0] == 'c'
+    assert store[1][3] == ['d']
+    assert store[2][1] == 'x' and store[1][1] == 1
+
+    for key in store:
+        store[key].append(key * 2)
+    assert [store[key][-1] for key in store] == [2, 4]
+    store[3] = ['c', 3, 2.5, lists('d'), strings('d'), ['z'], [], 6]
+    assert store[3] + [7] == ['c', 3, 2.5, ['d'], ['d'], ['z'], [], 6, 7]
+    del store[3]
+    assert 3 not in store
+    assert pickle.loads(pickle.dumps(store))[2] == store[2]
+
+
+def test_wordlist(test_data):
+    wl = Wordlist(str(test_data / 'KSL.qlc'))
+    wlc = Wordlist(str(test_data / 'KSL.qlc'), columnar=True)
+    assert isinstance(wlc._data, ColumnStore)
+    assert all(wl[idx] == wlc[idx] for idx in wl)
+    assert ['x'] + wlc[1] == ['x'] + wl[1]
+    assert wlc[1] + ['x'] == wl[1] + ['x']
+    assert wl.get_dict(col='German', entry='tokens') == \
+        wlc.get_dict(col='German', entry='tokens')
+    assert wl.get_etymdict(ref='cogid') == wlc.get_etymdict(ref='cogid')
+
+    wlc.add_entries('tokens2', 'tokens', lambda x: list(x) + ['a'])
+    wlc.add_entries('cogid', 'cogid', lambda x: x + 1, override=True)
+    assert all(wlc[idx, 'tokens2'][-1] == 'a' for idx in wlc)
+    assert all(wl[idx, 'cogid'] + 1 == wlc[idx, 'cogid'] for idx in wl)
+
+
+def test_lexstat(test_data):
+    lex = LexStat(str(test_data / 'KSL.qlc'))
+    lexc = LexStat(str(test_data / 'KSL.qlc'), columnar=True)
+    assert all(lex[idx] == lexc[idx] for idx in lex)
+    assert lex.pairs == lexc.pairs
+    lex.cluster(method='sca', threshold=0.45)
+    lexc.cluster(method='sca', threshold=0.45)
+    assert [lex[idx, 'scaid'] for idx in lex] == \
+        [lexc[idx, 'scaid'] for idx in lexc]
+
+
+def test_write_columns(store, tmp_path):
+    del store[1]
+    store[2][0] = 'x'
+    store[3] = ['c', 3, 2.5, lists('d'), strings('d'), ['z'], [], 'a']
+    write_columns(str(tmp_path / 'test'), store, list('abcdefgh'), {'x': 1})
+    data, header, meta = read_columns(str(tmp_path / 'test'))
+    assert header == list('abcdefgh') and meta == {'x': 1}
+    assert list(data) == [2, 3]
+    assert data[2] == store[2] and data[3] == store[3]
+    assert data[2][3].n == [['c']]
+
+    data, _, _ = read_columns(str(tmp_path / 'test'))
+    assert data[3][1] == 3
+    assert [column._column is None for column in data._columns] == [
+        True, False, True, True, True, True, True, True]
+    data[3][1] = 4
+    copy = pickle.loads(pickle.dumps(data))
+    assert [column._column is None for column in copy._columns] == [
+        True, False, True, True, True, True, True, True]
+    assert copy[3] == data[3]
+    assert read_columns(str(tmp_path / 'test'))[0][3][1] == 3
+
+    write_columns(str(tmp_path / 'dict'), {1: ['a', 1]}, ['a', 'b'])
+    assert read_columns(str(tmp_path / 'dict'))[0][1] == ['a', 1]
+    (tmp_path / 'dict' / 'wordlist.json').write_text('{}', encoding='utf8')
+    with pytest.raises(ValueError):
+        read_columns(str(tmp_path / 'dict'))
+
+
+def test_wordlist_bin(test_data, tmp_path):
+    lex = LexStat(str(test_data / 'KSL.qlc'))
+    lex.output('bin', filename=str(tmp_path / 'ksl'))
+    wl = Wordlist(str(tmp_path / 'ksl.bin'))
+    assert isinstance(wl._data, ColumnStore)
+    assert wl.cols == lex.cols and wl.rows == lex.rows
+    assert wl.get_etymdict(ref='cogid') == lex.get_etymdict(ref='cogid')
+    lex2 = LexStat(str(tmp_path / 'ksl.bin'))
+    assert all(lex[idx] == lex2[idx] for idx in lex)
+    assert lex2.pairs == lex.pairs
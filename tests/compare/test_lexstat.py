@@ -1,11 +1,16 @@
 import os
+import random
 import pathlib
 
+import numpy as np
 import pytest
 from clldutils import jsonlib
 
-from lingpy import LexStat, rc
-from lingpy.compare.lexstat import char_from_charstring, get_score_dict
+from lingpy import LexStat, Wordlist, rc, util
+from lingpy.compare.lexstat import (
+    char_from_charstring, get_score_dict, _qgram_candidates)
+from lingpy.algorithm.cython._misc import ScoreDict
+from lingpy.sequence.ngrams import get_n_ngrams
 
 
 def test_char_from_charstring():
@@ -21,6 +26,15 @@ def test_get_score_dict():
     sd = get_score_dict(chars, model)
     assert sd['A', 'B'] == -22.5
 
+    chars = ["1.A.C", "1.E.V", "2.A.C", "2.I.V"]
+    sd = get_score_dict(chars, model)
+    assert all(sd[a, b] == sd[b, a] == model(a[2], b[2])
+               for a in chars for b in chars if a <= b)
+    sd['1.A.C', '2.A.C'] = 100
+    sd2 = get_score_dict(chars + ["3.A.C"], model, sd)
+    assert sd2['1.A.C', '2.A.C'] == sd2['2.A.C', '1.A.C'] == 100
+    assert sd2['3.A.C', '2.A.C'] == model('A', 'A')
+
 
 @pytest.fixture
 def lextstat_factory(tmp_path):
@@ -128,11 +142,97 @@ def test_get_scorer(lex, mocker, get_scorer_kw, log):
     lex.get_scorer(method='markov', **get_scorer_kw)
 
 
+def test_get_scorer_cache(lextstat_factory, test_data, get_scorer_kw, mocker,
+                          tmp_path):
+    mocker.patch('lingpy.cache.DIR', tmp_path)
+    lex = lextstat_factory(str(test_data / 'KSL.qlc'))
+    lex.get_scorer(cache=True, **get_scorer_kw)
+    assert len(list((tmp_path / 'scorers').glob('*.pkl'))) == 1
+
+    lex2 = lextstat_factory(str(test_data / 'KSL.qlc'))
+    mocker.spy(lex2, '_get_corrdist')
+    lex2.get_scorer(cache=True, **get_scorer_kw)
+    assert not lex2._get_corrdist.called
+    assert lex2.cscorer.matrix == lex.cscorer.matrix
+    assert lex2._included == lex._included
+
+    # different parameters and data yield different scorers
+    lex2.get_scorer(cache=True, force=True, ratio=(1, 1), **get_scorer_kw)
+    assert lex2._get_corrdist.called
+    lex3 = lextstat_factory(str(test_data / 'KSL.qlc'))
+    lex3.add_entries('numbers', 'numbers', lambda x: x[:-1] if len(x) > 1
+                     else x, override=True)
+    lex3.get_scorer(cache=True, **get_scorer_kw)
+    assert len(list((tmp_path / 'scorers').glob('*.pkl'))) == 3
+
+    # models of the same name with different scores yield different scorers
+    lex4 = lextstat_factory(str(test_data / 'KSL.qlc'))
+    lex4.bscorer = ScoreDict(
+        list(lex4.bscorer.chars2int),
+        [[2 * score for score in row] for row in lex4.bscorer.matrix])
+    mocker.spy(lex4, '_get_corrdist')
+    lex4.get_scorer(cache=True, **get_scorer_kw)
+    assert lex4._get_corrdist.called
+    assert len(list((tmp_path / 'scorers').glob('*.pkl'))) == 4
+
+    lex3.get_scorer(cache=True, force=True, cache_size=0, **get_scorer_kw)
+    assert not list((tmp_path / 'scorers').glob('*.pkl'))
+
+
+@pytest.mark.parametrize('method', ['shuffle', 'markov'])
+def test_get_scorer_processes(lextstat_factory, test_data, get_scorer_kw,
+                              method):
+    matrices = []
+    for processes in [1, 2]:
+        lex = lextstat_factory(str(test_data / 'KSL.qlc'))
+        random.seed(1234)
+        lex.get_scorer(method=method, processes=processes, **get_scorer_kw)
+        matrices.append(lex.cscorer.matrix)
+    assert matrices[0] == matrices[1]
+
+
+def test_add_doculect(lextstat_factory, test_data, get_scorer_kw, mocker):
+    full = lextstat_factory(str(test_data / 'KSL.qlc'))
+    wl = Wordlist(str(test_data / 'KSL.qlc'))
+    old, new = {0: wl.columns}, {0: wl.columns}
+    for idx in wl:
+        if wl[idx, 'doculect'] == wl.cols[-1]:
+            new[idx] = wl[idx]
+        else:
+            old[idx] = wl[idx]
+    lex = lextstat_factory(old)
+    lex.get_scorer(preprocessing=True, **get_scorer_kw)
+    corrdist = dict(lex._corrdist)
+    lex.add_doculect(new)
+    with pytest.raises(ValueError):
+        lex.add_doculect(new)
+    assert lex.cols == full.cols
+    assert len(lex) == len(full)
+    assert lex.chars == full.chars
+    assert lex.bscorer.matrix == full.bscorer.matrix
+    assert sorted(lex.pairs) == sorted(full.pairs)
+
+    mocker.spy(lex, '_get_corrdist')
+    lex.update_scorer()
+    assert all(lex._corrdist[key] is corrdist[key] for key in corrdist)
+    assert len(lex._get_corrdist.call_args[1]['taxa']) == len(lex.cols)
+    assert len(lex.cscorer.matrix) == len(lex.chars)
+    lex.cluster(method='lexstat', threshold=0.6)
+
+
 def test_cluster(lex, mocker, get_scorer_kw):
     lex.get_scorer(**get_scorer_kw)
     lex.cluster(method="lexstat", threshold=0.7)
     lex.cluster(method="edit-dist", threshold=0.7)
     lex.cluster(method="turchin", threshold=0.7)
+    lex.cluster(method="sca", threshold=0.5, cluster_method='mcl', ref='mcl')
+    lex.cluster(method="sca", threshold=0.5, cluster_method='mcl',
+                mcl_sparse=True, ref='sparse')
+    # items which the dense iteration leaves as residual attractors are
+    # joined to their clusters in sparse mode
+    assert all(lex[idx, 'sparse'] for idx in lex)
+    assert len(set(lex[idx, 'sparse'] for idx in lex)) <= \
+        len(set(lex[idx, 'mcl'] for idx in lex))
     with pytest.raises(ValueError):
         lex.cluster(method="fuzzy")
     mocker.patch('lingpy.basic.parser.confirm', mocker.Mock(return_value=True))
@@ -140,6 +240,16 @@ def test_cluster(lex, mocker, get_scorer_kw):
     assert all(x in lex.header for x in 'scaid lexstatid editid turchinid'.split())
 
 
+def test_cluster_processes(lex, get_scorer_kw):
+    lex.get_scorer(**get_scorer_kw)
+    for method in ['lexstat', 'edit-dist']:
+        lex.cluster(method=method, threshold=0.5, ref=method + '1')
+        lex.cluster(method=method, threshold=0.5, ref=method + '2',
+                    processes=2)
+        assert [lex[idx, method + '1'] for idx in lex] == \
+            [lex[idx, method + '2'] for idx in lex]
+
+
 def test_align_pairs(lex):
     assert not lex.align_pairs('English', 'German', method='sca', pprint=False)
     assert lex.align_pairs(1, 2, method='sca', pprint=False)[-1] > 0.5
@@ -153,6 +263,21 @@ def test__get_matrices(lex):
     assert matrix[0][1] == 1
 
 
+def test__get_matrices_batch(lex, get_scorer_kw):
+    lex.get_scorer(**get_scorer_kw)
+    for method in ['sca', 'lexstat']:
+        for mode in ['global', 'overlap', 'local', 'dialign']:
+            function = lex._distance_method(
+                method, scale=0.5, factor=0.3, restricted_chars='_T',
+                mode=mode, gop=-2)
+            indices = lex.get_list(row="hand", flat=True)
+            matrix = list(lex._get_matrices(
+                concept="hand", method=method, mode=mode))[0]
+            for i, idxA in enumerate(indices):
+                for j, idxB in enumerate(indices[i + 1:], i + 1):
+                    assert matrix[i][j] == function(idxA, idxB)
+
+
 def test_get_subset(test_data, lex):
     lex.get_subset([])
     assert [v for v in lex.subsets.values() if v] == []
@@ -167,6 +292,118 @@ def test_get_distances(lex, get_scorer_kw):
     lex.get_distances()
     lex.get_distances(method='edit-dist')
     lex.get_distances(aggregate=False)
+    for method in ['sca', 'lexstat']:
+        function = lex._align_method(
+            method, return_distance=True, mode='overlap', scale=0.5,
+            factor=0.3, gop=-2)
+        distances = [
+            [function(pA, pB) for pA, pB in lex.pairs[taxA, taxB]]
+            for taxA, taxB in util.combinations2(lex.cols)]
+        assert np.allclose(
+            lex.get_distances(method=method, aggregate=False),
+            sorted(d for dists in distances for d in dists))
+    lex.get_distances(band=1)
+
+
+def test_self_scores(lex, get_scorer_kw):
+    lex.get_scorer(**get_scorer_kw)
+    scorer, cache = lex._self_scores['bscorer']
+    assert scorer is lex.bscorer and cache
+    matrix = list(lex._get_matrices(concept="hand", method='lexstat'))[0]
+    indices = lex.get_list(row="hand", flat=True)
+    scorer, cache = lex._self_scores['cscorer']
+    for idx in indices:
+        assert cache[0.3, idx, None, None] == pytest.approx(sum(
+            1.3 * lex.cscorer[n, n] for n in lex[idx, lex._numbers]))
+    lex.cscorer = ScoreDict(
+        sorted(lex.cscorer.chars2int, key=lex.cscorer.chars2int.get),
+        lex.cscorer.matrix)
+    assert lex._self_scores['cscorer'][0] is not lex.cscorer
+    assert list(lex._get_matrices(
+        concept="hand", method='lexstat'))[0] == matrix
+    assert lex._self_scores['cscorer'][0] is lex.cscorer
+
+
+def test_cluster_prefilter(lex, get_scorer_kw):
+    lex.get_scorer(**get_scorer_kw)
+    lex.cluster(method='lexstat', threshold=0.5, ref='full')
+    lex.cluster(method='lexstat', threshold=0.5, ref='dice', prefilter='dice')
+    assert lex._meta['prefiltered'] > 0
+    lex.cluster(method='lexstat', threshold=0.5, ref='none',
+                prefilter=lambda a, b: 0.0)
+    assert lex._meta['prefiltered'] == 0
+    assert [lex[idx, 'full'] for idx in lex] == \
+        [lex[idx, 'none'] for idx in lex]
+
+    full = list(lex._get_matrices(concept="hand", method='sca'))[0]
+    matrix = list(lex._get_matrices(
+        concept="hand", method='sca', prefilter='xdice',
+        prefilter_threshold=0.5))[0]
+    for row, full_row in zip(matrix, full):
+        for d, full_d in zip(row, full_row):
+            assert d in (full_d, 1.0)
+
+
+def test_qgram_candidates():
+    seqs = ['TAKA', 'TAKI', 'PURU', 'TAK', 'PURI', 'M']
+    groups = [0, 1, 0, 1, 1, 0]
+    idxA, idxB, dists = _qgram_candidates(seqs, groups, 2, 2, max_postings=0)
+    assert (idxA < idxB).all() and (np.diff(dists) >= 0).all()
+    assert all(groups[a] != groups[b] for a, b in zip(idxA, idxB))
+    assert (0, 1) in list(zip(idxA, idxB))
+    assert 5 not in idxA and 5 not in idxB
+    # q-grams of as much padding as sound classes are only used for words
+    # which have no other q-grams
+    grams = [
+        {gram for gram in get_n_ngrams(seq, 2) if '$$$' not in gram}
+        for seq in seqs]
+    for a, b, d in zip(idxA, idxB, dists):
+        assert d == pytest.approx(1 - 2 * len(grams[a] & grams[b]) / (
+            len(grams[a]) + len(grams[b])))
+    assert len(_qgram_candidates(seqs, groups, 2, 2, max_postings=1)[0]) == 0
+    assert len(_qgram_candidates(['TA', 'TI'], [0, 1], 2, 1, 0)[0]) == 0
+    assert len(_qgram_candidates(['T', 'T'], [0, 1], 2, 1, 0)[0]) == 1
+
+    # the posting lists are limited to the square root of the number of
+    # sequences by default
+    seqs, groups = ['TAKA'] * 20 + ['TUKU'], list(range(21))
+    assert len(_qgram_candidates(seqs, groups, 3, 1)[0]) == 0
+    assert len(_qgram_candidates(seqs, groups, 3, 1, max_postings=0)[0]) > 0
+
+
+def test_get_candidates(lex, get_scorer_kw):
+    candidates = lex.get_candidates(k=3)
+    assert all(lex[a, 'concept'] != lex[b, 'concept'] for a, b, d in
+               candidates)
+    assert [d for a, b, d in candidates] == sorted(
+        d for a, b, d in candidates)
+    lex.get_scorer(**get_scorer_kw)
+    for method in ['sca', 'lexstat']:
+        rescored = lex.get_candidates(k=3, method=method)
+        assert sorted((a, b) for a, b, d in rescored) == sorted(
+            (a, b) for a, b, d in candidates)
+        function = lex._distance_method(
+            method, scale=0.5, factor=0.3, restricted_chars='_T',
+            mode='overlap', gop=-2)
+        for a, b, d in rescored[:20]:
+            assert d == pytest.approx(function(a, b))
+
+
+def test_cluster_cutoff(lex, get_scorer_kw):
+    lex.get_scorer(**get_scorer_kw)
+    for method in ['sca', 'lexstat']:
+        lex.cluster(method=method, cluster_method='single', threshold=0.5,
+                    ref=method + 'full')
+        lex.cluster(method=method, cluster_method='single', threshold=0.5,
+                    ref=method + 'cutoff', cutoff=0.5)
+        assert [lex[idx, method + 'full'] for idx in lex] == \
+            [lex[idx, method + 'cutoff'] for idx in lex]
+        matrix = list(lex._get_matrices(
+            concept="hand", method=method, cutoff=0.5))[0]
+        full = list(lex._get_matrices(concept="hand", method=method))[0]
+        for row, full_row in zip(matrix, full):
+            for d, full_d in zip(row, full_row):
+                assert d == full_d or 0.5 < d <= full_d + 1e-6
 
 
 def test_get_frequencies(lex):
@@ -195,6 +432,42 @@ def test_output(lex, tmp_path):
     lex.output('scorer', filename=str(tmp_path / 'test_lexstat'))
 
 
+def test_output_compiled(lex, lextstat_factory, tmp_path, mocker):
+    lex.output('bin', filename=str(tmp_path / 'ksl'))
+    path = tmp_path / 'ksl.bin'
+    assert (path / 'lexstat.json').exists()
+
+    mocker.patch.object(LexStat, '_make_pairs')
+    mocker.patch.object(LexStat, '_make_chars')
+    lex2 = lextstat_factory(str(path))
+    assert not LexStat._make_pairs.called and not LexStat._make_chars.called
+    assert lex2.freqs == lex.freqs
+    assert lex2.chars == lex.chars and lex2.rchars == lex.rchars
+    assert lex2.pairs == lex.pairs and list(lex2.pairs) == list(lex.pairs)
+    assert lex2.bscorer.matrix == lex.bscorer.matrix
+    assert lex2.bscorer.chars2int == lex.bscorer.chars2int
+    mocker.stopall()
+
+    spec = jsonlib.load(path / 'lexstat.json')
+    spec['version'] += 1
+    jsonlib.dump(spec, path / 'lexstat.json')
+    lex3 = lextstat_factory(str(path))
+    assert lex3.freqs == lex.freqs and lex3.pairs == lex.pairs
+
+    # the data of a word list written again to the same directory is not
+    # matched by the preprocessed data which is still stored there
+    lex.output('bin', filename=str(tmp_path / 'ksl'))
+    wl = Wordlist(str(path))
+    idx = wl.get_list(row=wl.rows[0], flat=True)[0]
+    wl[idx, 'concept'] = wl.rows[1]
+    wl.output('bin', filename=str(tmp_path / 'ksl'))
+    assert (path / 'lexstat.json').exists()
+    lex4 = lextstat_factory(str(path))
+    (path / 'lexstat.json').unlink()
+    lex5 = lextstat_factory(str(path))
+    assert lex4.pairs == lex5.pairs and lex4.pairs != lex.pairs
+
+
 def test_correctness(lextstat_factory):
     lex = lextstat_factory({
         0: ['ID', 'doculect', 'concept', 'IPA'],
@@ -71,6 +71,18 @@ def test_partial_cluster(part, part2):
     assert part2[8, 'parts4'][1] == part2[10, 'parts4'][1]
 
 
+def test_partial_cluster_processes(part):
+    for imap_mode in [True, False]:
+        refs = ['parts{0}{1}'.format(imap_mode, p) for p in [1, 2]]
+        for processes, ref in zip([1, 2], refs):
+            part.partial_cluster(
+                method='sca', threshold=0.45, split_on_tones=True,
+                cluster_method='upgma', imap_mode=imap_mode,
+                processes=processes, ref=ref)
+        assert [part[idx, refs[0]] for idx in part] == \
+            [part[idx, refs[1]] for idx in part]
+
+
 def test_add_cognate_ids(part):
     part.partial_cluster(method='sca', threshold=0.45,
             split_on_tones=True,
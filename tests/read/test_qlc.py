@@ -1,7 +1,7 @@
 import pytest
 
 from lingpy.align import MSA
-from lingpy.read.qlc import read_msa, reduce_alignment, read_qlc
+from lingpy.read.qlc import read_msa, reduce_alignment, read_qlc, iter_qlc
 from lingpy.thirdparty.cogent.tree import TreeNode
 
 
@@ -59,3 +59,31 @@ x   z
     assert res['x']['y'] == 5
     assert isinstance(res['trees']['1'], TreeNode)
     assert res['z']['a'] == [4, 5]
+
+
+def test_iter_qlc(tmp_path):
+    p = tmp_path / 'test.qlc'
+    p.write_text("""\
+# comment
+@author: x
+CONCEPT\tDOCULECT
+a\tb
+<json>
+{"y": 5}
+</json>
+c\td
+""", encoding='utf8')
+    meta = {}
+    rows = iter_qlc(str(p), meta=meta)
+    assert next(rows) == (0, ['concept', 'doculect'])
+    assert next(rows) == (1, ['a', 'b'])
+    assert 'y' not in meta
+    assert list(rows) == [(2, ['c', 'd'])]
+    assert meta == {'author': 'x', 'y': 5}
+
+    p.write_text("<json>\n{}\n", encoding='utf8')
+    with pytest.raises(ValueError):
+        read_qlc(str(p))
+    p.write_text("# only a comment\n", encoding='utf8')
+    with pytest.raises(ValueError):
+        read_qlc(str(p))
@@ -6,3 +6,21 @@ def test_cache(tmp_path):
     filename = 'lingpy_test.CSV'
     cache.dump(d, filename, d=tmp_path / 'cache')
     assert cache.load(filename, d=tmp_path / 'cache') == d
+
+
+def test_prune(tmp_path):
+    for i in range(3):
+        cache.dump(list(range(100)), 'test{0}'.format(i), d=tmp_path)
+    size = cache.path('test0', d=tmp_path).stat().st_size
+    cache.load('test0', d=tmp_path)
+    cache.prune(2 * size, d=tmp_path)
+    assert sorted(p.name for p in tmp_path.glob('*.pkl')) == [
+        'test0.pkl', 'test2.pkl']
+    cache.prune(0, d=tmp_path)
+    assert not list(tmp_path.glob('*.pkl'))
+    cache.prune(0, d=tmp_path / 'missing')
+
+
+def test_fingerprint():
+    assert cache.fingerprint([1, 2], 'a') == cache.fingerprint([1, 2], 'a')
+    assert cache.fingerprint([1, 2], 'a') != cache.fingerprint([1], '2a')
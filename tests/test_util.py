@@ -15,6 +15,8 @@ def test_write_text_file(tmp_path):
 
     util.write_text_file(path, lines_generator(5))
     assert len(util.read_text_file(path, lines=True)) == 5
+    assert list(util.iter_text_file(path)) == util.read_text_file(
+        path, lines=True)
 
 
 def test_TextFile(tmp_path):
@@ -42,6 +44,16 @@ def test_combinations2():
         assert list(util.multicombinations2(ch)) == list(fm(ch))
 
 
+def test_parallel_map():
+    from concurrent.futures import ThreadPoolExecutor
+
+    items = list(range(20))
+    assert util.parallel_map(abs, items) == items
+    assert util.parallel_map(abs, items, processes=2) == items
+    with ThreadPoolExecutor(2) as executor:
+        assert util.parallel_map(abs, items, executor=executor) == items
+
+
 def test_join():
     assert util.join('.') == ''
     assert util.join('.', 1) == '1'